@@ -0,0 +1 @@
+"""Benchmarks of the indexer, on synthetic collections, against a local stand-in for IGDB"""
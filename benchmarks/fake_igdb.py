@@ -0,0 +1,262 @@
+"""A local stand-in for IGDB's /v4/games, Twitch's token endpoint and IGDB's image CDN.
+Games are made up from their IDs, requests can be delayed and rate limited like the real ones"""
+
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional
+
+from PIL import Image, ImageDraw
+
+COVER_SIZE = (264, 374)
+COVER_TEMPLATES = 8
+BASE_UPDATED_AT = 1_600_000_000
+
+
+def make_cover_jpeg(seed: int) -> bytes:
+    """a real cover-sized JPEG, a gradient with a few shapes, so it compresses like a picture would"""
+    img = Image.new("RGB", COVER_SIZE)
+    draw = ImageDraw.Draw(img)
+    for y in range(COVER_SIZE[1]):
+        draw.line([(0, y), (COVER_SIZE[0], y)], fill=((seed * 37 + y) % 256, (seed * 91) % 256, (255 - y) % 256))
+    for index in range(6):
+        x, y = (seed * 53 + index * 41) % COVER_SIZE[0], (seed * 29 + index * 67) % COVER_SIZE[1]
+        draw.ellipse([x, y, x + 60, y + 60], fill=((index * 40) % 256, (seed * 13) % 256, (index * 90) % 256))
+    cover = io.BytesIO()
+    img.save(cover, format="JPEG", quality=85)
+    return cover.getvalue()
+
+
+def is_changed(game_id: int, changed_fraction: float) -> bool:
+    """whether a game changed in IGDB since the synthetic collections were made, the same ones every run"""
+    return int(hashlib.md5(str(game_id).encode()).hexdigest(), 16) % 10_000 < changed_fraction * 10_000
+
+
+def make_game_record(game_id: int, cover_base_url: str, version: int = 0) -> Dict[str, Any]:
+    """IGDB's whole document for a game, with about as many fields (and as much text) as real ones"""
+    checksum = hashlib.md5(f"{game_id}:{version}".encode()).hexdigest()
+    return {
+        "id": game_id,
+        "name": f"Synthetic Game {game_id}: Part {game_id % 7}",
+        "slug": f"synthetic-game-{game_id}",
+        "url": f"https://www.igdb.com/games/synthetic-game-{game_id}",
+        "updated_at": BASE_UPDATED_AT + game_id + version,
+        "created_at": BASE_UPDATED_AT - game_id,
+        "checksum": f"{checksum[:8]}-{checksum[8:12]}-{checksum[12:16]}-{checksum[16:20]}-{checksum[20:]}",
+        "category": 0,
+        "rating": 50 + game_id % 50,
+        "rating_count": game_id % 1000,
+        "summary": f"Synthetic game number {game_id}. " * 20,
+        "storyline": f"Once upon a time, there was game {game_id}. " * 30,
+        "cover": {
+            "id": game_id * 10,
+            "game": game_id,
+            "image_id": f"co{game_id:x}",
+            "width": COVER_SIZE[0],
+            "height": COVER_SIZE[1],
+            "url": f"{cover_base_url}/t_thumb/{game_id}.jpg",
+            "checksum": checksum,
+        },
+        "release_dates": [
+            {
+                "id": game_id * 10 + index,
+                "game": game_id,
+                "y": 1980 + (game_id + index) % 45,
+                "m": 1 + index,
+                "human": f"Jan {1980 + (game_id + index) % 45}",
+                "platform": 6 + index,
+                "region": 8,
+                "category": 0,
+                "checksum": checksum,
+            }
+            for index in range(3)
+        ],
+        **{
+            field: [game_id * 100 + index for index in range(12)]
+            for field in [
+                "genres",
+                "platforms",
+                "similar_games",
+                "themes",
+                "keywords",
+                "screenshots",
+                "videos",
+                "websites",
+                "involved_companies",
+                "game_modes",
+                "player_perspectives",
+                "age_ratings",
+            ]
+        },
+    }
+
+
+def project_fields(record: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """keeps only the requested fields, like IGDB: "*" is all fields (nested ones as IDs), "a.*" expands a,
+    "a.b" keeps only b of a, and id is always kept"""
+    projected: Dict[str, Any] = {"id": record["id"]}
+    nested_fields: Dict[str, List[str]] = {}
+    for field in fields:
+        name, _, nested_field = field.partition(".")
+        if name == "*":
+            for key, value in record.items():
+                if isinstance(value, dict):
+                    value = value["id"]
+                elif isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
+                    value = [nested_value["id"] for nested_value in value]
+                projected.setdefault(key, value)
+        elif name in record:
+            if nested_field == "":
+                projected[name] = record[name]
+            else:
+                nested_fields.setdefault(name, []).append(nested_field)
+    for name, nested_field_names in nested_fields.items():
+        value = record[name]
+        if isinstance(value, dict):
+            projected[name] = project_fields(value, nested_field_names)
+        else:
+            projected[name] = [project_fields(nested_value, nested_field_names) for nested_value in value]
+    return projected
+
+
+class FakeIgdbServer:
+    """serves IGDB's API, Twitch's tokens and covers on localhost, in a background thread.
+    Every request waits latency_ms, and API requests beyond requests_per_s (in any 1s window) get a 429"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        requests_per_s: Optional[float] = 4,
+        changed_fraction: float = 0,
+        max_games: int = 1_000_000,
+    ):
+        self.latency_ms = latency_ms
+        self.requests_per_s = requests_per_s
+        self.changed_fraction = changed_fraction
+        self.max_games = max_games  # games with greater IDs don't exist
+        self.covers = [make_cover_jpeg(seed) for seed in range(COVER_TEMPLATES)]
+        self.api_request_times: Deque[float] = deque()
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = {}
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real servers
+
+            def log_message(self, *_args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                server.handle(self, "POST", body)
+
+            def do_GET(self) -> None:
+                server.handle(self, "GET", "")
+
+        self.http_server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.http_server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.http_server.server_address[1]}"
+        self.games_url = self.base_url + "/v4/games"
+        self.auth_url = self.base_url + "/oauth2/token"
+        self.cover_base_url = self.base_url + "/igdb/image/upload"
+        self.thread = threading.Thread(target=self.http_server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeIgdbServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.http_server.shutdown()
+        self.http_server.server_close()
+
+    def count(self, stat: str, amount: int = 1) -> None:
+        with self.lock:
+            self.stats[stat] = self.stats.get(stat, 0) + amount
+
+    def reset_stats(self) -> Dict[str, int]:
+        """returns the stats so far, and starts counting from zero"""
+        with self.lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    def is_rate_limited(self) -> bool:
+        if self.requests_per_s is None:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            while len(self.api_request_times) > 0 and self.api_request_times[0] <= now - 1:
+                self.api_request_times.popleft()
+            if len(self.api_request_times) >= self.requests_per_s:
+                return True
+            self.api_request_times.append(now)
+        return False
+
+    def get_game_record(self, game_id: int) -> Dict[str, Any]:
+        return make_game_record(game_id, self.cover_base_url, 1 if is_changed(game_id, self.changed_fraction) else 0)
+
+    def query_games(self, query: str) -> List[Dict[str, Any]]:
+        """answers an APIcalypse query, only "fields ...; where id = (...)/slug = (...); limit ...;" are understood"""
+        fields = ["*"]
+        game_ids: List[int] = []
+        limit = 10
+        for clause in query.split(";"):
+            keyword, _, argument = clause.strip().partition(" ")
+            if keyword == "fields":
+                fields = [field.strip() for field in argument.split(",")]
+            elif keyword == "limit":
+                limit = int(argument)
+            elif keyword == "where":
+                key, _, values = argument.partition("=")
+                values = values.strip().strip("()")
+                if key.strip() == "id":
+                    game_ids = [int(value) for value in values.split(",") if value.strip() != ""]
+                elif key.strip() == "slug":
+                    game_ids = [int(slug) for slug in re.findall(r'"synthetic-game-(\d+)"', values)]
+        game_ids = [game_id for game_id in game_ids if 0 < game_id <= self.max_games][:limit]
+        return [project_fields(self.get_game_record(game_id), fields) for game_id in game_ids]
+
+    def handle(self, handler: BaseHTTPRequestHandler, method: str, body: str) -> None:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        path = handler.path.split("?")[0]
+        status, headers, content = 404, {}, b""
+        if method == "POST" and path == "/oauth2/token":
+            self.count("auth_requests")
+            status = 200
+            content = json.dumps(
+                {"access_token": "fake_token", "expires_in": 5_000_000, "token_type": "bearer"}
+            ).encode()
+        elif method == "POST" and path == "/v4/games":
+            self.count("api_requests")
+            if self.is_rate_limited():
+                self.count("api_rate_limited")
+                status, content = 429, b'{"message": "Too Many Requests"}'
+            else:
+                status = 200
+                content = json.dumps(self.query_games(body)).encode()
+                self.count("api_bytes", len(content))
+        elif method == "GET" and path.startswith("/igdb/image/upload/"):
+            self.count("cover_requests")
+            match = re.search(r"/(\d+)\.jpg$", path)
+            if match is not None:
+                game_id = int(match.group(1))
+                etag = f'"{game_id}-{1 if is_changed(game_id, self.changed_fraction) else 0}"'
+                headers["ETag"] = etag
+                if handler.headers.get("If-None-Match") == etag:
+                    status = 304
+                else:
+                    status, content = 200, self.covers[game_id % COVER_TEMPLATES]
+                    headers["Content-Type"] = "image/jpeg"
+                    self.count("cover_bytes", len(content))
+        handler.send_response(status)
+        for header, value in headers.items():
+            handler.send_header(header, value)
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
@@ -0,0 +1,173 @@
+"""Runs the benchmarks, printing the results as JSON, e.g.:
+
+    python -m benchmarks.run --games 1000,10000,50000 --lists 8 --latency-ms 50 > results.json
+
+Each collection size gets a synthetic user_data directory in a temporary working directory, IGDB is a local
+FakeIgdbServer. GUI benchmarks are skipped if there's no display"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import igdb_indexer
+from benchmarks.fake_igdb import FakeIgdbServer
+from benchmarks.synthetic_data import make_user_data
+from igdb_indexer import profiling
+from igdb_indexer.catalog import GameCatalog
+from igdb_indexer.igdb_interface import (
+    AUTH_URL_ENV_VAR,
+    DEFAULT_GAME_FIELDS,
+    GAMES_API_URL_ENV_VAR,
+    IGDB_PAGE_LIMIT,
+    get_games_api_url,
+    get_token_manager,
+    post_igdb,
+)
+from igdb_indexer.storage import get_storage
+from igdb_indexer.updates import refresh_list
+
+SEARCH_TEXT = "synthetic game 12"
+FULL_FIELDS = "*,release_dates.*,cover.*"  # what games were queried with, before the projection was trimmed
+
+
+def timed(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def benchmark_storage(lists: Dict[str, List[int]]) -> Dict[str, Any]:
+    """what startup reads before the first paint, building tabs' data, and searching as someone types"""
+    storage = get_storage()
+    results: Dict[str, Any] = {}
+    results["startup_count_games_s"] = timed(lambda: [storage.count_games(list_name) for list_name in lists])
+
+    catalog = GameCatalog()
+    results["catalog_load_list"] = profiling.summarize(
+        [timed(lambda: catalog.load_list(list_name)) for list_name in lists]
+    )
+    results["search_keystroke"] = profiling.summarize(
+        [timed(lambda: catalog.search_index.search(SEARCH_TEXT[:length])) for length in range(1, len(SEARCH_TEXT) + 1)]
+    )
+    return results
+
+
+def benchmark_projection(server: FakeIgdbServer) -> Dict[str, Any]:
+    """response size and parse time of a page of games, with all fields and with the ones the indexer uses"""
+    access_token = get_token_manager().get_token()
+    game_ids = ",".join(str(game_id) for game_id in range(1, IGDB_PAGE_LIMIT + 1))
+    results = {}
+    for name, fields in [("full", FULL_FIELDS), ("default", DEFAULT_GAME_FIELDS)]:
+        response = post_igdb(
+            get_games_api_url(), f"fields {fields}; where id = ({game_ids}); limit {IGDB_PAGE_LIMIT};", access_token
+        )
+        results[name] = {"bytes": len(response.content), "parse_s": timed(lambda: json.loads(response.content))}
+    server.reset_stats()
+    return results
+
+
+def benchmark_refresh(server: FakeIgdbServer, list_name: str, only_changed: bool) -> Dict[str, Any]:
+    """refreshes a list like the GUI and CLI do, the server's stats tell how much was fetched"""
+    server.reset_stats()
+    duration_s = timed(lambda: refresh_list(list_name, only_changed=only_changed))
+    return {"duration_s": duration_s, "server": server.reset_stats()}
+
+
+def benchmark_gui() -> Dict[str, Any]:
+    """startup to first paint, building each tab, and filtering the first tab as someone types"""
+    import tkinter as tk
+
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as exception:
+        return {"skipped": f"no display: {exception}"}
+    from igdb_indexer.gui import MainWindow
+
+    results: Dict[str, Any] = {}
+    start = time.perf_counter()
+    window = MainWindow(get_storage().get_all_json())
+    window.update()
+    results["startup_to_first_paint_s"] = time.perf_counter() - start
+
+    def build(tab) -> None:
+        tab.build()
+        window.update_idletasks()
+
+    results["tab_build"] = profiling.summarize([timed(lambda: build(tab)) for tab in window.tabs[1:]])
+
+    page = window.tabs[0].build()
+
+    def filter_games(text: str) -> None:
+        page.filter_games(text)
+        window.update_idletasks()
+
+    results["filter_games_keystroke"] = profiling.summarize(
+        [timed(lambda: filter_games(SEARCH_TEXT[:length])) for length in range(1, len(SEARCH_TEXT) + 1)]
+    )
+    window.destroy()
+    return results
+
+
+def run(num_games: int, num_lists: int, server: FakeIgdbServer, gui: bool) -> Dict[str, Any]:
+    """all benchmarks on a new synthetic collection, in a temporary working directory"""
+    results: Dict[str, Any] = {"games": num_games, "lists": num_lists}
+    work_dir = tempfile.mkdtemp(prefix="igdb_indexer_benchmark_")
+    previous_dir = os.getcwd()
+    try:
+        # the GUI expects its images, and user_data, in the working directory
+        package_dir = os.path.dirname(igdb_indexer.__file__)
+        os.makedirs(os.path.join(work_dir, "igdb_indexer"))
+        for image in ["default.jpg", "igdb.png"]:
+            shutil.copy(os.path.join(package_dir, image), os.path.join(work_dir, "igdb_indexer", image))
+        os.chdir(work_dir)
+
+        lists: Dict[str, List[int]] = {}
+        results["make_user_data_s"] = timed(
+            lambda: lists.update(make_user_data("user_data", num_games, num_lists, server.cover_base_url))
+        )
+        results.update(benchmark_storage(lists))
+        if gui:
+            results["gui"] = benchmark_gui()
+        results["projection"] = benchmark_projection(server)
+        first_list = next(iter(lists))
+        # only games changed in the fake IGDB are stale, until the full refresh fetches them all
+        results["changed_refresh"] = benchmark_refresh(server, first_list, only_changed=True)
+        results["full_refresh"] = benchmark_refresh(server, first_list, only_changed=False)
+        results["remove_json_s"] = timed(lambda: get_storage().remove_json(list(lists)[1 % num_lists]))
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", default="1000,10000", help="comma-separated collection sizes")
+    parser.add_argument("--lists", type=int, default=8, help="lists the games are split over")
+    parser.add_argument("--latency-ms", type=float, default=20, help="latency of every request to the fake IGDB")
+    parser.add_argument("--requests-per-s", type=float, default=4, help="IGDB API rate limit, 0 for none")
+    parser.add_argument("--changed", type=float, default=0.05, help="fraction of games changed in the fake IGDB")
+    parser.add_argument("--no-gui", action="store_true", help="skip the GUI benchmarks")
+    args = parser.parse_args()
+
+    os.environ.setdefault("CLIENT_ID", "benchmark")
+    os.environ.setdefault("CLIENT_SECRET", "benchmark")
+    runs = []
+    with FakeIgdbServer(args.latency_ms, args.requests_per_s or None, args.changed) as server:
+        os.environ[GAMES_API_URL_ENV_VAR] = server.games_url
+        os.environ[AUTH_URL_ENV_VAR] = server.auth_url
+        for num_games in [int(games) for games in args.games.split(",")]:
+            # the app's own prints go to stderr, so stdout is only the results
+            with contextlib.redirect_stdout(sys.stderr):
+                runs.append(run(num_games, args.lists, server, not args.no_gui))
+    print(json.dumps({"config": vars(args), "runs": runs}, indent=4))
+
+
+if __name__ == "__main__":
+    main()
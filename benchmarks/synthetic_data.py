@@ -0,0 +1,43 @@
+"""Makes synthetic user_data directories, as if their games had been fetched from the fake IGDB"""
+
+import os
+from typing import Dict, List
+
+from benchmarks.fake_igdb import COVER_TEMPLATES, make_cover_jpeg, make_game_record
+from igdb_indexer.igdb_interface import CoverStore, parse_game_json
+from igdb_indexer.storage import get_storage
+
+
+def get_list_game_ids(num_games: int, num_lists: int, overlap: float = 0.1) -> Dict[str, List[int]]:
+    """splits games 1..num_games over num_lists lists, a fraction (overlap) of each list's games also in the next"""
+    lists: Dict[str, List[int]] = {f"list{index:02d}.json": [] for index in range(num_lists)}
+    list_names = list(lists)
+    for game_id in range(1, num_games + 1):
+        lists[list_names[game_id % num_lists]].append(game_id)
+        if game_id % int(1 / overlap) == 0:
+            lists[list_names[(game_id + 1) % num_lists]].append(game_id)
+    return lists
+
+
+def make_user_data(
+    data_dir: str, num_games: int, num_lists: int, cover_base_url: str, overlap: float = 0.1
+) -> Dict[str, List[int]]:
+    """writes num_games games over num_lists lists, with their covers (and cover index) in data_dir.
+    Lists are saved in the storage in use, returns {list name: game IDs}"""
+    os.makedirs(data_dir, exist_ok=True)
+    covers = [make_cover_jpeg(seed) for seed in range(COVER_TEMPLATES)]
+    cover_store = CoverStore(data_dir)
+    games_json = {}
+    for game_id in range(1, num_games + 1):
+        game_json, cover_url = parse_game_json(str(game_id), make_game_record(game_id, cover_base_url))
+        games_json[game_id] = game_json
+        with open(cover_store.cover_path(str(game_id)), "wb") as cover_file:
+            cover_file.write(covers[game_id % COVER_TEMPLATES])
+        cover_store.set_entry(str(game_id), {"url": cover_url or "", "etag": f'"{game_id}-0"', "last_modified": ""})
+    cover_store.save()
+
+    lists = get_list_game_ids(num_games, num_lists, overlap)
+    storage = get_storage()
+    for json_file_name, game_ids in lists.items():
+        storage.save_json(json_file_name, {"games": [games_json[game_id] for game_id in game_ids]}, data_dir=data_dir)
+    return lists
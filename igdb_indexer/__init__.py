@@ -1,7 +1,14 @@
 """A GUI to keep track of videogames from IGDB.com"""
 
+import importlib
+from typing import Any
+
 # Define the __all__ variable
 __all__ = ["gui", "game_details", "igdb_interface", "json_interface"]
 
-# Import the submodules
-from . import game_details, gui, igdb_interface, json_interface
+
+def __getattr__(name: str) -> Any:
+    """imports submodules when first used, so the CLI never imports the GUI (and Tk)"""
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
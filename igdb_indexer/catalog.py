@@ -0,0 +1,93 @@
+"""Games of all lists, each kept once"""
+
+import bisect
+from typing import Any, Dict, List, Set
+
+from igdb_indexer.game_details import GameDetails
+from igdb_indexer.search_index import SearchIndex
+from igdb_indexer.storage import get_storage
+
+
+class GameCatalog:
+    """All loaded games, keyed by game_id, so a game in several lists is only parsed and kept once.
+    Lists only hold the IDs of their games, and a single index searches the games of all of them"""
+
+    def __init__(self) -> None:
+        self.games: Dict[str, GameDetails] = {}
+        self.lists: Dict[str, List[str]] = {}  # JSON file name -> IDs of its games, sorted by order_name
+        self.game_lists: Dict[str, Set[str]] = {}  # game_id -> JSON file names of the lists with it
+        self.search_index = SearchIndex()
+
+    def add_list(self, json_file_name: str, games_json: Dict[str, Any]) -> List[str]:
+        """adds (or replaces) a list given its JSON contents, returns the IDs of its games, sorted"""
+        game_ids: Dict[str, None] = {}
+        for game_json in games_json["games"]:
+            game_ids[self._link(json_file_name, game_json)] = None
+        for game_id in self.lists.get(json_file_name, []):
+            if game_id not in game_ids:
+                self._unlink(json_file_name, game_id)
+
+        sorted_game_ids = sorted(game_ids, key=lambda game_id: self.games[game_id])
+        self.lists[json_file_name] = sorted_game_ids
+        return sorted_game_ids
+
+    def load_list(self, json_file_name: str, data_dir: str = "user_data") -> List[str]:
+        """(re)loads a list from storage, returns the IDs of its games, sorted"""
+        return self.add_list(json_file_name, get_storage().load_json(json_file_name, data_dir=data_dir))
+
+    def remove_list(self, json_file_name: str) -> None:
+        for game_id in self.lists.pop(json_file_name, []):
+            self._unlink(json_file_name, game_id)
+
+    def add_game(self, json_file_name: str, game_json: Dict[str, Any]) -> int:
+        """adds (or updates) a single game of a list, returns its index in the sorted list"""
+        game_ids = self.lists.setdefault(json_file_name, [])
+        if json_file_name in self.game_lists.get(game_json["game_id"], set()):
+            game_ids.remove(game_json["game_id"])  # re-inserted, in case its order_name changed
+        game_id = self._link(json_file_name, game_json)
+        index = bisect.bisect_right(game_ids, self.games[game_id], key=lambda game_id: self.games[game_id])
+        game_ids.insert(index, game_id)
+        return index
+
+    def remove_game(self, json_file_name: str, game_id: str) -> int:
+        """removes a single game of a list, returns its index in the sorted list (or -1, if not there)"""
+        game_ids = self.lists.get(json_file_name, [])
+        if game_id not in game_ids:
+            return -1
+        index = game_ids.index(game_id)
+        del game_ids[index]
+        self._unlink(json_file_name, game_id)
+        return index
+
+    def _link(self, json_file_name: str, game_json: Dict[str, Any]) -> str:
+        """adds a game to a list, parsing it only if it's new or changed, returns its ID"""
+        game_id = game_json["game_id"]
+        known_game = self.games.get(game_id)
+        if known_game is None or known_game.to_json() != game_json:
+            known_game = GameDetails.from_json(game_json)
+            self.games[game_id] = known_game
+            self.search_index.add(known_game)
+        self.game_lists.setdefault(game_id, set()).add(json_file_name)
+        return game_id
+
+    def _unlink(self, json_file_name: str, game_id: str) -> None:
+        """removes a game from a list, and from the catalog if no other list has it"""
+        game_lists = self.game_lists[game_id]
+        game_lists.discard(json_file_name)
+        if len(game_lists) == 0:
+            del self.game_lists[game_id]
+            del self.games[game_id]
+            self.search_index.remove(game_id)
+
+    def get_games(self, json_file_name: str) -> List[GameDetails]:
+        return [self.games[game_id] for game_id in self.lists.get(json_file_name, [])]
+
+    def search(self, text: str) -> Dict[str, List[GameDetails]]:
+        """the games matching text, sorted, grouped by (sorted) lists that have them"""
+        results: Dict[str, List[GameDetails]] = {}
+        for game_id in self.search_index.search(text):
+            for json_file_name in self.game_lists[game_id]:
+                results.setdefault(json_file_name, []).append(self.games[game_id])
+        for games in results.values():
+            games.sort()
+        return dict(sorted(results.items()))
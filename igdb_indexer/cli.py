@@ -0,0 +1,216 @@
+"""A command line interface to manage lists without the GUI (and without Tk), e.g., for scheduled refreshes:
+
+    python -m igdb_indexer.cli refresh --changed
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional
+
+from igdb_indexer import json_interface, profiling
+from igdb_indexer.igdb_interface import paginate
+from igdb_indexer.storage import get_storage
+from igdb_indexer.thumbnails import THUMBNAIL_WIDTH_PX, warm_thumbnails
+from igdb_indexer.updates import add_games, read_game_references, refresh_list
+
+PROGRESS_INTERVAL_S = 1  # progress is printed at most this often, and when done
+THUMBNAILS_CHUNK_SIZE = 50  # games per task when warming thumbnails in parallel
+
+
+def get_json_name(list_name: str) -> str:
+    """lists can be named with or without their ".json" suffix"""
+    return list_name if list_name.endswith(".json") else list_name + ".json"
+
+
+def make_progress_cb(label: str, total: int) -> Callable[[int], None]:
+    """prints "label: done/total" as work progresses"""
+    last_print_s = 0.0
+
+    def progress_cb(done: int) -> None:
+        nonlocal last_print_s
+        now_s = time.monotonic()
+        if done >= total or now_s - last_print_s >= PROGRESS_INTERVAL_S:
+            last_print_s = now_s
+            print(f"{label}: {done}/{total}", flush=True)
+
+    return progress_cb
+
+
+def add(args: argparse.Namespace) -> int:
+    json_name = get_json_name(args.list)
+    references = list(args.references)
+    for path in args.file:
+        references.extend(read_game_references(path))
+    if len(references) == 0:
+        print("Error: no games to add")
+        return 1
+    _games_json, failed_references = add_games(
+        json_name,
+        references,
+        make_progress_cb(f"Adding to {json_name}", len(references)),
+        data_dir=args.data_dir,
+    )
+    print(f"Added {len(references) - len(failed_references)} of {len(references)} games to {json_name}")
+    if len(failed_references) > 0:
+        print(f"Failed to add: {', '.join(failed_references)}")
+        return 1
+    return 0
+
+
+def import_lists(args: argparse.Namespace) -> int:
+    """saves lists from JSON files (e.g., of another machine), fetching the games without covers from IGDB"""
+    exit_code = 0
+    for path in args.files:
+        json_name = get_json_name(args.list or os.path.basename(path))
+        with open(path, newline="") as json_file:
+            games_json = json.load(json_file)
+        if not isinstance(games_json, dict) or not isinstance(games_json.get("games"), list):
+            print(f"Error: {path} isn't a list of games")
+            exit_code = 1
+            continue
+        get_storage().save_json(json_name, games_json, data_dir=args.data_dir)
+        game_ids = [game["game_id"] for game in games_json["games"]]
+        cover_game_ids = json_interface.get_cover_game_ids(data_dir=args.data_dir)
+        missing_cover_ids = [game_id for game_id in game_ids if game_id not in cover_game_ids]
+        if len(missing_cover_ids) > 0 and not args.no_covers:
+            _games_json, failed_references = add_games(
+                json_name,
+                missing_cover_ids,
+                make_progress_cb(f"Fetching covers of {json_name}", len(missing_cover_ids)),
+                data_dir=args.data_dir,
+            )
+            fetched = len(missing_cover_ids) - len(failed_references)
+            print(f"Fetched {fetched} of {len(missing_cover_ids)} games without covers")
+            if len(failed_references) > 0:
+                print(f"Failed to fetch: {', '.join(failed_references)}")
+                exit_code = 1
+        print(f"Imported {len(game_ids)} games to {json_name}")
+    return exit_code
+
+
+def refresh(args: argparse.Namespace) -> int:
+    json_names = [get_json_name(list_name) for list_name in args.lists]
+    exit_code = 0
+    for json_name in json_names or get_storage().get_all_json(data_dir=args.data_dir):
+        games_json = get_storage().load_json(json_name, data_dir=args.data_dir)["games"]
+        _games_json, missing_game_ids = refresh_list(
+            json_name,
+            games_json,
+            only_changed=args.changed,
+            progress_cb=make_progress_cb(f"Refreshing {json_name}", len(games_json)),
+            data_dir=args.data_dir,
+        )
+        if len(missing_game_ids) > 0:
+            print(f"No longer found in IGDB, kept as they were: {', '.join(missing_game_ids)}")
+            exit_code = 1
+    return exit_code
+
+
+def remove_list(args: argparse.Namespace) -> int:
+    all_json = get_storage().get_all_json(data_dir=args.data_dir)
+    exit_code = 0
+    for json_name in [get_json_name(list_name) for list_name in args.lists]:
+        if json_name not in all_json:
+            print(f"No list {json_name}")
+            exit_code = 1
+            continue
+        get_storage().remove_json(json_name, data_dir=args.data_dir)
+    return exit_code
+
+
+def prune_covers(args: argparse.Namespace) -> int:
+    storage = get_storage()
+    if storage is json_interface and not json_interface.verify_references(data_dir=args.data_dir):
+        print("Which lists have each game was out of date, rebuilding it")
+    removed_game_ids = storage.collect_garbage(data_dir=args.data_dir)
+    print(f"Removed {len(removed_game_ids)} unused covers")
+    return 0
+
+
+def warm(args: argparse.Namespace) -> int:
+    """generates thumbnails in a pool of processes, across all cores"""
+    game_ids = get_storage().get_all_game_ids(data_dir=args.data_dir)
+    chunks = paginate(game_ids, THUMBNAILS_CHUNK_SIZE)
+    progress_cb = make_progress_cb("Generating thumbnails", len(game_ids))
+    done = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(warm_thumbnails, chunk, args.width, args.data_dir): len(chunk) for chunk in chunks}
+        for future in as_completed(futures):
+            future.result()
+            done += futures[future]
+            progress_cb(done)
+    return 0
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--profile",
+        metavar="MODES",
+        help=f"profile this run, like {profiling.PROFILE_ENV_VAR}: summary, cprofile and/or trace",
+    )
+    parser.add_argument("--data-dir", default="user_data", help="where lists and covers are kept")
+    subparsers = parser.add_subparsers(required=True, metavar="command")
+
+    add_parser = subparsers.add_parser("add", help="fetch games from IGDB and add them to a list")
+    add_parser.add_argument("list", help="the list, created if it doesn't exist")
+    add_parser.add_argument("references", nargs="*", metavar="game", help="IGDB IDs or igdb.com game URLs")
+    add_parser.add_argument(
+        "--file", action="append", default=[], help="a CSV (IDs/URLs in the first column) or text file of games"
+    )
+    add_parser.set_defaults(func=add)
+
+    import_parser = subparsers.add_parser(
+        "import", help="save lists from JSON files, replacing lists with the same names"
+    )
+    import_parser.add_argument("files", nargs="+", metavar="file", help="JSON files, as saved in user_data")
+    import_parser.add_argument("--list", help="the list to save them to, by default named after each file")
+    import_parser.add_argument("--no-covers", action="store_true", help="don't fetch games without covers from IGDB")
+    import_parser.set_defaults(func=import_lists)
+
+    refresh_parser = subparsers.add_parser("refresh", help="re-fetch the games of lists from IGDB")
+    refresh_parser.add_argument("lists", nargs="*", metavar="list", help="by default, all lists")
+    refresh_parser.add_argument("--changed", action="store_true", help="only re-fetch games changed in IGDB")
+    refresh_parser.set_defaults(func=refresh)
+
+    remove_parser = subparsers.add_parser("remove-list", help="remove lists, and covers of games no other list has")
+    remove_parser.add_argument("lists", nargs="+", metavar="list")
+    remove_parser.set_defaults(func=remove_list)
+
+    prune_parser = subparsers.add_parser("prune-covers", help="remove covers of games no list has")
+    prune_parser.set_defaults(func=prune_covers)
+
+    warm_parser = subparsers.add_parser("warm-thumbnails", help="generate the thumbnails of all games")
+    warm_parser.add_argument("--width", type=int, default=THUMBNAIL_WIDTH_PX, help="thumbnail width, in pixels")
+    warm_parser.add_argument("--workers", type=int, help="processes to use, by default one per core")
+    warm_parser.set_defaults(func=warm)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = make_parser().parse_args(argv)
+    if args.func in (add, import_lists, refresh) and (
+        "CLIENT_ID" not in os.environ or "CLIENT_SECRET" not in os.environ
+    ):
+        print("Error: please export CLIENT_ID and CLIENT_SECRET variables. Check the README for more details.")
+        return 1
+
+    if not os.path.exists(args.data_dir):
+        os.makedirs(args.data_dir)
+
+    profiling.start_session(profiling.parse_modes(args.profile) if args.profile is not None else None)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        print("Interrupted, refreshes resume where they stopped when run again")
+        return 130
+    finally:
+        profiling.end_session()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+"""Temporary files to write a file atomically, renaming them over it once complete"""
+
+import os
+import stat
+import tempfile
+from typing import Tuple
+
+# read once, setting the umask to get it isn't thread safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def make_temp_file(path: str, prefix: str = "tmp", suffix: str = ".part") -> Tuple[int, str]:
+    """a temporary file next to path, with the mode of path if it exists, else that of new files (mkstemp's are
+    only readable by their owner, which os.replace would keep)"""
+    temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=prefix, suffix=suffix)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    try:
+        os.chmod(temp_path, mode)
+    except BaseException:
+        os.close(temp_fd)
+        os.remove(temp_path)
+        raise
+    return temp_fd, temp_path
@@ -1,55 +1,105 @@
 """Specific game-related data"""
 
-import math
+import functools
 import os
-from typing import Any, Dict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 
-from PIL import Image, ImageEnhance, ImageTk
-from pydantic import BaseModel
+STRICT_ENV_VAR = "IGDB_INDEXER_STRICT"  # set to 1 to validate games with pydantic, in strict mode
+REQUIRED_FIELDS = {"game_id": str, "name": str, "order_name": str, "year": int}
+OPTIONAL_FIELDS = {"updated_at": int, "checksum": str}
+# the exact types each field's value can have in a valid game, in GameDetails' order, for from_json's fast path
+_FIELD_TYPES = tuple(
+    [(field, (field_type,)) for field, field_type in REQUIRED_FIELDS.items()]
+    + [(field, (field_type, type(None))) for field, field_type in OPTIONAL_FIELDS.items()]
+)
 
 
-class GameDetails(BaseModel):
-    """A small struct to keep track of each game's data"""
+@dataclass(slots=True)
+class GameDetails:
+    """A small struct to keep track of each game's data.
+    It isn't validated when made, games read from files (or IGDB) should be made with from_json"""
 
     game_id: str
     name: str
     order_name: str
     year: int
-    img: ImageTk.PhotoImage = None
-    img_hidden: ImageTk.PhotoImage = None
-
-    # needed due to img and img_hidden, to appease Pydantic
-    class Config:
-        arbitrary_types_allowed = True
-
-    def generate_cover_image(self, width: int, _height: int, dir: str = "user_data") -> ImageTk.PhotoImage:
-        """generates TK image if it wasn't generated yet"""
-        if self.img is None:
-            img_name: str = os.path.join(dir, self.game_id + ".jpg")
-            if os.path.exists(img_name):
-                img = Image.open(img_name)
-            else:
-                img = Image.open(os.path.join("igdb_indexer", "default.jpg"))
-            ratio: float = width / img.width
-            self.img = ImageTk.PhotoImage(
-                img.resize(
-                    (math.floor(img.width * ratio), math.floor(img.height * ratio)),
-                    Image.Resampling.LANCZOS,
-                )
-            )
-
-            dark_img = ImageEnhance.Brightness(img).enhance(0.1)
-            self.img_hidden = ImageTk.PhotoImage(
-                dark_img.resize(
-                    (math.floor(dark_img.width * ratio), math.floor(dark_img.height * ratio)),
-                    Image.Resampling.LANCZOS,
-                )
-            )
-        return self.img
+    updated_at: Optional[int] = None  # version of the IGDB record the game was fetched from
+    checksum: Optional[str] = None
 
     def __lt__(self, other) -> bool:
         """order GameDetails by order_name"""
         return self.order_name < other.order_name
 
     def to_json(self) -> Dict[str, Any]:
-        return {"game_id": self.game_id, "name": self.name, "order_name": self.order_name, "year": self.year}
+        game_json: Dict[str, Any] = {
+            "game_id": self.game_id,
+            "name": self.name,
+            "order_name": self.order_name,
+            "year": self.year,
+        }
+        if self.updated_at is not None:
+            game_json["updated_at"] = self.updated_at
+        if self.checksum is not None:
+            game_json["checksum"] = self.checksum
+        return game_json
+
+    @classmethod
+    def from_json(cls, game_json: Dict[str, Any]) -> "GameDetails":
+        """makes a GameDetails out of a game's json struct, validating it, raises ValueError if invalid"""
+        if os.environ.get(STRICT_ENV_VAR) == "1":
+            return cls(**_get_strict_model().model_validate(game_json).model_dump())
+        # the usual case, a valid game, whose values already have their fields' exact types
+        if type(game_json) is dict:
+            values: List[Any] = []
+            for field, field_types in _FIELD_TYPES:
+                value = game_json.get(field)
+                if type(value) not in field_types:
+                    break
+                values.append(value)
+            else:
+                return cls(*values)
+        return cls(**validate_game_json(game_json))  # converts what it can, raises ValueError otherwise
+
+
+def _check_type(game_json: Dict[str, Any], field: str, field_type: type) -> Any:
+    value = game_json[field]
+    if field_type is int and isinstance(value, str) and value.lstrip("-").isdigit():
+        return int(value)  # like pydantic, which converted numeric strings
+    if not isinstance(value, field_type) or isinstance(value, bool):
+        raise ValueError(f"Invalid game {game_json!r}: {field} should be a {field_type.__name__}")
+    return value
+
+
+def validate_game_json(game_json: Dict[str, Any]) -> Dict[str, Any]:
+    """checks that a game's json struct has GameDetails' fields, of the right types, raises ValueError otherwise.
+    Returns only those fields, with numeric strings made ints"""
+    if not isinstance(game_json, dict):
+        raise ValueError(f"Invalid game {game_json!r}")
+    fields: Dict[str, Any] = {}
+    for field, field_type in REQUIRED_FIELDS.items():
+        if field not in game_json:
+            raise ValueError(f"Invalid game {game_json!r}: no {field}")
+        fields[field] = _check_type(game_json, field, field_type)
+    for field, field_type in OPTIONAL_FIELDS.items():
+        if game_json.get(field) is not None:
+            fields[field] = _check_type(game_json, field, field_type)
+    return fields
+
+
+@functools.lru_cache(maxsize=None)
+def _get_strict_model() -> Any:
+    """a pydantic model of GameDetails, in strict mode. pydantic is only needed for it"""
+    from pydantic import BaseModel, ConfigDict
+
+    class StrictGameDetails(BaseModel):
+        model_config = ConfigDict(strict=True)
+
+        game_id: str
+        name: str
+        order_name: str
+        year: int
+        updated_at: Optional[int] = None
+        checksum: Optional[str] = None
+
+    return StrictGameDetails
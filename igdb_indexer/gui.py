@@ -1,70 +1,364 @@
 """The GUI"""
 
 import math
+import multiprocessing
 import os
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk
-from typing import Any, Dict, List
+import traceback
+from collections import OrderedDict
+from concurrent.futures import (
+    CancelledError,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from tkinter import filedialog, ttk
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from PIL import Image, ImageTk
 
+from igdb_indexer import profiling
+from igdb_indexer.catalog import GameCatalog
 from igdb_indexer.game_details import GameDetails
-from igdb_indexer.igdb_interface import get_auth_token, query_igdb
-from igdb_indexer.json_interface import (
-    load_json,
-    load_json_as_games_list,
-    remove_json,
-    save_json,
+from igdb_indexer.igdb_interface import get_token_manager, query_igdb
+from igdb_indexer.storage import get_storage, lists_lock
+from igdb_indexer.thumbnails import (
+    THUMBNAIL_WIDTH_PX,
+    render_thumbnail,
+    warm_thumbnails,
+)
+from igdb_indexer.updates import (
+    add_games,
+    read_game_references,
+    refresh_list,
+    split_game_references,
 )
 
-GAME_WIDTH_PX = 360
+GAME_WIDTH_PX = THUMBNAIL_WIDTH_PX
 GAME_HEIGHT_PX = round(GAME_WIDTH_PX * 1.9)
+VIRTUAL_GRID_MIN_GAMES = 200  # lists this long only create frames for the games in view
+COVER_ASPECT_RATIO = 374 / 264  # of IGDB's t_cover_big, to size covers that are still loading
+IMAGE_CACHE_BYTES = 256 * 1024 * 1024  # covers not on screen are evicted past this
+HIDDEN_COVER_COLOR = "#1a1a1a"  # shown for hidden games while their dark cover loads
+
+
+class BackgroundTask:
+    """Work running on the BackgroundWorker, whose progress, result and errors are handed back to the Tk main loop"""
+
+    def __init__(
+        self,
+        worker: "BackgroundWorker",
+        on_done: Callable[[Any], None],
+        on_progress: Optional[Callable[[int], None]],
+        on_error: Optional[Callable[[Exception], None]],
+    ):
+        self.worker = worker
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def report_progress(self, progress: int) -> None:
+        """safe to call from the worker thread"""
+        self.worker.events.put((self, "progress", progress))
+
+
+class BackgroundWorker:
+    """Runs slow work (IGDB queries, cover downloads, file I/O) off the Tk main loop.
+    The main loop polls a queue with after() to get progress and results, so Tk is only ever touched from it"""
+
+    POLL_INTERVAL_MS = 50
+
+    def __init__(self, root: tk.Misc, max_workers: int = 2):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="background")
+        self.events: "queue.Queue[Tuple[BackgroundTask, str, Any]]" = queue.Queue()
+        self.pending_tasks = 0
+
+    def submit(
+        self,
+        func: Callable[[BackgroundTask], Any],
+        on_done: Callable[[Any], None],
+        on_progress: Optional[Callable[[int], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> BackgroundTask:
+        """runs func(task) in the background, then on_done(result) or on_error(exception) in the main loop"""
+        task = BackgroundTask(self, on_done, on_progress, on_error)
+        self.executor.submit(self._run, task, func)
+        self.pending_tasks += 1
+        if self.pending_tasks == 1:
+            self.root.after(self.POLL_INTERVAL_MS, self._poll)
+        return task
+
+    def _run(self, task: BackgroundTask, func: Callable[[BackgroundTask], Any]) -> None:
+        try:
+            self.events.put((task, "done", func(task)))
+        except Exception as exception:
+            self.events.put((task, "error", exception))
+
+    def _poll(self) -> None:
+        """handles all queued events in the main loop, keeps polling while tasks are pending"""
+        try:
+            while True:
+                try:
+                    task, event, value = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                if event == "progress":
+                    if task.on_progress is not None:
+                        task.on_progress(value)
+                    continue
+                self.pending_tasks -= 1
+                if event == "done":
+                    task.on_done(value)
+                elif task.on_error is not None:
+                    task.on_error(value)
+                else:
+                    traceback.print_exception(type(value), value, value.__traceback__)
+        finally:
+            if self.pending_tasks > 0:
+                self.root.after(self.POLL_INTERVAL_MS, self._poll)
+
+
+class CoverLoader:
+    """Decodes and resizes covers (through the thumbnail cache) in a pool of processes, across all cores.
+    The main loop polls for the finished RGB buffers with after(), and only has to make PhotoImages out of them"""
+
+    POLL_INTERVAL_MS = 30
+    MAX_IMAGES_PER_POLL = 16  # so the main loop stays responsive while many covers finish at once
+
+    def __init__(self, root: tk.Misc, max_workers: Optional[int] = None, dir: str = "user_data"):
+        self.root = root
+        self.dir = dir
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 2) - 1)  # leave a core for the Tk thread
+        # spawn, as forking a process with Tk and running threads isn't safe
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self.finished: "queue.Queue[Tuple[Tuple[str, int, bool], Future]]" = queue.Queue()
+        self.callbacks: Dict[Tuple[str, int, bool], List[Callable[[ImageTk.PhotoImage], None]]] = {}
+        self.placeholders: Dict[Tuple[int, int, bool], tk.PhotoImage] = {}
+
+    def placeholder(self, width: int, height: Optional[int] = None, dark: bool = False) -> tk.PhotoImage:
+        """a plain image, shared by all covers of its size, to show while they load (by default, of a typical size).
+        Dark ones stand in for covers of hidden games, so filtering shows instantly"""
+        if height is None:
+            height = round(width * COVER_ASPECT_RATIO)
+        key = (width, height, dark)
+        if key not in self.placeholders:
+            placeholder = tk.PhotoImage(width=width, height=height)
+            if dark:
+                placeholder.put(HIDDEN_COVER_COLOR, to=(0, 0, width, height))
+            self.placeholders[key] = placeholder
+        return self.placeholders[key]
+
+    def load(self, game_id: str, width: int, dark: bool, callback: Callable[[ImageTk.PhotoImage], None]) -> None:
+        """loads a cover in the background, then calls callback(image) in the main loop"""
+        key = (game_id, width, dark)
+        if key in self.callbacks:  # already loading
+            self.callbacks[key].append(callback)
+            return
+        self.callbacks[key] = [callback]
+        start_s = time.perf_counter()
+        future = self.executor.submit(render_thumbnail, game_id, width, dark, self.dir)
+
+        def on_done(done_future: Future) -> None:
+            # thumbnails are made in other processes, so they're timed from here, waiting for a free one included
+            profiling.record("cover_load", start_s, game_id=game_id)
+            self.finished.put((key, done_future))
+
+        future.add_done_callback(on_done)
+        if len(self.callbacks) == 1:
+            self.root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self) -> None:
+        try:
+            for _ in range(self.MAX_IMAGES_PER_POLL):
+                try:
+                    key, future = self.finished.get_nowait()
+                except queue.Empty:
+                    break
+                callbacks = self.callbacks.pop(key)
+                try:
+                    size, rgb_data = future.result()
+                except Exception as exception:
+                    print(f"Failed to load cover of {key[0]}: {exception!r}")
+                    continue
+                with profiling.timer("cover_photo_image", game_id=key[0]):
+                    image = ImageTk.PhotoImage(Image.frombytes("RGB", size, rgb_data))
+                for callback in callbacks:
+                    callback(image)
+        finally:
+            if len(self.callbacks) > 0:
+                self.root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+CoverKey = Tuple[str, int, str]  # (game_id, width, variant), variant being "normal" or "dark"
+
+
+class ImageCache:
+    """The cover PhotoImages of all tabs, so a game in many lists shares its images, keyed by CoverKey.
+    Images shown by a GameFrame are pinned, the least recently used unpinned ones are evicted past max_bytes"""
+
+    def __init__(self, cover_loader: CoverLoader, max_bytes: int = IMAGE_CACHE_BYTES):
+        self.cover_loader = cover_loader
+        self.max_bytes = max_bytes
+        self.images: "OrderedDict[CoverKey, ImageTk.PhotoImage]" = OrderedDict()
+        self.pins: Dict[CoverKey, int] = {}
+        self.bytes_used = 0
+
+    @staticmethod
+    def image_bytes(image: ImageTk.PhotoImage) -> int:
+        return image.width() * image.height() * 4  # Tk keeps photos as 32-bit RGBA
+
+    def pin(self, key: CoverKey) -> None:
+        self.pins[key] = self.pins.get(key, 0) + 1
+
+    def unpin(self, key: CoverKey) -> None:
+        self.pins[key] -= 1
+        if self.pins[key] == 0:
+            del self.pins[key]
+            self._evict()
+
+    def peek(self, key: CoverKey) -> Optional[ImageTk.PhotoImage]:
+        """the cached image, if any, without loading it nor counting as a use"""
+        return self.images.get(key)
+
+    def get(self, key: CoverKey, callback: Callable[[ImageTk.PhotoImage], None]) -> Optional[ImageTk.PhotoImage]:
+        """returns the cached image, or None, loading it in the background and then calling callback(image)"""
+        image = self.images.get(key)
+        if image is not None:
+            self.images.move_to_end(key)
+            return image
+        game_id, width, variant = key
+        self.cover_loader.load(game_id, width, variant == "dark", lambda image: self._on_loaded(key, image, callback))
+        return None
+
+    def _on_loaded(self, key: CoverKey, image: ImageTk.PhotoImage, callback: Callable[[ImageTk.PhotoImage], None]):
+        if key not in self.images:
+            self.images[key] = image
+            self.bytes_used += self.image_bytes(image)
+        callback(image)
+        self._evict()
+
+    def _evict(self) -> None:
+        """drops the least recently used images that aren't pinned, until within budget"""
+        if self.bytes_used <= self.max_bytes:
+            return
+        for key in list(self.images):
+            if self.bytes_used <= self.max_bytes:
+                break
+            if key in self.pins:
+                continue
+            self.bytes_used -= self.image_bytes(self.images.pop(key))
 
 
 class GamesTab(tk.Frame):
-    """The tab with the games, a scroll bar, and a search bar"""
-
-    def __init__(self, json_name: str, tab_control: ttk.Notebook):
-        games_list: List[GameDetails] = load_json_as_games_list(json_name)
-
-        self.tab_name = f"{json_name[:-5]}"  # remove ".json" suffix
-        tab_name_with_size: str = f"{self.tab_name} ({len(games_list)})"  # add size
-        print(f"\t{tab_name_with_size}")
-
-        super().__init__(tab_control)
-        self.tab_control = tab_control
-        self.tab_control.add(self, text=tab_name_with_size)
-        self.update()
-
-        self.games_list_page = GamesListPage(self, json_name, games_list)
-        bottom_search_bar = GameSearchBar(self, self.games_list_page)
-
-        bottom_search_bar.pack(side="bottom", fill="x")
-        self.games_list_page.pack(side="top", fill="both", expand=True)
+    """The tab with the games, a scroll bar, and a search bar.
+    Only its name and games count are read when created, its contents are built when first shown"""
+
+    def __init__(
+        self,
+        json_name: str,
+        tab_control: ttk.Notebook,
+        worker: BackgroundWorker,
+        image_cache: ImageCache,
+        catalog: GameCatalog,
+    ):
+        self.json_name = json_name
+        self.worker = worker
+        self.image_cache = image_cache
+        self.catalog = catalog
+        self.games_list_page: Optional[GamesListPage] = None
+
+        with profiling.timer("GamesTab.__init__", list=json_name):
+            self.tab_name = f"{json_name[:-5]}"  # remove ".json" suffix
+            self.games_count = get_storage().count_games(json_name)
+            tab_name_with_size: str = f"{self.tab_name} ({self.games_count})"  # add size
+            print(f"\t{tab_name_with_size}")
+
+            super().__init__(tab_control)
+            self.tab_control = tab_control
+            self.tab_control.add(self, text=tab_name_with_size)
+
+    def build(self) -> "GamesListPage":
+        """builds the tab contents, if not built yet"""
+        if self.games_list_page is None:
+            with profiling.timer("GamesTab.build", list=self.json_name):
+                game_ids: List[str] = self.catalog.load_list(self.json_name)
+                self.games_list_page = GamesListPage(
+                    self, self.json_name, game_ids, self.worker, self.image_cache, self.catalog
+                )
+                bottom_search_bar = GameSearchBar(self, self.games_list_page)
+
+                bottom_search_bar.pack(side="bottom", fill="x")
+                self.games_list_page.pack(side="top", fill="both", expand=True)
+                self.update_games_count()
+        return self.games_list_page
+
+    def is_built(self) -> bool:
+        return self.games_list_page is not None
 
     def update_games_count(self) -> None:
-        self.tab_control.tab(
-            self.tab_control.select(), text=f"{self.tab_name} ({len(self.games_list_page.game_widgets)})"
-        )
+        if self.games_list_page is None:
+            return
+        self.games_count = len(self.games_list_page.game_ids)
+        self.tab_control.tab(self, text=f"{self.tab_name} ({self.games_count})")
 
 
 class GamesListPage(tk.Frame):
-    """A TK Frame that will group and show the actual game frames in a grid-like fashion"""
-
-    def __init__(self, root: GamesTab, json_name: str, games_list: List[GameDetails]):
+    """A TK Frame that will group and show the actual game frames in a grid-like fashion.
+    Long lists use a virtual grid: a pool of frames, enough to fill the view, re-bound to other games on scroll"""
+
+    def __init__(
+        self,
+        root: GamesTab,
+        json_name: str,
+        game_ids: List[str],
+        worker: BackgroundWorker,
+        image_cache: ImageCache,
+        catalog: GameCatalog,
+    ):
         tk.Frame.__init__(self, root)
         self.root: GamesTab = root
         self.cols: int = 0
+        self.width_px: int = 0
+        self.pad_x: int = 0
+        self.game_ids: List[str] = []  # the games themselves are in the catalog, shared by all tabs
+        self.hidden_game_ids: Set[str] = set()  # games filtered out by the search bar
+        self.search_text: str = ""
         self.game_widgets: List[GameFrame] = []
         self.json_name: str = json_name
+        self.worker = worker
+        self.image_cache = image_cache
+        self.catalog = catalog
+        self.busy: bool = False  # whether IGDB work for this tab is running in the background
+        self.shown: bool = False  # only the selected tab's frames load (and pin) their covers
+
+        # virtual grid state, the canvas window of each game frame and the first row in view
+        self.virtual: bool = False
+        self.frame_windows: List[int] = []
+        self.first_row: int = -1
 
         # canvas with a scrollbar and a frame inside it
         self.canvas = tk.Canvas(self, background="white")
         self.vsb = tk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=self.vsb.set)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
         self.vsb.pack(side="right", fill="y")
         self.canvas.pack(side="left", expand=1, fill="both")
         self.canvas.bind("<Configure>", self._on_canvas_configure)
+        self.canvas.bind("<Enter>", self._bound_to_mousewheel)
+        self.canvas.bind("<Leave>", self._unbound_to_mousewheel)
 
-        # frame inside canvas has the actual game frames
+        # frame inside canvas has the actual game frames (on virtual grids, they are in the canvas itself)
         self.frame = tk.Frame(self.canvas, background="white")
         self.canvas.create_window(0, 0, window=self.frame, anchor="nw", tags="self.frame")
         self.frame.bind("<Configure>", self._on_frame_configure)
@@ -72,17 +366,35 @@ class GamesListPage(tk.Frame):
         self.frame.bind("<Leave>", self._unbound_to_mousewheel)
 
         # make games (they will be gridded later when window forms and _on_canvas_configure() is called)
-        self.make_game_frames(games_list)
+        self.make_game_frames(game_ids)
 
-    def make_game_frames(self, games_list: List[GameDetails]) -> None:
-        """makes a game frame for each game in games_list, places it in proper grid position"""
+    def make_game_frames(self, game_ids: List[str]) -> None:
+        """makes a game frame for each game in game_ids, or, for long lists, just the pool of a virtual grid"""
+        self.game_ids = list(game_ids)  # changed along with the catalog's, by insert_game() and delete_game()
+        self.hidden_game_ids = self._get_hidden_game_ids()  # keep filtering the same text
+        self.virtual = len(game_ids) >= VIRTUAL_GRID_MIN_GAMES
         self.game_widgets = []
-        for game in games_list:
-            game_frame = GameFrame(self, game)
+        self.frame_windows = []
+        self.first_row = -1
+        if self.virtual:
+            return  # pool is made once the canvas size is known
+        for game_id in game_ids:
+            game_frame = GameFrame(self, self.frame)
+            game_frame.bind_game(self.catalog.games[game_id], game_id in self.hidden_game_ids)
             self.game_widgets.append(game_frame)
 
+    def destroy_game_frames(self) -> None:
+        for game_frame in self.game_widgets:
+            game_frame.destroy()
+        for frame_window in self.frame_windows:
+            self.canvas.delete(frame_window)
+        self.game_widgets = []
+        self.frame_windows = []
+
     def _on_frame_configure(self, _event) -> None:
         """Reset the scroll region to encompass the inner frame"""
+        if self.virtual:
+            return  # virtual grids set their own scroll region
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
 
     def _on_canvas_configure(self, _event) -> None:
@@ -90,25 +402,108 @@ class GamesListPage(tk.Frame):
         # update amount of columns
         self.vsb.update()
         self.canvas.update()
-        width_px = self.canvas.winfo_width() - self.vsb.winfo_width() - 10  # small additional padding
-        self.cols = max(1, math.floor(width_px / GAME_WIDTH_PX))
-
-        # regrid games
-        pad_x = max(0, math.floor((width_px - (GAME_WIDTH_PX * self.cols)) / (self.cols * 2)))
-        for index, game_frame in enumerate(self.game_widgets):
-            row = int(index / self.cols)
-            col = index % self.cols
-            game_frame.grid(row=row, column=col, sticky="s", padx=pad_x)
+        self.width_px = self.canvas.winfo_width() - self.vsb.winfo_width() - 10  # small additional padding
+        self.cols = max(1, math.floor(self.width_px / GAME_WIDTH_PX))
+        self.pad_x = max(0, math.floor((self.width_px - (GAME_WIDTH_PX * self.cols)) / (self.cols * 2)))
+        if self.virtual:
+            self._layout_virtual_grid()
+        else:
+            self._regrid_games(0)
         self.canvas.yview_moveto(0)  # reset view to top
 
+    def _regrid_games(self, first_index: int) -> None:
+        """places game frames from first_index on in the grid, the ones before it don't move"""
+        for index in range(first_index, len(self.game_widgets)):
+            row, col = divmod(index, self.cols)
+            self.game_widgets[index].grid(row=row, column=col, sticky="s", padx=self.pad_x)
+
+    def _layout_virtual_grid(self) -> None:
+        """sizes the scroll region to all rows, and the pool of game frames to fill the view"""
+        rows = math.ceil(len(self.game_ids) / self.cols)
+        self.canvas.configure(scrollregion=(0, 0, self.width_px, rows * GAME_HEIGHT_PX))
+
+        # one extra row, as the top and bottom rows may both be partly in view
+        visible_rows = math.ceil(self.canvas.winfo_height() / GAME_HEIGHT_PX) + 1
+        pool_size = min(len(self.game_ids), visible_rows * self.cols)
+        while len(self.game_widgets) < pool_size:
+            game_frame = GameFrame(self, self.canvas)
+            self.game_widgets.append(game_frame)
+            self.frame_windows.append(self.canvas.create_window(0, 0, window=game_frame, anchor="s", state="hidden"))
+        while len(self.game_widgets) > pool_size:
+            self.canvas.delete(self.frame_windows.pop())
+            self.game_widgets.pop().destroy()
+
+        self.first_row = -1  # columns or games may have changed, re-bind all frames
+        self._refresh_virtual_grid()
+
+    def insert_game(self, game_id: str, index: int) -> None:
+        """shows a game at index of the sorted list, only moving the frames after it, and keeping the view"""
+        self.game_ids.insert(index, game_id)
+        if self.search_text != "" and game_id not in self.catalog.search_index.search(self.search_text):
+            self.hidden_game_ids.add(game_id)
+        if self.virtual:
+            if self.cols > 0:
+                self._layout_virtual_grid()
+            return
+        game_frame = GameFrame(self, self.frame)
+        game_frame.bind_game(self.catalog.games[game_id], game_id in self.hidden_game_ids)
+        self.game_widgets.insert(index, game_frame)
+        if self.cols > 0:
+            self._regrid_games(index)
+
+    def delete_game(self, game_id: str) -> None:
+        """stops showing a game, only moving the frames after it, and keeping the view"""
+        if game_id not in self.game_ids:
+            return
+        index = self.game_ids.index(game_id)
+        del self.game_ids[index]
+        self.hidden_game_ids.discard(game_id)
+        if self.virtual:
+            if self.cols > 0:
+                self._layout_virtual_grid()
+            return
+        self.game_widgets.pop(index).destroy()
+        if self.cols > 0:
+            self._regrid_games(index)
+
+    def _on_yscroll(self, first: float, last: float) -> None:
+        self.vsb.set(first, last)
+        if self.virtual:
+            self._refresh_virtual_grid()
+
+    def _refresh_virtual_grid(self) -> None:
+        """binds the pool of game frames to the rows in view, if they changed"""
+        if self.cols == 0 or len(self.game_widgets) == 0:
+            return
+        first_row = max(0, math.floor(self.canvas.canvasy(0) / GAME_HEIGHT_PX))
+        if first_row == self.first_row:
+            return
+        self.first_row = first_row
+
+        for slot, (game_frame, frame_window) in enumerate(zip(self.game_widgets, self.frame_windows)):
+            index = first_row * self.cols + slot
+            if index >= len(self.game_ids):
+                self.canvas.itemconfigure(frame_window, state="hidden")
+                continue
+            game_info = self.catalog.games[self.game_ids[index]]
+            game_frame.bind_game(game_info, game_info.game_id in self.hidden_game_ids)
+            row, col = divmod(index, self.cols)
+            x = self.pad_x + col * (GAME_WIDTH_PX + 2 * self.pad_x) + GAME_WIDTH_PX / 2
+            self.canvas.coords(frame_window, x, (row + 1) * GAME_HEIGHT_PX)
+            self.canvas.itemconfigure(frame_window, state="normal")
+
     def _bound_to_mousewheel(self, _event) -> None:
         """when frame is focused, bind mousewheel"""
         self.canvas.bind_all("<MouseWheel>", self._on_mousewheel_windows)
         self.canvas.bind_all("<Button-4>", self._on_mousewheel_linux_up)
         self.canvas.bind_all("<Button-5>", self._on_mousewheel_linux_down)
 
-    def _unbound_to_mousewheel(self, _event) -> None:
+    def _unbound_to_mousewheel(self, event) -> None:
         """when frame is unfocused, unbind mousewheel"""
+        # leaving into one of our own game frames doesn't count
+        widget_under_pointer = self.winfo_containing(event.x_root, event.y_root)
+        if widget_under_pointer is not None and str(widget_under_pointer).startswith(str(self.canvas)):
+            return
         self.canvas.unbind_all("<MouseWheel>")
         self.canvas.unbind_all("<Button-4>")
         self.canvas.unbind_all("<Button-5>")
@@ -124,111 +519,183 @@ class GamesListPage(tk.Frame):
 
     def remove_game(self, game_id: str) -> None:
         """removes a game given its ID"""
-
-        # load JSON file
-        games_json = load_json(self.json_name)
-
-        # remove game from list
-        prev_size: int = len(games_json["games"])
-        games_json["games"] = [game for game in games_json["games"] if game["game_id"] != game_id]
-        if len(games_json["games"]) == prev_size:
+        with lists_lock:  # not lost if the tab is being updated meanwhile
+            removed = get_storage().remove_game(self.json_name, game_id)
+        if not removed:
             print(f"Game {game_id} not found")
             return
-
-        # update JSON file
-        save_json(self.json_name, games_json)
         print(f"Game {game_id} removed")
 
-        # update tab
-        self.update_games_list_tab()
-
-    def update_all_games(self) -> None:
-        processing_window = ProcessingWindow(len(self.game_widgets))
-        self.update()
-
-        games_json: Dict[str, Any] = {"games": []}
-
-        # fetch all games from current tab
-        access_token = get_auth_token()
-        for index, game_details in enumerate(self.game_widgets):
-            game_json = query_igdb(game_details.game_info.game_id, access_token)
-            if game_json is None:
-                print(f"Game {game_details.game_info.game_id} no longer found")
-                game_json = game_details.game_info.to_json()
-            games_json["games"].append(game_json)
-            processing_window.update_progress(index)
-
-        # update JSON file
-        save_json(self.json_name, games_json)
+        # update tab, the list is already up-to-date in the catalog
+        self.catalog.remove_game(self.json_name, game_id)
+        self.delete_game(game_id)
+        self.root.update_games_count()
 
-        # update tab
-        self.update_games_list_tab()
+    def update_all_games(self, only_changed: bool = False) -> None:
+        """re-fetches all games of the tab from IGDB, in the background.
+        If only_changed, first asks IGDB which games changed since fetched, and only re-fetches those"""
+        if self.busy:
+            print(f"{self.json_name} is already being updated")
+            return
+        self.busy = True
+        json_name = self.json_name
+        games_info = [self.catalog.games[game_id] for game_id in self.game_ids]
+
+        def fetch_all_games(task: BackgroundTask) -> Tuple[Dict[str, Any], List[str]]:
+            return refresh_list(
+                json_name,
+                [game_info.to_json() for game_info in games_info],
+                only_changed=only_changed,
+                progress_cb=task.report_progress,
+                cancel_event=task.cancel_event,
+            )
 
-        processing_window.destroy()
+        def on_done(result: Tuple[Dict[str, Any], List[str]]) -> None:
+            games_json, missing_game_ids = result
+            processing_window.destroy()
+            self.busy = False
+            self.catalog.add_list(json_name, games_json)
+            self.update_games_list_tab(reload=False)
+            if len(missing_game_ids) > 0:
+                print(f"No longer found in IGDB: {', '.join(missing_game_ids)}")
+
+        def on_error(exception: Exception) -> None:
+            processing_window.destroy()
+            self.busy = False
+            if isinstance(exception, CancelledError):
+                print(f"Update of {json_name} cancelled")
+            else:
+                print(f"Update of {json_name} failed: {exception!r}")
+
+        task = self.worker.submit(
+            fetch_all_games, on_done, lambda progress: processing_window.update_progress(progress), on_error
+        )
+        processing_window = ProcessingWindow(len(games_info), on_cancel=task.cancel)
 
-    def update_games_list_tab(self) -> None:
-        """re-creates the tab from scratch"""
-        for game_frame in self.game_widgets:
-            game_frame.destroy()
-        self.game_widgets = []
+    def update_games_list_tab(self, reload: bool = True) -> None:
+        """re-creates the tab from scratch, reading the list again from storage if reload"""
+        self.destroy_game_frames()
         json_name: str = self.json_name
-        self.make_game_frames(load_json_as_games_list(json_name))
+        self.make_game_frames(self.catalog.load_list(json_name) if reload else self.catalog.lists.get(json_name, []))
         self.root.update_games_count()
         # readjust window
         self._on_canvas_configure(None)
 
     def add_new_game(self, game_id: int) -> None:
-        # load JSON file
-        games_json = load_json(self.json_name)
+        """fetches a game from IGDB in the background, then adds it to the tab"""
+        json_name = self.json_name
 
-        # fetch game from IGDB
-        access_token = get_auth_token()
-        game_json = query_igdb(str(game_id), access_token)
-        if game_json is None:
-            print(f"Game {game_id} not found")
+        def fetch_game(_task: BackgroundTask) -> Optional[Dict[str, Any]]:
+            # fetch game from IGDB
+            game_json = get_token_manager().call(lambda access_token: query_igdb(str(game_id), access_token))
+            if game_json is None:
+                print(f"Game {game_id} not found")
+                return None
+
+            # update list, not lost if the tab is being updated meanwhile
+            with lists_lock:
+                get_storage().add_game(json_name, game_json)
+            print(f"Game {game_id} added")
+            return game_json
+
+        def on_done(game_json: Optional[Dict[str, Any]]) -> None:
+            if game_json is not None:
+                index = self.catalog.add_game(json_name, game_json)
+                self.delete_game(game_json["game_id"])  # if it was already there, it may have moved
+                self.insert_game(game_json["game_id"], index)
+                self.root.update_games_count()
+
+        def on_error(exception: Exception) -> None:
+            print(f"Failed to add game {game_id}: {exception!r}")
+
+        self.worker.submit(fetch_game, on_done, on_error=on_error)
+
+    def add_new_games(self, references: List[str]) -> None:
+        """fetches many games (IGDB IDs or igdb.com URLs) from IGDB in the background, in batches.
+        Then adds them to the list with a single save, and rebuilds the tab once"""
+        if self.busy:
+            print(f"{self.json_name} is already being updated")
             return
-        games_json["games"] = [game for game in games_json["games"] if game["game_id"] != game_id]
-        games_json["games"].append(game_json)
+        self.busy = True
+        json_name = self.json_name
+
+        def fetch_games(task: BackgroundTask) -> Tuple[Dict[str, Any], List[str]]:
+            return add_games(json_name, references, progress_cb=task.report_progress, cancel_event=task.cancel_event)
+
+        def on_done(result: Tuple[Dict[str, Any], List[str]]) -> None:
+            games_json, failed_references = result
+            processing_window.destroy()
+            self.busy = False
+            self.catalog.add_list(json_name, games_json)
+            self.update_games_list_tab(reload=False)
+            print(f"Added {len(references) - len(failed_references)} of {len(references)} games to {json_name}")
+            if len(failed_references) > 0:
+                print(f"Failed to add: {', '.join(failed_references)}")
+
+        def on_error(exception: Exception) -> None:
+            processing_window.destroy()
+            self.busy = False
+            if isinstance(exception, CancelledError):
+                print(f"Adding games to {json_name} cancelled")
+            else:
+                print(f"Failed to add games to {json_name}: {exception!r}")
+
+        task = self.worker.submit(
+            fetch_games, on_done, lambda progress: processing_window.update_progress(progress), on_error
+        )
+        processing_window = ProcessingWindow(len(references), on_cancel=task.cancel)
 
-        # update JSON file
-        save_json(self.json_name, games_json)
-        print(f"Game {game_id} added")
+    def set_shown(self, shown: bool) -> None:
+        """shows the covers of the game frames when the tab is selected, and lets the image cache evict them when
+        it no longer is"""
+        if shown == self.shown:
+            return
+        self.shown = shown
+        for game_frame in self.game_widgets:
+            game_frame.set_img_hidden(game_frame.hidden)
 
-        # update tab
-        self.update_games_list_tab()
+    def _get_hidden_game_ids(self) -> Set[str]:
+        if self.search_text == "":
+            return set()
+        matches = self.catalog.search_index.search(self.search_text)
+        return {game_id for game_id in self.game_ids if game_id not in matches}
 
     def filter_games(self, text: str) -> None:
+        """hides the covers of games not matching text, only re-configuring the frames whose visibility changed"""
+        self.search_text = text
+        hidden_game_ids = self._get_hidden_game_ids()
+        changed_game_ids = hidden_game_ids ^ self.hidden_game_ids
+        self.hidden_game_ids = hidden_game_ids
+        if len(changed_game_ids) == 0:
+            return
         for game_frame in self.game_widgets:
-            game_frame.set_img_hidden(
-                text not in game_frame.game_info.name and text not in game_frame.game_info.order_name
-            )
+            if game_frame.game_info is not None and game_frame.game_info.game_id in changed_game_ids:
+                game_frame.set_img_hidden(game_frame.game_info.game_id in hidden_game_ids)
 
 
 class GameFrame(tk.Frame):
-    """a single game frame, with title, date, id, and cover image"""
+    """a single game frame, with title, date, id, and cover image.
+    In virtual grids, the same frame is re-bound to whichever game is in its place"""
 
-    def __init__(self, tab: GamesListPage, game_info: GameDetails):
-        tk.Frame.__init__(self, master=tab.frame, borderwidth=1, background="white")
+    def __init__(self, tab: GamesListPage, master: tk.Misc, game_info: Optional[GameDetails] = None):
+        tk.Frame.__init__(self, master=master, borderwidth=1, background="white")
         self.tab = tab
-        self.game_info: GameDetails = game_info
+        self.game_info: Optional[GameDetails] = None
+        self.hidden: bool = False
+        self.cover_key: Optional[CoverKey] = None  # the cover shown, pinned in the image cache
 
         self.label_title = tk.Label(
             master=self,
-            text=game_info.name,
             background="white",
             wraplength=GAME_WIDTH_PX,
             font="Helvetica 15 bold",
         )
         self.label_year = tk.Label(
             master=self,
-            text=str(game_info.year) + " - #" + game_info.game_id,
             background="white",
             wraplength=GAME_WIDTH_PX,
         )
-        self.label_img = tk.Label(
-            master=self,
-            image=game_info.generate_cover_image(GAME_WIDTH_PX, GAME_HEIGHT_PX),
-        )
+        self.label_img = tk.Label(master=self)
         self.label_pad = tk.Label(master=self, background="white", font="Helvetica 5")
         self.label_title.pack()
         self.label_year.pack()
@@ -242,25 +709,77 @@ class GameFrame(tk.Frame):
         self.bind("<Button-3>", self.open_right_click_menu)
         self.label_img.bind("<Button-3>", self.open_right_click_menu)
 
+        if game_info is not None:
+            self.bind_game(game_info)
+
+    def bind_game(self, game_info: GameDetails, hidden: bool = False) -> None:
+        """shows game_info in this frame, its cover is loaded in the background if needed"""
+        if game_info is not self.game_info:
+            self.game_info = game_info
+            self.label_title.configure(text=game_info.name)
+            self.label_year.configure(text=str(game_info.year) + " - #" + game_info.game_id)
+        self.set_img_hidden(hidden)
+
+    def _show_cover(self, key: CoverKey) -> None:
+        """shows a cover from the image cache, pinning it there while shown"""
+        image_cache = self.tab.image_cache
+        previous_key = self.cover_key
+        self.cover_key = key
+        image_cache.pin(key)
+        image = image_cache.get(key, lambda image: self._on_cover_loaded(key, image))
+        if image is None:
+            # same size as the normal cover, if we know it, so the grid doesn't shift
+            game_id, width, variant = key
+            normal_image = image_cache.peek((game_id, width, "normal"))
+            height = normal_image.height() if normal_image is not None else None
+            image = image_cache.cover_loader.placeholder(width, height, dark=variant == "dark")
+        self.label_img.configure(image=image)
+        if previous_key is not None:
+            image_cache.unpin(previous_key)
+
+    def _on_cover_loaded(self, key: CoverKey, image: ImageTk.PhotoImage) -> None:
+        if key == self.cover_key:  # may have been re-bound or destroyed meanwhile
+            self.label_img.configure(image=image)
+
+    def release_cover(self) -> None:
+        """stops showing the cover, unpinning it from the image cache"""
+        if self.cover_key is not None:
+            self.tab.image_cache.unpin(self.cover_key)
+            self.cover_key = None
+            self.label_img.configure(image="")
+
+    def destroy(self) -> None:
+        self.release_cover()
+        super().destroy()
+
     def open_right_click_menu(self, event):
         self.context_menu.post(event.x_root - 1, event.y_root - 1)
 
     def remove_game(self) -> None:
-        self.tab.remove_game(self.game_info.game_id)
+        if self.game_info is not None:
+            self.tab.remove_game(self.game_info.game_id)
 
     def set_img_hidden(self, hidden: bool):
-        if hidden:
-            self.label_img.configure(image=self.game_info.img_hidden)
-        else:
-            self.label_img.configure(image=self.game_info.img)
+        self.hidden = hidden
+        if self.game_info is None:
+            return
+        if not self.tab.shown:
+            self.release_cover()
+            return
+        key = (self.game_info.game_id, GAME_WIDTH_PX, "dark" if hidden else "normal")
+        if key != self.cover_key:
+            self._show_cover(key)
 
 
 class GameSearchBar(tk.Frame):
-    """A frame with a search bar"""
+    """A frame with a search bar, filtering once typing pauses"""
+
+    SEARCH_DELAY_MS = 150  # time without keystrokes before filtering
 
     def __init__(self, root: GamesTab, games_list_page: GamesListPage):
         tk.Frame.__init__(self, root)
         self.games_list_page = games_list_page
+        self.pending_search: Optional[str] = None  # after() ID of the scheduled filtering
 
         self.sv = tk.StringVar()
         self.sv.trace_add("write", self.text_bar_changed_cb)
@@ -271,13 +790,21 @@ class GameSearchBar(tk.Frame):
         self.text_box.grid(column=0, row=0)
 
     def text_bar_changed_cb(self, _name, _index, _mode):
+        if self.pending_search is not None:
+            self.after_cancel(self.pending_search)
+        self.pending_search = self.after(self.SEARCH_DELAY_MS, self.filter_games)
+
+    def filter_games(self) -> None:
+        self.pending_search = None
         self.games_list_page.filter_games(self.sv.get())
 
 
 class MainWindow(tk.Tk):
     """Creates the main GUI"""
 
-    def __init__(self, list_of_jsons: List[str]):
+    PRELOAD_DELAY_MS = 1000  # time between building unseen tabs in the background
+
+    def __init__(self, list_of_jsons: List[str], image_cache_bytes: int = IMAGE_CACHE_BYTES):
         super().__init__()
         width, height = self.winfo_screenwidth(), self.winfo_screenheight()
         self.geometry(f"{width}x{height}+0+0")
@@ -287,23 +814,33 @@ class MainWindow(tk.Tk):
 
         self.tab_control = ttk.Notebook(self)
         self.tab_control.pack(expand=1, fill="both")
+        self.worker = BackgroundWorker(self)
+        self.image_cache = ImageCache(CoverLoader(self), image_cache_bytes)
+        self.catalog = GameCatalog()
 
         print("Loading tabs:")
         self.tabs: List[GamesTab] = []
-        processing_window = ProcessingWindow(len(list_of_jsons))
-        processing_window.update()
-        for index, file in enumerate(list_of_jsons):
+        for file in list_of_jsons:
             self.make_tab(file)
-            processing_window.update_progress(index)
-        processing_window.destroy()
+
+        # tabs are built when first selected, and the others in the background when idle
+        self.tab_control.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        self.after(self.PRELOAD_DELAY_MS, self._preload_next_tab)
 
         # Create a context menu
         context_menu = tk.Menu(self.tab_control, tearoff=False)
         context_menu.add_command(label="Add new tab", command=self.show_new_tab_window)
         context_menu.add_separator()
-        context_menu.add_command(label="Add game to current tab", command=self.show_new_game_window)
+        context_menu.add_command(label="Add games to current tab", command=self.show_new_game_window)
         context_menu.add_command(label="Remove current tab", command=self.remove_tab)
         context_menu.add_command(label="Update current tab", command=self.update_tab)
+        context_menu.add_command(
+            label="Update changed games in current tab", command=lambda: self.update_tab(only_changed=True)
+        )
+        context_menu.add_separator()
+        context_menu.add_command(label="Search all tabs", command=self.show_global_search_window)
+        context_menu.add_command(label="Pre-generate thumbnails", command=self.warm_thumbnails)
+        context_menu.add_command(label="Remove unused covers", command=self.collect_garbage)
         context_menu.bind("<Leave>", lambda _event: context_menu.unpost())
         self.tab_control.bind("<Button-3>", lambda event: context_menu.post(event.x_root - 1, event.y_root - 1))
 
@@ -314,22 +851,126 @@ class MainWindow(tk.Tk):
         tab_name = tab_name_with_size[: -len(tab_name_with_size.split("(")[-1]) - 2]
         return tab_name
 
+    def destroy(self) -> None:
+        self.image_cache.cover_loader.shutdown()
+        super().destroy()
+
+    def get_current_tab(self) -> Optional[GamesTab]:
+        if len(self.tabs) == 0:
+            return None
+        selected_tab: str = self.tab_control.select()
+        return next((games_tab for games_tab in self.tabs if str(games_tab) == selected_tab), None)
+
+    def _on_tab_changed(self, _event) -> None:
+        """builds the newly selected tab, the first time it's shown. Only its covers are kept in memory"""
+        tab = self.get_current_tab()
+        if tab is not None:
+            tab.build()
+        for games_tab in self.tabs:
+            if games_tab.games_list_page is not None:
+                games_tab.games_list_page.set_shown(games_tab is tab)
+
+    def _preload_next_tab(self) -> None:
+        """builds one tab not seen yet, then schedules the next one, so the GUI never stalls for long.
+        Tabs long enough for a virtual grid take too long to load, and are only built when selected"""
+        tab = next(
+            (
+                games_tab
+                for games_tab in self.tabs
+                if not games_tab.is_built() and games_tab.games_count < VIRTUAL_GRID_MIN_GAMES
+            ),
+            None,
+        )
+        if tab is None:
+            return
+        self.after_idle(tab.build)
+        self.after(self.PRELOAD_DELAY_MS, self._preload_next_tab)
+
     def make_tab(self, file: str) -> None:
-        self.tabs.append(GamesTab(file, self.tab_control))
+        self.tabs.append(GamesTab(file, self.tab_control, self.worker, self.image_cache, self.catalog))
+        self._on_tab_changed(None)  # the first tab is selected as soon as it's added
 
     def remove_tab(self) -> None:
-        tab_name = self.get_current_tab_name()
-        if tab_name == "":
+        tab = self.get_current_tab()
+        if tab is None:
             return
-        self.tab_control.tab(self.tab_control.select(), state="hidden")
-        self.tabs = [games_tab for games_tab in self.tabs if games_tab.tab_name != tab_name]
-        remove_json(tab_name + ".json")
-
-    def update_tab(self) -> None:
+        if tab.games_list_page is not None and tab.games_list_page.busy:
+            print(f"{tab.json_name} is being updated, it can be removed once done")
+            return
+        self.tab_control.tab(tab, state="hidden")
+        if tab.games_list_page is not None:
+            tab.games_list_page.set_shown(False)
+        self.tabs = [games_tab for games_tab in self.tabs if games_tab is not tab]
+        self.catalog.remove_list(tab.json_name)
+        with lists_lock:
+            get_storage().remove_json(tab.json_name)
+
+    def select_tab(self, json_name: str) -> None:
+        tab = next((games_tab for games_tab in self.tabs if games_tab.json_name == json_name), None)
+        if tab is not None:
+            self.tab_control.select(tab)
+
+    def load_all_lists(self, on_done: Callable[[], None]) -> None:
+        """loads the lists of all tabs into the catalog (reading them in the background), then calls on_done"""
+        json_names = [games_tab.json_name for games_tab in self.tabs if games_tab.json_name not in self.catalog.lists]
+
+        def load(_task: BackgroundTask) -> Dict[str, Dict[str, Any]]:
+            storage = get_storage()
+            return {json_name: storage.load_json(json_name) for json_name in json_names}
+
+        def on_loaded(games_jsons: Dict[str, Dict[str, Any]]) -> None:
+            tab_json_names = {games_tab.json_name for games_tab in self.tabs}
+            for json_name, games_json in games_jsons.items():
+                # tabs may have been built or removed meanwhile
+                if json_name in tab_json_names and json_name not in self.catalog.lists:
+                    self.catalog.add_list(json_name, games_json)
+            on_done()
+
+        def on_error(exception: Exception) -> None:
+            print(f"Failed to load lists: {exception!r}")
+
+        self.worker.submit(load, on_loaded, on_error=on_error)
+
+    def update_tab(self, only_changed: bool = False) -> None:
         tab_name = self.get_current_tab_name()
         if tab_name == "":
             return
-        next(games_tab for games_tab in self.tabs if games_tab.tab_name == tab_name).games_list_page.update_all_games()
+        tab = next(games_tab for games_tab in self.tabs if games_tab.tab_name == tab_name)
+        tab.build().update_all_games(only_changed)
+
+    def warm_thumbnails(self) -> None:
+        """generates the cover thumbnails of all games in all lists, in the background"""
+        game_ids = get_storage().get_all_game_ids()
+
+        def on_done(_result: None) -> None:
+            processing_window.destroy()
+
+        def on_error(exception: Exception) -> None:
+            processing_window.destroy()
+            if not isinstance(exception, CancelledError):
+                print(f"Failed to generate thumbnails: {exception!r}")
+
+        def warm(task: BackgroundTask) -> None:
+            def progress_cb(progress: int) -> None:
+                if task.cancel_event.is_set():
+                    raise CancelledError()
+                task.report_progress(progress)
+
+            warm_thumbnails(game_ids, GAME_WIDTH_PX, progress_cb=progress_cb)
+
+        task = self.worker.submit(warm, on_done, lambda progress: processing_window.update_progress(progress), on_error)
+        processing_window = ProcessingWindow(len(game_ids), on_cancel=task.cancel)
+
+    def collect_garbage(self) -> None:
+        """re-checks which lists have each game, and removes covers of games no list has, in the background"""
+
+        def on_done(removed_game_ids: Set[str]) -> None:
+            print(f"Removed {len(removed_game_ids)} unused covers")
+
+        def on_error(exception: Exception) -> None:
+            print(f"Failed to remove unused covers: {exception!r}")
+
+        self.worker.submit(lambda _task: get_storage().collect_garbage(), on_done, on_error=on_error)
 
     def show_new_tab_window(self) -> None:
         NewTabWindow(self)
@@ -337,12 +978,22 @@ class MainWindow(tk.Tk):
     def show_new_game_window(self) -> None:
         NewGameWindow(self)
 
+    def show_global_search_window(self) -> None:
+        GlobalSearchWindow(self)
+
     def add_new_game_to_tab(self, game_id: int) -> None:
         tab_name = self.get_current_tab_name()
         if tab_name == "":
             return
         tab = next(games_tab for games_tab in self.tabs if games_tab.tab_name == tab_name)
-        tab.games_list_page.add_new_game(game_id)
+        tab.build().add_new_game(game_id)
+
+    def add_new_games_to_tab(self, references: List[str]) -> None:
+        tab_name = self.get_current_tab_name()
+        if tab_name == "":
+            return
+        tab = next(games_tab for games_tab in self.tabs if games_tab.tab_name == tab_name)
+        tab.build().add_new_games(references)
 
 
 class NewTabWindow(tk.Toplevel):
@@ -382,12 +1033,12 @@ class NewGameWindow(tk.Toplevel):
     def __init__(self, main_window: MainWindow):
         super().__init__()
         self.main_window = main_window
-        self.title("New Game ID?")
-        self.geometry("300x100")
+        self.title("New Game IDs or URLs?")
+        self.geometry("400x220")
 
-        # Entry widget for text input
-        self.entry = tk.Entry(self, width=30)
-        self.entry.pack(pady=5)
+        # Text widget for input, one or many IDs/URLs can be pasted
+        self.text = tk.Text(self, width=45, height=8)
+        self.text.pack(pady=5)
 
         # Buttons
         button_frame = tk.Frame(self)
@@ -395,28 +1046,97 @@ class NewGameWindow(tk.Toplevel):
         ok_button = tk.Button(button_frame, text="Add", command=self.on_ok)
         ok_button.pack(side="left", padx=5)
 
+        file_button = tk.Button(button_frame, text="From file...", command=self.on_file)
+        file_button.pack(side="left", padx=5)
+
         cancel_button = tk.Button(button_frame, text="Cancel", command=self.on_cancel)
         cancel_button.pack(side="right", padx=5)
 
         button_frame.pack(pady=10)
-        self.entry.focus_set()
+        self.text.focus_set()
 
     # Function to handle OK button click
     def on_ok(self) -> None:
-        game_id: str = self.entry.get()
-        if not game_id.isdigit():
-            print(f"Invalid game id: {game_id}")
+        references = split_game_references(self.text.get("1.0", "end"))
+        if len(references) == 0:
             return
-        self.main_window.add_new_game_to_tab(int(game_id))
+        if len(references) == 1 and references[0].isdigit():
+            self.main_window.add_new_game_to_tab(int(references[0]))
+        else:
+            self.main_window.add_new_games_to_tab(references)
         self.destroy()
 
+    # Function to handle file button click, the file's games are added to the text
+    def on_file(self) -> None:
+        path = filedialog.askopenfilename(
+            parent=self, filetypes=[("CSV or text files", "*.csv *.txt"), ("All files", "*")]
+        )
+        if path == "":
+            return
+        try:
+            references = read_game_references(path)
+        except (OSError, UnicodeDecodeError) as exception:
+            print(f"Failed to read {path}: {exception}")
+            return
+        self.text.insert("end", "\n" + "\n".join(references))
+
     # Function to handle Cancel button click
     def on_cancel(self) -> None:
         self.destroy()
 
 
+class GlobalSearchWindow(tk.Toplevel):
+    """searches the games of all tabs at once, listing the tabs with matching games"""
+
+    def __init__(self, main_window: MainWindow):
+        super().__init__()
+        self.main_window = main_window
+        self.title("Search All Tabs")
+        self.geometry("600x400")
+        self.pending_search: Optional[str] = None  # after() ID of the scheduled search
+
+        self.sv = tk.StringVar()
+        self.sv.trace_add("write", self.text_bar_changed_cb)
+        self.entry = tk.Entry(self, textvariable=self.sv)
+        self.entry.pack(fill="x", padx=5, pady=5)
+
+        # one row per tab, with its matching games inside, double-click to go to the tab
+        self.results = ttk.Treeview(self, show="tree")
+        self.results.pack(fill="both", expand=True, padx=5, pady=5)
+        self.results.bind("<Double-1>", self.on_double_click)
+        self.entry.focus_set()
+
+        # tabs not shown yet aren't in the catalog
+        self.main_window.load_all_lists(self.search)
+
+    def text_bar_changed_cb(self, _name, _index, _mode):
+        if self.pending_search is not None:
+            self.after_cancel(self.pending_search)
+        self.pending_search = self.after(GameSearchBar.SEARCH_DELAY_MS, self.search)
+
+    def search(self) -> None:
+        self.pending_search = None
+        if not self.winfo_exists():
+            return  # closed while loading
+        self.results.delete(*self.results.get_children())
+        text = self.sv.get()
+        if text == "":
+            return
+        for json_name, games in self.main_window.catalog.search(text).items():
+            list_item = self.results.insert("", "end", iid=json_name, text=f"{json_name[:-5]} ({len(games)})")
+            for game in games:
+                self.results.insert(list_item, "end", text=f"{game.name} ({game.year}) - #{game.game_id}")
+
+    def on_double_click(self, _event) -> None:
+        selection = self.results.selection()
+        if len(selection) == 0:
+            return
+        list_item = self.results.parent(selection[0]) or selection[0]
+        self.main_window.select_tab(list_item)
+
+
 class ProcessingWindow(tk.Toplevel):
-    def __init__(self, max_progress: int):
+    def __init__(self, max_progress: int, on_cancel: Optional[Callable[[], None]] = None):
         super().__init__()
         self.title("Processing")
         self.geometry("300x100")
@@ -427,6 +1147,17 @@ class ProcessingWindow(tk.Toplevel):
         self.label = ttk.Label(self, text=f"Processing... 0/{self.max_progress}")
         self.label.pack(pady=20)
 
+        # work running in the background can be cancelled, by the button or by closing the window
+        if on_cancel is not None:
+            self.on_cancel = on_cancel
+            cancel_button = tk.Button(self, text="Cancel", command=self.cancel)
+            cancel_button.pack()
+            self.protocol("WM_DELETE_WINDOW", self.cancel)
+
     def update_progress(self, progress: int):
         self.label.config(text=f"Processing... {progress}/{self.max_progress}")
-        self.update()
+        self.update_idletasks()
+
+    def cancel(self) -> None:
+        self.label.config(text="Cancelling...")
+        self.on_cancel()
@@ -1,16 +1,201 @@
 """Interface with IGDB"""
 
+import json
 import os
 import re
-from typing import Dict, Optional
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, as_completed
+from email.utils import formatdate
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from igdb_indexer import profiling
+from igdb_indexer.files import make_temp_file
 
-def get_auth_token() -> str:
-    """authenticates on Twitch with OAuth2"""
+GAMES_API_URL = "https://api.igdb.com/v4/games"
+AUTH_URL = "https://id.twitch.tv/oauth2/token"
+# both can point elsewhere, e.g., to a local stand-in for benchmarks
+GAMES_API_URL_ENV_VAR = "IGDB_GAMES_API_URL"
+AUTH_URL_ENV_VAR = "TWITCH_AUTH_URL"
+IGDB_PAGE_LIMIT = 500  # max amount of records IGDB returns per request
+TOKEN_EXPIRY_MARGIN_S = 24 * 60 * 60  # refresh tokens a day before they expire
+IGDB_MAX_REQUESTS_PER_S = 4  # IGDB rate limits, https://api-docs.igdb.com/#rate-limits
+IGDB_MAX_OPEN_REQUESTS = 8
+COVER_CHUNK_SIZE = 64 * 1024
+# only the fields parse_game_json uses, instead of the whole game documents (summaries, storylines, ID arrays...)
+DEFAULT_GAME_FIELDS = "name,release_dates.y,cover.url,updated_at,checksum"
+GAME_FIELDS_ENV_VAR = "IGDB_GAME_FIELDS"
+GAME_URL_PATTERN = re.compile(r"igdb\.com/games/([a-z0-9-]+)", re.IGNORECASE)  # https://www.igdb.com/games/<slug>
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+
+class UnauthorizedError(Exception):
+    """IGDB rejected the access token"""
+
+
+class TokenBucket:
+    """Rate limiter, allows `rate` acquisitions per second, with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """blocks until a token is available, then takes it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_s = (1 - self.tokens) / self.rate
+            time.sleep(wait_s)
+
+
+class IgdbClient:
+    """The HTTP client for Twitch/IGDB, a pooled keep-alive session with timeouts and retries on 429/5xx.
+    IGDB API requests are also kept within IGDB's rate limits"""
+
+    def __init__(
+        self,
+        timeout: Tuple[float, float] = (5, 30),
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_size: int = IGDB_MAX_OPEN_REQUESTS,
+        requests_per_s: float = IGDB_MAX_REQUESTS_PER_S,
+        max_open_requests: int = IGDB_MAX_OPEN_REQUESTS,
+    ):
+        self.timeout = timeout  # (connect, read) timeouts, in seconds
+        # a burst capacity of 1 spaces requests evenly, so no 1s window ever sees more than requests_per_s
+        self.rate_limiter = TokenBucket(requests_per_s, capacity=1)
+        self.open_requests = threading.BoundedSemaphore(max_open_requests)
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),  # all our POSTs are queries, safe to repeat
+            raise_on_status=False,  # hand back the last response once retries run out
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        # only the path is traced, auth URLs have secrets in their query
+        with profiling.timer("http_post", path=urlsplit(url).path) as trace_args:
+            response = self.session.post(url, **kwargs)
+            if profiling.get_profiler() is not None:
+                trace_args.update(status=response.status_code, bytes=len(response.content))
+                profiling.count(f"http_status_{response.status_code}")
+                profiling.count("http_bytes_received", len(response.content))
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def post_rate_limited(self, url: str, **kwargs) -> requests.Response:
+        """a POST that waits for its turn within the rate limit and the max amount of open requests"""
+        with profiling.timer("igdb_rate_limit_wait"):
+            self.rate_limiter.acquire()
+        with self.open_requests:
+            return self.post(url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[IgdbClient] = None
+
+
+def get_client() -> IgdbClient:
+    """the shared IgdbClient, all requests should go through it so connections are reused"""
+    global _client
+    if _client is None:
+        _client = IgdbClient()
+    return _client
+
+
+class IgdbScheduler:
+    """Runs IGDB work (game queries, cover downloads) concurrently on a bounded pool of threads.
+    Queries made through post_igdb also respect IGDB's rate limits, via the shared IgdbClient"""
+
+    def __init__(self, max_workers: int = IGDB_MAX_OPEN_REQUESTS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="igdb")
+
+    def submit(self, func: Callable[..., T], *args, **kwargs) -> "Future[T]":
+        return self.executor.submit(func, *args, **kwargs)
+
+    def map(
+        self, func: Callable[[U], T], items: Iterable[U], progress_cb: Optional[Callable[[int], None]] = None
+    ) -> List[T]:
+        """runs func on all items concurrently, returns results in order.
+        progress_cb is called with the amount of finished items, from the calling thread"""
+        futures = [self.executor.submit(func, item) for item in items]
+        for done, _future in enumerate(as_completed(futures), start=1):
+            if progress_cb is not None:
+                progress_cb(done)
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_scheduler: Optional[IgdbScheduler] = None
+
+
+def get_scheduler() -> IgdbScheduler:
+    """the shared IgdbScheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = IgdbScheduler()
+    return _scheduler
+
+
+def paginate(items: List[T], size: int) -> List[List[T]]:
+    """splits items in pages of (at most) size items, e.g., for IGDB_PAGE_LIMIT items per request"""
+    pages = []
+    for start in range(0, len(items), size):
+        end = start + size
+        pages.append(items[start:end])
+    return pages
+
+
+def raise_if_cancelled(cancel_event: Optional[threading.Event], futures: Iterable[Future]) -> None:
+    """if cancel_event was set, cancels the futures that didn't start yet and raises CancelledError"""
+    if cancel_event is not None and cancel_event.is_set():
+        for future in futures:
+            future.cancel()
+        raise CancelledError()
+
+
+def get_games_api_url() -> str:
+    return os.environ.get(GAMES_API_URL_ENV_VAR, GAMES_API_URL)
+
+
+def get_auth_url() -> str:
+    return os.environ.get(AUTH_URL_ENV_VAR, AUTH_URL)
+
+
+def request_auth_token() -> Dict[str, Any]:
+    """authenticates on Twitch with OAuth2, returns the whole response (access_token, expires_in, token_type)"""
     auth_url = (
-        "https://id.twitch.tv/oauth2/token?client_id="
+        get_auth_url()
+        + "?client_id="
         + os.environ["CLIENT_ID"]
         + "&client_secret="
         + os.environ["CLIENT_SECRET"]
@@ -18,31 +203,115 @@ def get_auth_token() -> str:
     )
 
     # make post to auth_url, get token
-    response_decoded_json = requests.post(auth_url)
-    response_json = response_decoded_json.json()
-    access_token = response_json["access_token"]
+    response_decoded_json = get_client().post(auth_url)
+    return response_decoded_json.json()
+
+
+def get_auth_token() -> str:
+    """authenticates on Twitch with OAuth2"""
+    access_token = request_auth_token()["access_token"]
     return access_token
 
 
-def query_igdb(game_id: str, access_token: str, dir: str = "user_data") -> Optional[Dict[str, str]]:
-    """queries IGDB.com, returns json struct with game info"""
-    game_id = re.sub(r"\D", "", game_id)  # clean IDs from windows
-    # query game info
-    game_api_url = "https://api.igdb.com/v4/games"
-    header = {
+class TokenManager:
+    """Caches the Twitch OAuth2 token (in memory and, optionally, on disk) and only refreshes it when it's close
+    to expiring, or after IGDB rejects it"""
+
+    def __init__(self, token_file: Optional[str] = None):
+        self.token_file = token_file
+        self.access_token: Optional[str] = None
+        self.expires_at: float = 0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """loads the token from disk, if it was issued to the current CLIENT_ID"""
+        if self.token_file is None or not os.path.exists(self.token_file):
+            return
+        try:
+            with open(self.token_file) as token_file:
+                token_json = json.load(token_file)
+        except (OSError, ValueError):
+            print(f"Failed to read {self.token_file}")
+            return
+        if token_json.get("client_id") != os.environ.get("CLIENT_ID"):
+            return
+        self.access_token = token_json["access_token"]
+        self.expires_at = token_json["expires_at"]
+
+    def _save(self) -> None:
+        if self.token_file is None:
+            return
+        token_json = {
+            "client_id": os.environ.get("CLIENT_ID"),
+            "access_token": self.access_token,
+            "expires_at": self.expires_at,
+        }
+        try:
+            with open(self.token_file, "w") as token_file:
+                json.dump(token_json, token_file)
+        except OSError:
+            print(f"Failed to save {self.token_file}")
+
+    def get_token(self) -> str:
+        """returns the cached token, fetching a new one if there is none or it's about to expire"""
+        with self.lock:
+            if self.access_token is None or time.time() > self.expires_at - TOKEN_EXPIRY_MARGIN_S:
+                response_json = request_auth_token()
+                self.access_token = response_json["access_token"]
+                self.expires_at = time.time() + response_json.get("expires_in", 0)
+                self._save()
+            return self.access_token
+
+    def invalidate(self, access_token: str) -> None:
+        """drops the token, if it is still the cached one (e.g., after a 401 from IGDB)"""
+        with self.lock:
+            if self.access_token == access_token:
+                self.access_token = None
+                self.expires_at = 0
+
+    def call(self, func: Callable[[str], T]) -> T:
+        """calls func(access_token), retrying once with a fresh token if IGDB rejected the cached one"""
+        access_token = self.get_token()
+        try:
+            return func(access_token)
+        except UnauthorizedError:
+            print("\tAccess token rejected, fetching a new one")
+            self.invalidate(access_token)
+            return func(self.get_token())
+
+
+_token_managers: Dict[str, TokenManager] = {}
+
+
+def get_token_manager(dir: str = "user_data") -> TokenManager:
+    """the shared TokenManager, caching its token in dir"""
+    if dir not in _token_managers:
+        _token_managers[dir] = TokenManager(os.path.join(dir, ".auth_token"))
+    return _token_managers[dir]
+
+
+def get_igdb_headers(access_token: str) -> Dict[str, str]:
+    """headers needed for any IGDB API request"""
+    return {
         "Client-ID": os.environ["CLIENT_ID"],
         "Authorization": "Bearer " + access_token,
     }
-    response_decoded_json = requests.post(
-        game_api_url,
-        data="fields *,release_dates.*,cover.*; where id = " + str(game_id) + ";",
-        headers=header,
-    )
-    if len(response_decoded_json.json()) == 0:
-        print(f"\tGame {game_id} not found in IGDB")
-        return None
-    response_json = response_decoded_json.json()[0]
 
+
+def post_igdb(url: str, data: str, access_token: str) -> requests.Response:
+    """makes a query to the IGDB API, raises UnauthorizedError if the access token was rejected, and HTTPError for
+    any other error (e.g., once retries of 429 and 5xx run out, or 400 for a bad query)"""
+    response = get_client().post_rate_limited(url, data=data, headers=get_igdb_headers(access_token))
+    if response.status_code == 401:
+        raise UnauthorizedError(response.text)
+    if not 200 <= response.status_code < 300:
+        raise requests.HTTPError(f"IGDB answered HTTP {response.status_code}: {response.text}", response=response)
+    return response
+
+
+def parse_game_json(game_id: str, response_json: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """parses a game record from IGDB, returns our json struct with game info and the cover URL (if any)"""
     name = response_json["name"]
 
     # get earliest release year
@@ -53,8 +322,6 @@ def query_igdb(game_id: str, access_token: str, dir: str = "user_data") -> Optio
                 continue
             if release_year["y"] < year or year == 0:
                 year = release_year["y"]
-    if year == 0:
-        print("\tEmpty year!")
 
     # get proper name to order game with
     order_name = name.lower().split(": ")[0].split(" - ")[0].split(", ")[0] + " "
@@ -66,16 +333,12 @@ def query_igdb(game_id: str, access_token: str, dir: str = "user_data") -> Optio
     order_name = order_name.replace(" i ", "").replace(" ii ", "").replace(" iii ", "")
     order_name = order_name.strip() + " " + str(year)
 
-    # download cover img
+    # get cover URL, in the bigger size
+    cover_url = None
     if "cover" in response_json:
-        img_url = "https:" + response_json["cover"]["url"].replace("/t_thumb/", "/t_cover_big/")
-        img_file_path = os.path.join(dir, str(game_id) + ".jpg")
-        if not os.path.exists(img_file_path):
-            img_data = requests.get(img_url).content
-            with open(img_file_path, "wb") as handler:
-                handler.write(img_data)
-    else:
-        print("\tNo image found!")
+        cover_url = response_json["cover"]["url"].replace("/t_thumb/", "/t_cover_big/")
+        if cover_url.startswith("//"):  # IGDB's URLs have no scheme
+            cover_url = "https:" + cover_url
 
     game_json = {
         "game_id": game_id,
@@ -83,5 +346,389 @@ def query_igdb(game_id: str, access_token: str, dir: str = "user_data") -> Optio
         "order_name": order_name.strip(),
         "year": year,
     }
+
+    # the record's version, to later tell whether it changed
+    for version_field in ["updated_at", "checksum"]:
+        if version_field in response_json:
+            game_json[version_field] = response_json[version_field]
+    return game_json, cover_url
+
+
+class CoverStore:
+    """The game covers in a dir, <game_id>.jpg, plus the URL, ETag and Last-Modified each was downloaded with.
+    Covers whose URL didn't change are never re-downloaded, others are fetched with conditional GETs.
+    Use get_cover_store, so all downloads to a dir share one store"""
+
+    def __init__(self, dir: str = "user_data"):
+        self.dir = dir
+        self.index_path = os.path.join(dir, ".covers")
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, str]] = self.read_index()
+        self.changed_entries: Dict[str, Dict[str, str]] = {}  # set since the last save
+
+    def read_index(self) -> Dict[str, Dict[str, str]]:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path) as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            print(f"Failed to read {self.index_path}")
+            return {}
+
+    def cover_path(self, game_id: str) -> str:
+        return os.path.join(self.dir, str(game_id) + ".jpg")
+
+    def is_up_to_date(self, game_id: str, cover_url: str) -> bool:
+        """whether we already have this game's cover, downloaded from this same URL"""
+        entry = self.entries.get(game_id)
+        return entry is not None and entry["url"] == cover_url and os.path.exists(self.cover_path(game_id))
+
+    def fetch(self, game_id: str, cover_url: str, revalidate: bool = False) -> bool:
+        """downloads a game's cover, streaming it to a temp file which is then renamed to <game_id>.jpg.
+        Up-to-date covers cost nothing, unless revalidate, in which case a conditional GET is made.
+        Returns whether the cover was (re)written"""
+        if not revalidate and self.is_up_to_date(game_id, cover_url):
+            return False
+
+        # conditional GET, if we have a cover downloaded from this URL (or an older one from before URLs were kept)
+        img_file_path = self.cover_path(game_id)
+        headers = {}
+        entry = self.entries.get(game_id)
+        if os.path.exists(img_file_path):
+            if entry is None:
+                headers["If-Modified-Since"] = formatdate(os.path.getmtime(img_file_path), usegmt=True)
+            elif entry["url"] == cover_url:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+        with profiling.timer("cover_download", game_id=game_id) as trace_args:
+            response = get_client().get(cover_url, headers=headers, stream=True)
+            trace_args["status"] = response.status_code
+            profiling.count(f"cover_status_{response.status_code}")
+            try:
+                if response.status_code == 304:
+                    self._set_entry(game_id, cover_url, response, entry)
+                    return False
+                if response.status_code != 200:
+                    print(f"\tFailed to download cover for {game_id}: HTTP {response.status_code}")
+                    return False
+
+                # write to temp file in the same dir, so the rename is atomic
+                temp_fd, temp_path = make_temp_file(img_file_path, prefix=f".{game_id}.")
+                cover_bytes = 0
+                try:
+                    with os.fdopen(temp_fd, "wb") as handler:
+                        for chunk in response.iter_content(COVER_CHUNK_SIZE):
+                            handler.write(chunk)
+                            cover_bytes += len(chunk)
+                    os.replace(temp_path, img_file_path)
+                except BaseException:
+                    os.remove(temp_path)
+                    raise
+                trace_args["bytes"] = cover_bytes
+                profiling.count("cover_bytes_received", cover_bytes)
+            finally:
+                response.close()
+        self._set_entry(game_id, cover_url, response, None)
+        return True
+
+    def _set_entry(
+        self, game_id: str, cover_url: str, response: requests.Response, entry: Optional[Dict[str, str]]
+    ) -> None:
+        """records a cover's validators, keeping the old ones if a 304 didn't resend them"""
+        new_entry = {"url": cover_url}
+        if entry is not None:
+            new_entry.update({key: value for key, value in entry.items() if key in ("etag", "last_modified")})
+        if "ETag" in response.headers:
+            new_entry["etag"] = response.headers["ETag"]
+        if "Last-Modified" in response.headers:
+            new_entry["last_modified"] = response.headers["Last-Modified"]
+        self.set_entry(game_id, new_entry)
+
+    def set_entry(self, game_id: str, entry: Dict[str, str]) -> None:
+        """records the URL (and validators) a cover was downloaded with, written by the next save"""
+        with self.lock:
+            self.entries[game_id] = entry
+            self.changed_entries[game_id] = entry
+
+    def save(self) -> None:
+        """writes the entries set since the last save to the index, keeping those other stores (e.g., of other
+        processes) wrote to it meanwhile"""
+        with _cover_stores_lock:
+            with self.lock:
+                if len(self.changed_entries) == 0:
+                    return
+                changed_entries, self.changed_entries = self.changed_entries, {}
+            entries = self.read_index()
+            entries.update(changed_entries)
+            temp_fd, temp_path = make_temp_file(self.index_path, prefix=".covers.")
+            try:
+                with os.fdopen(temp_fd, "w") as index_file:
+                    json.dump(entries, index_file)
+                os.replace(temp_path, self.index_path)
+            except BaseException:
+                os.remove(temp_path)
+                with self.lock:
+                    self.changed_entries = {**changed_entries, **self.changed_entries}
+                raise
+            with self.lock:
+                self.entries = {**entries, **self.changed_entries}
+
+
+_cover_stores: Dict[str, CoverStore] = {}
+_cover_stores_lock = threading.Lock()  # held while a store is made or saved
+
+
+def get_cover_store(dir: str = "user_data") -> CoverStore:
+    """the shared CoverStore of dir"""
+    with _cover_stores_lock:
+        if dir not in _cover_stores:
+            _cover_stores[dir] = CoverStore(dir)
+        return _cover_stores[dir]
+
+
+def download_cover(game_id: str, cover_url: str, dir: str = "user_data") -> None:
+    """downloads a game's cover image, unless it is already up to date"""
+    cover_store = get_cover_store(dir)
+    if cover_store.fetch(game_id, cover_url):
+        cover_store.save()
+
+
+def fetch_covers(
+    covers: Dict[str, str],
+    dir: str = "user_data",
+    revalidate: bool = False,
+    progress_cb: Optional[Callable[[int], None]] = None,
+    scheduler: Optional[IgdbScheduler] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Dict[str, bool]:
+    """downloads many covers {game_id: cover_url} concurrently on the scheduler.
+    Returns {game_id: whether the cover was (re)written}, failed downloads are left out"""
+    if scheduler is None:
+        scheduler = get_scheduler()
+    cover_store = get_cover_store(dir)
+    cover_futures = {
+        scheduler.submit(cover_store.fetch, game_id, cover_url, revalidate): game_id
+        for game_id, cover_url in covers.items()
+    }
+    return wait_for_covers(cover_store, cover_futures, progress_cb, cancel_event=cancel_event)
+
+
+def wait_for_covers(
+    cover_store: CoverStore,
+    cover_futures: Dict["Future[bool]", str],
+    progress_cb: Optional[Callable[[int], None]] = None,
+    games_done: int = 0,
+    cancel_event: Optional[threading.Event] = None,
+    cover_cb: Optional[Callable[[str], None]] = None,
+) -> Dict[str, bool]:
+    """waits for cover downloads, reporting progress, then saves the cover store.
+    cover_cb is called with each game_id whose download finished (or failed)"""
+    covers_written: Dict[str, bool] = {}
+    try:
+        for cover_future in as_completed(cover_futures):
+            raise_if_cancelled(cancel_event, cover_futures)
+            game_id = cover_futures[cover_future]
+            try:
+                covers_written[game_id] = cover_future.result()
+            except (requests.RequestException, OSError) as exception:
+                print(f"\tFailed to download cover for {game_id}: {exception}")
+            if cover_cb is not None:
+                cover_cb(game_id)
+            games_done += 1
+            if progress_cb is not None:
+                progress_cb(games_done)
+    finally:
+        cover_store.save()
+    return covers_written
+
+
+def report_game_json(game_json: Dict[str, Any], cover_url: Optional[str]) -> None:
+    if game_json["year"] == 0:
+        print("\tEmpty year!")
+    if cover_url is None:
+        print("\tNo image found!")
     print(game_json)
+
+
+def process_game_json(game_id: str, response_json: Dict[str, Any], dir: str = "user_data") -> Dict[str, Any]:
+    """parses a game record from IGDB and downloads its cover"""
+    game_json, cover_url = parse_game_json(game_id, response_json)
+    report_game_json(game_json, cover_url)
+    if cover_url is not None:
+        download_cover(game_id, cover_url, dir)
     return game_json
+
+
+def get_game_fields() -> str:
+    """the fields queried for each game, DEFAULT_GAME_FIELDS unless IGDB_GAME_FIELDS is set"""
+    return os.environ.get(GAME_FIELDS_ENV_VAR, DEFAULT_GAME_FIELDS)
+
+
+def query_igdb(
+    game_id: str, access_token: str, dir: str = "user_data", fields: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """queries IGDB.com, returns json struct with game info"""
+    game_id = re.sub(r"\D", "", game_id)  # clean IDs from windows
+    # query game info
+    response_decoded_json = post_igdb(
+        get_games_api_url(),
+        f"fields {fields or get_game_fields()}; where id = {game_id};",
+        access_token,
+    )
+    if len(response_decoded_json.json()) == 0:
+        print(f"\tGame {game_id} not found in IGDB")
+        return None
+    response_json = response_decoded_json.json()[0]
+    return process_game_json(game_id, response_json, dir)
+
+
+def parse_game_reference(reference: str) -> Tuple[Optional[str], Optional[str]]:
+    """parses an IGDB ID or an igdb.com game URL, returns (game_id, None) or (None, slug), or (None, None) if neither"""
+    reference = reference.strip()
+    if reference.isdigit():
+        return reference, None
+    match = GAME_URL_PATTERN.search(reference)
+    if match is not None:
+        return None, match.group(1).lower()
+    return None, None
+
+
+def query_igdb_slugs(
+    slugs: List[str],
+    access_token: str,
+    scheduler: Optional[IgdbScheduler] = None,
+) -> Dict[str, str]:
+    """queries IGDB.com for the IDs of games by slug (as in their igdb.com URLs), IGDB_PAGE_LIMIT slugs per request.
+    Returns a dict {slug: game_id}, slugs not found in IGDB are left out"""
+    if scheduler is None:
+        scheduler = get_scheduler()
+
+    def query_page(page_slugs: List[str]) -> List[Dict[str, Any]]:
+        quoted_slugs = ",".join(f'"{slug}"' for slug in page_slugs)
+        response_decoded_json = post_igdb(
+            get_games_api_url(),
+            f"fields slug; where slug = ({quoted_slugs}); limit {IGDB_PAGE_LIMIT};",
+            access_token,
+        )
+        return response_decoded_json.json()
+
+    game_ids: Dict[str, str] = {}
+    for page in scheduler.map(query_page, paginate(slugs, IGDB_PAGE_LIMIT)):
+        for response_json in page:
+            game_ids[response_json["slug"]] = str(response_json["id"])
+    return game_ids
+
+
+def query_igdb_versions(
+    game_ids: List[str],
+    access_token: str,
+    scheduler: Optional[IgdbScheduler] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """queries IGDB.com only for the updated_at and checksum of many games, IGDB_PAGE_LIMIT games per request.
+    Returns a dict {game_id: {updated_at, checksum}}, games not found in IGDB are left out"""
+    game_ids = [re.sub(r"\D", "", game_id) for game_id in game_ids]  # clean IDs from windows
+    if scheduler is None:
+        scheduler = get_scheduler()
+
+    def query_page(page_ids: List[str]) -> List[Dict[str, Any]]:
+        response_decoded_json = post_igdb(
+            get_games_api_url(),
+            f"fields updated_at,checksum; where id = ({','.join(page_ids)}); limit {IGDB_PAGE_LIMIT};",
+            access_token,
+        )
+        return response_decoded_json.json()
+
+    versions: Dict[str, Dict[str, Any]] = {}
+    for page in scheduler.map(query_page, paginate(game_ids, IGDB_PAGE_LIMIT)):
+        for response_json in page:
+            versions[str(response_json["id"])] = {
+                "updated_at": response_json.get("updated_at"),
+                "checksum": response_json.get("checksum"),
+            }
+    return versions
+
+
+def get_stale_game_ids(games_json: List[Dict[str, Any]], versions: Dict[str, Dict[str, Any]]) -> List[str]:
+    """IDs of the games whose IGDB record changed since they were fetched (or whose version was never stored)"""
+    stale_game_ids = []
+    for game_json in games_json:
+        version = versions.get(game_json["game_id"])
+        if version is None:
+            continue  # not in IGDB anymore, nothing to fetch
+        if game_json.get("checksum") is not None and version["checksum"] is not None:
+            if game_json["checksum"] != version["checksum"]:
+                stale_game_ids.append(game_json["game_id"])
+        elif game_json.get("updated_at") is None or game_json["updated_at"] != version["updated_at"]:
+            stale_game_ids.append(game_json["game_id"])
+    return stale_game_ids
+
+
+def query_igdb_batch(
+    game_ids: List[str],
+    access_token: str,
+    dir: str = "user_data",
+    progress_cb: Optional[Callable[[int], None]] = None,
+    scheduler: Optional[IgdbScheduler] = None,
+    cancel_event: Optional[threading.Event] = None,
+    game_cb: Optional[Callable[[Dict[str, Any]], None]] = None,
+    fields: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """queries IGDB.com for many games at once, IGDB_PAGE_LIMIT games per request.
+    Pages are queried, and covers downloaded, concurrently on the scheduler.
+    progress_cb is called with the amount of finished games, from the calling thread.
+    game_cb is called with the json struct of each game once it's finished (cover included), from the calling thread.
+    fields are the IGDB fields queried, get_game_fields() by default.
+    Setting cancel_event stops the work early, raising CancelledError.
+    Returns a dict {game_id: json struct with game info}, games not found in IGDB are left out"""
+    game_ids = [re.sub(r"\D", "", game_id) for game_id in game_ids]  # clean IDs from windows
+    if scheduler is None:
+        scheduler = get_scheduler()
+    if fields is None:
+        fields = get_game_fields()
+
+    def query_page(page_ids: List[str]) -> List[Dict[str, Any]]:
+        response_decoded_json = post_igdb(
+            get_games_api_url(),
+            f"fields {fields}; where id = ({','.join(page_ids)}); limit {IGDB_PAGE_LIMIT};",
+            access_token,
+        )
+        return response_decoded_json.json()
+
+    page_futures: Dict[Future, List[str]] = {}
+    for page_ids in paginate(game_ids, IGDB_PAGE_LIMIT):
+        page_futures[scheduler.submit(query_page, page_ids)] = page_ids
+
+    # covers are a separate stage, each page's covers start downloading as soon as the page arrives
+    games_json: Dict[str, Dict[str, Any]] = {}
+    cover_store = get_cover_store(dir)
+    cover_futures: Dict["Future[bool]", str] = {}
+    games_done = 0
+    for page_future in as_completed(page_futures):
+        if cancel_event is not None and cancel_event.is_set():
+            cover_store.save()
+            raise_if_cancelled(cancel_event, [*page_futures, *cover_futures])
+        page_covers = 0
+        for response_json in page_future.result():
+            game_id = str(response_json["id"])
+            game_json, cover_url = parse_game_json(game_id, response_json)
+            report_game_json(game_json, cover_url)
+            games_json[game_id] = game_json
+            if cover_url is not None and not cover_store.is_up_to_date(game_id, cover_url):
+                cover_futures[scheduler.submit(cover_store.fetch, game_id, cover_url)] = game_id
+                page_covers += 1
+            elif game_cb is not None:
+                game_cb(game_json)
+        games_done += len(page_futures[page_future]) - page_covers
+        if progress_cb is not None:
+            progress_cb(games_done)
+    cover_cb = None if game_cb is None else lambda game_id: game_cb(games_json[game_id])
+    wait_for_covers(cover_store, cover_futures, progress_cb, games_done, cancel_event, cover_cb)
+
+    for game_id in game_ids:
+        if game_id not in games_json:
+            print(f"\tGame {game_id} not found in IGDB")
+    return games_json
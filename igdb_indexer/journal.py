@@ -0,0 +1,76 @@
+"""Append-only journal of the games fetched while updating a list, so an interrupted update can resume"""
+
+import json
+import os
+import time
+from typing import IO, Any, Dict, Optional
+
+JOURNAL_MAX_AGE_S = 24 * 60 * 60  # journals of updates started longer ago are discarded, IGDB may have changed since
+
+
+def get_journal_path(json_file_name: str, data_dir: str = "user_data") -> str:
+    # hidden, and not a .json, so it's not mistaken for a list
+    return os.path.join(data_dir, f".{json_file_name}.journal")
+
+
+class RefreshJournal:
+    """one line of JSON per game fetched, flushed as soon as it's written, so killing the app loses nothing.
+    The first line has when the update started"""
+
+    def __init__(self, json_file_name: str, data_dir: str = "user_data"):
+        self.journal_path = get_journal_path(json_file_name, data_dir)
+        self.journal_file: Optional[IO[bytes]] = None
+
+    def __enter__(self) -> "RefreshJournal":
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """games fetched by an interrupted update, {game_id: json struct with game info}.
+        Journals older than JOURNAL_MAX_AGE_S (or without a start time) are stale, and removed"""
+        games_json: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self.journal_path):
+            return games_json
+        started_at: Optional[float] = None
+        with open(self.journal_path) as journal_file:
+            for line in journal_file:
+                try:
+                    game_json = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line may be cut short, if it was being written when the app died
+                if "started_at" in game_json:
+                    started_at = game_json["started_at"]
+                    continue
+                games_json[game_json["game_id"]] = game_json
+        if started_at is None or time.time() - started_at > JOURNAL_MAX_AGE_S:
+            print(f"Discarding {self.journal_path}, of an update started too long ago")
+            self.remove()
+            return {}
+        return games_json
+
+    def append(self, game_json: Dict[str, Any]) -> None:
+        if self.journal_file is None:
+            self.journal_file = open(self.journal_path, "ab+")
+            if self.journal_file.seek(0, os.SEEK_END) == 0:
+                self.journal_file.write((json.dumps({"started_at": time.time()}) + "\n").encode())
+            else:
+                # after a line cut short, start a new one
+                self.journal_file.seek(-1, os.SEEK_END)
+                if self.journal_file.read(1) != b"\n":
+                    self.journal_file.write(b"\n")
+        self.journal_file.write((json.dumps(game_json) + "\n").encode())
+        self.journal_file.flush()
+
+    def close(self) -> None:
+        if self.journal_file is not None:
+            os.fsync(self.journal_file.fileno())
+            self.journal_file.close()
+            self.journal_file = None
+
+    def remove(self) -> None:
+        """removes the journal, once the update it recorded is saved"""
+        self.close()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
@@ -2,53 +2,257 @@
 
 import json
 import os
-from typing import Any, Dict, List
+import threading
+from typing import Any, Dict, List, Optional, Set
 
+from igdb_indexer import profiling
+from igdb_indexer.files import make_temp_file
 from igdb_indexer.game_details import GameDetails
+from igdb_indexer.thumbnails import remove_thumbnails
+
+REFERENCES_FILE = ".references"  # game_id -> lists with it, not a .json, so it's not mistaken for a list
+REFERENCES_LOG_FILE = ".references.log"  # changes to .references since it was written, one line per list saved
+REFERENCES_LOG_MAX_BYTES = 1024 * 1024  # past which the log is compacted into .references
+COUNTS_FILE = ".counts"  # list -> [amount of games, size, mtime] of the file when counted, to count without parsing
+_references_lock = threading.Lock()  # lists are saved from background threads too
 
 
 def load_json(json_file_name: str, data_dir: str = "user_data") -> Dict[str, Any]:
     """load JSON file as a dict {games: [Dict[str, str]]}"""
     json_path = os.path.join(data_dir, json_file_name)
-    if os.path.exists(json_path):
-        with open(json_path, newline="") as json_file:
-            games_json = json.load(json_file)
-    else:
-        games_json = {"games": []}
+    with profiling.timer("load_json", list=json_file_name) as trace_args:
+        if os.path.exists(json_path):
+            with open(json_path, newline="") as json_file:
+                games_json = json.load(json_file)
+        else:
+            games_json = {"games": []}
+        trace_args["games"] = len(games_json["games"])
     return games_json
 
 
+def count_games(json_file_name: str, data_dir: str = "user_data") -> int:
+    """amount of games in a JSON file, as counted when it was saved, unless the file changed since"""
+    json_path = os.path.join(data_dir, json_file_name)
+    if not os.path.exists(json_path):
+        return 0
+    count = _load_counts(data_dir=data_dir).get(json_file_name)
+    json_stat = os.stat(json_path)
+    if count is not None and count[1:] == [json_stat.st_size, json_stat.st_mtime_ns]:
+        return count[0]
+
+    # never counted, or changed since, e.g., by hand
+    with _references_lock:
+        games_count = len(load_json(json_file_name, data_dir=data_dir)["games"])
+        _save_count(json_file_name, games_count, data_dir=data_dir)
+    return games_count
+
+
+def _load_counts(data_dir: str = "user_data") -> Dict[str, List[int]]:
+    counts_path = os.path.join(data_dir, COUNTS_FILE)
+    if not os.path.exists(counts_path):
+        return {}
+    with open(counts_path) as counts_file:
+        return json.load(counts_file)
+
+
+def _save_count(json_file_name: str, games_count: Optional[int], data_dir: str = "user_data") -> None:
+    """records the amount of games of a list along with its file's size and mtime, or forgets it if None"""
+    counts_path = os.path.join(data_dir, COUNTS_FILE)
+    counts = _load_counts(data_dir=data_dir)
+    if games_count is None:
+        counts.pop(json_file_name, None)
+    else:
+        json_stat = os.stat(os.path.join(data_dir, json_file_name))
+        counts[json_file_name] = [games_count, json_stat.st_size, json_stat.st_mtime_ns]
+    if len(counts) == 0:
+        if os.path.exists(counts_path):
+            os.remove(counts_path)
+    else:
+        _write_json(counts_path, counts)
+
+
+def _write_json(json_path: str, data: Any, indent: Optional[int] = None) -> None:
+    """writes a JSON file atomically: to a temporary file, synced to disk, then renamed over the old one"""
+    temp_fd, temp_path = make_temp_file(json_path)
+    try:
+        with os.fdopen(temp_fd, "w") as outfile:
+            json.dump(data, outfile, indent=indent)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(temp_path, json_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def get_game_ids(games_json: Dict[str, Any]) -> Set[str]:
+    return {game["game_id"] for game in games_json["games"]}
+
+
+def rebuild_references(data_dir: str = "user_data") -> Dict[str, Set[str]]:
+    """finds which lists have each game, reading all JSON files"""
+    references: Dict[str, Set[str]] = {}
+    for json_file_name in get_all_json(data_dir=data_dir):
+        for game_id in get_game_ids(load_json(json_file_name, data_dir=data_dir)):
+            references.setdefault(game_id, set()).add(json_file_name)
+    return references
+
+
+def load_references(data_dir: str = "user_data") -> Dict[str, Set[str]]:
+    """loads which lists have each game, rebuilding it if it was never saved"""
+    references_path = os.path.join(data_dir, REFERENCES_FILE)
+    if not os.path.exists(references_path):
+        return rebuild_references(data_dir=data_dir)
+    with open(references_path) as references_file:
+        references = {game_id: set(json_file_names) for game_id, json_file_names in json.load(references_file).items()}
+
+    # then the changes logged since it was written
+    references_log_path = os.path.join(data_dir, REFERENCES_LOG_FILE)
+    if os.path.exists(references_log_path):
+        with open(references_log_path) as references_log_file:
+            for line in references_log_file:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line may be cut short, if it was being written when the app died
+                _update_references(references, change["list"], set(change["removed"]), set(change["added"]))
+    return references
+
+
+def save_references(references: Dict[str, Set[str]], data_dir: str = "user_data") -> None:
+    """writes all references, which makes the log of changes to them empty"""
+    references_path = os.path.join(data_dir, REFERENCES_FILE)
+    references_log_path = os.path.join(data_dir, REFERENCES_LOG_FILE)
+    if len(references) == 0:
+        if os.path.exists(references_path):
+            os.remove(references_path)
+    else:
+        _write_json(
+            references_path,
+            {game_id: sorted(json_file_names) for game_id, json_file_names in references.items()},
+        )
+    if os.path.exists(references_log_path):
+        os.remove(references_log_path)
+
+
+def _log_references(
+    json_file_name: str, previous_game_ids: Set[str], game_ids: Set[str], data_dir: str = "user_data"
+) -> None:
+    """appends the games a list gained and lost to the log of changes to the references, compacting it if too big.
+    Only the changed list's games are written, not all references"""
+    added_game_ids = game_ids - previous_game_ids
+    removed_game_ids = previous_game_ids - game_ids
+    if len(added_game_ids) == 0 and len(removed_game_ids) == 0:
+        return
+    change = {"list": json_file_name, "added": sorted(added_game_ids), "removed": sorted(removed_game_ids)}
+    references_log_path = os.path.join(data_dir, REFERENCES_LOG_FILE)
+    with open(references_log_path, "ab+") as references_log_file:
+        # after a line cut short, start a new one
+        log_bytes = references_log_file.seek(0, os.SEEK_END)
+        if log_bytes > 0:
+            references_log_file.seek(-1, os.SEEK_END)
+            if references_log_file.read(1) != b"\n":
+                references_log_file.write(b"\n")
+        references_log_file.write((json.dumps(change) + "\n").encode())
+    if log_bytes > REFERENCES_LOG_MAX_BYTES:
+        save_references(load_references(data_dir=data_dir), data_dir=data_dir)
+
+
+def _update_references(
+    references: Dict[str, Set[str]], json_file_name: str, previous_game_ids: Set[str], game_ids: Set[str]
+) -> Set[str]:
+    """moves the references of a list from its previous games to its current ones, returns games no list has now"""
+    unreferenced_game_ids = set()
+    for game_id in previous_game_ids - game_ids:
+        json_file_names = references.get(game_id, set())
+        json_file_names.discard(json_file_name)
+        if len(json_file_names) == 0:
+            references.pop(game_id, None)
+            unreferenced_game_ids.add(game_id)
+    for game_id in game_ids - previous_game_ids:
+        references.setdefault(game_id, set()).add(json_file_name)
+    return unreferenced_game_ids
+
+
+def verify_references(data_dir: str = "user_data") -> bool:
+    """whether the saved references match the JSON files"""
+    return load_references(data_dir=data_dir) == rebuild_references(data_dir=data_dir)
+
+
+def remove_covers(game_ids: Set[str], data_dir: str = "user_data") -> None:
+    """removes the covers (and their thumbnails) of some games"""
+    for game_id in game_ids:
+        try:
+            os.remove(os.path.join(data_dir, game_id + ".jpg"))
+        except Exception:
+            print(f"Failed to remove cover img for {game_id}")
+    remove_thumbnails(game_ids, dir=data_dir)
+
+
+def get_cover_game_ids(data_dir: str = "user_data") -> Set[str]:
+    """IDs of the games with covers in data_dir"""
+    return {file[: -len(".jpg")] for file in os.listdir(data_dir) if file.endswith(".jpg")}
+
+
+def collect_garbage(data_dir: str = "user_data") -> Set[str]:
+    """rebuilds the references from the JSON files, then removes covers of games no list has, returns their IDs"""
+    with _references_lock:
+        references = rebuild_references(data_dir=data_dir)
+        save_references(references, data_dir=data_dir)
+    unreferenced_game_ids = get_cover_game_ids(data_dir=data_dir) - set(references)
+    remove_covers(unreferenced_game_ids, data_dir=data_dir)
+    return unreferenced_game_ids
+
+
 def save_json(json_file_name: str, games_json: Dict[str, Any], data_dir: str = "user_data") -> None:
-    """save JSON file"""
+    """save JSON file, and which lists have its games"""
     json_path = os.path.join(data_dir, json_file_name)
-    with open(json_path, "w") as outfile:
-        json.dump(games_json, outfile, indent=4)
+    with _references_lock:
+        previous_game_ids = get_game_ids(load_json(json_file_name, data_dir=data_dir))
+        _write_json(json_path, games_json, indent=4)
+        _save_count(json_file_name, len(games_json["games"]), data_dir=data_dir)
+        if os.path.exists(os.path.join(data_dir, REFERENCES_FILE)):
+            _log_references(json_file_name, previous_game_ids, get_game_ids(games_json), data_dir=data_dir)
+        else:
+            save_references(rebuild_references(data_dir=data_dir), data_dir=data_dir)
     print(f"Saved {json_path}")
 
 
+def add_game(json_file_name: str, game_json: Dict[str, Any], data_dir: str = "user_data") -> None:
+    """adds (or updates) a single game of a JSON file"""
+    games_json = load_json(json_file_name, data_dir=data_dir)
+    games_json["games"] = [game for game in games_json["games"] if game["game_id"] != game_json["game_id"]]
+    games_json["games"].append(game_json)
+    save_json(json_file_name, games_json, data_dir=data_dir)
+
+
+def remove_game(json_file_name: str, game_id: str, data_dir: str = "user_data") -> bool:
+    """removes a single game of a JSON file, returns whether the file had it"""
+    games_json = load_json(json_file_name, data_dir=data_dir)
+    prev_size: int = len(games_json["games"])
+    games_json["games"] = [game for game in games_json["games"] if game["game_id"] != game_id]
+    if len(games_json["games"]) == prev_size:
+        return False
+    save_json(json_file_name, games_json, data_dir=data_dir)
+    return True
+
+
 def remove_json(json_file_name: str, data_dir: str = "user_data") -> None:
     """remove JSON file and all game covers it uniquely references"""
-    other_jsons = get_all_json(data_dir=data_dir)
-    other_jsons.remove(json_file_name)
-
-    # find all games referenced by other lists
-    other_games = set()
-    for other_json in other_jsons:
-        for game in load_json(other_json, data_dir=data_dir)["games"]:
-            other_games.add(game["game_id"])
-
-    # remove all game_covers of games in the list-to-be-deleted that aren't referenced elsewhere
-    for game in load_json(json_file_name, data_dir=data_dir)["games"]:
-        if game["game_id"] in other_games:
-            continue
-        try:
-            os.remove(os.path.join(data_dir, game["game_id"] + ".jpg"))
-        except Exception:
-            print(f"Failed to remove cover img for {game['game_id']}")
-
-    # remove list
     json_path = os.path.join(data_dir, json_file_name)
-    os.remove(json_path)
+    with _references_lock:
+        # only this list is read, the references tell which of its games no other list has.
+        # If they drifted from the lists, verify_references tells, and collect_garbage rebuilds them
+        references = load_references(data_dir=data_dir)
+        game_ids = get_game_ids(load_json(json_file_name, data_dir=data_dir))
+        removed_games = _update_references(references, json_file_name, game_ids, set())
+        if os.path.exists(json_path):
+            os.remove(json_path)
+        _save_count(json_file_name, None, data_dir=data_dir)
+        save_references(references, data_dir=data_dir)
+
+    # remove all game_covers (and their thumbnails) of games in the list-to-be-deleted that aren't referenced elsewhere
+    remove_covers(removed_games, data_dir=data_dir)
     print(f"Removed {json_path}")
 
 
@@ -63,11 +267,20 @@ def get_all_json(data_dir: str = "user_data") -> List[str]:
     return list_of_jsons
 
 
+def get_all_game_ids(data_dir: str = "user_data") -> List[str]:
+    """IDs of all games in all JSON files, without duplicates"""
+    game_ids: Dict[str, None] = {}
+    for json_file_name in get_all_json(data_dir=data_dir):
+        for game in load_json(json_file_name, data_dir=data_dir)["games"]:
+            game_ids[game["game_id"]] = None
+    return list(game_ids)
+
+
 def load_json_as_games_list(json_file_name: str, data_dir: str = "user_data") -> List[GameDetails]:
     """loads JSON file, returns sorted List of GameDetails"""
     games_json = load_json(json_file_name, data_dir=data_dir)
     games_list: List[GameDetails] = []
     for game in games_json["games"]:
-        games_list.append(GameDetails(**game))
+        games_list.append(GameDetails.from_json(game))
     games_list.sort()
     return games_list
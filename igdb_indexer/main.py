@@ -1,14 +1,25 @@
 """The main file"""
 
+import argparse
 import os
 import sys
+import time
 
+from igdb_indexer import profiling
 from igdb_indexer.gui import MainWindow
-from igdb_indexer.json_interface import get_all_json
+from igdb_indexer.storage import get_storage
 
 
 def main():
     """loads all JSONs, shows GUI"""
+    parser = argparse.ArgumentParser(description="A GUI to keep track of videogames from IGDB.com")
+    parser.add_argument(
+        "--profile",
+        metavar="MODES",
+        help=f"profile this session, like {profiling.PROFILE_ENV_VAR}: summary, cprofile and/or trace",
+    )
+    args = parser.parse_args()
+
     if "CLIENT_ID" not in os.environ or "CLIENT_SECRET" not in os.environ:
         print("Error: please export CLIENT_ID and CLIENT_SECRET variables. Check the README for more details.")
         sys.exit(1)
@@ -16,12 +27,20 @@ def main():
     if not os.path.exists("user_data"):
         os.makedirs("user_data")
 
-    # grab all JSON files
-    list_of_jsons = get_all_json()
-
-    # create TK window
-    window = MainWindow(list_of_jsons)
-    window.mainloop()
+    profiling.start_session(profiling.parse_modes(args.profile) if args.profile is not None else None)
+    try:
+        start_s = time.perf_counter()
+        # grab all lists
+        with profiling.timer("get_all_json"):
+            list_of_jsons = get_storage().get_all_json()
+
+        # create TK window
+        with profiling.timer("MainWindow.__init__"):
+            window = MainWindow(list_of_jsons)
+        window.after_idle(lambda: profiling.record("startup_to_idle", start_s))
+        window.mainloop()
+    finally:
+        profiling.end_session()
 
 
 if __name__ == "__main__":
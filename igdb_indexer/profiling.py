@@ -0,0 +1,170 @@
+"""Timers and counters around startup, I/O and network phases, off unless asked for.
+Enable with IGDB_INDEXER_PROFILE (or main's --profile), a comma-separated list of modes: summary (timings'
+p50/p95 and totals, and counters, always written), cprofile (also a .prof file), trace (also a Chrome trace, for
+chrome://tracing or Perfetto). Anything else, e.g. 1, means summary. Files go to IGDB_INDEXER_PROFILE_DIR"""
+
+import contextlib
+import cProfile
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+PROFILE_ENV_VAR = "IGDB_INDEXER_PROFILE"
+PROFILE_DIR_ENV_VAR = "IGDB_INDEXER_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "profiles"
+PROFILE_MODES = {"summary", "cprofile", "trace"}
+
+
+def summarize(durations_s: List[float]) -> Dict[str, float]:
+    """count, total, mean, p50, p95 and max of some durations"""
+    ordered = sorted(durations_s)
+    if len(ordered) == 0:
+        return {"count": 0, "total_s": 0, "mean_s": 0, "p50_s": 0, "p95_s": 0, "max_s": 0}
+    return {
+        "count": len(ordered),
+        "total_s": sum(ordered),
+        "mean_s": sum(ordered) / len(ordered),
+        "p50_s": ordered[len(ordered) // 2],
+        "p95_s": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max_s": ordered[-1],
+    }
+
+
+def parse_modes(value: str) -> Set[str]:
+    """the profiling modes in a comma-separated value, empty if off"""
+    modes = {mode.strip().lower() for mode in value.split(",")} - {""}
+    if len(modes) == 0 or modes <= {"0", "false", "no", "off"}:
+        return set()
+    return (modes & PROFILE_MODES) or {"summary"}
+
+
+class Profiler:
+    """Keeps the durations of timed phases and the values of counters of a session, from any thread"""
+
+    def __init__(self, modes: Set[str], dir: str = DEFAULT_PROFILE_DIR):
+        self.modes = modes
+        self.dir = dir
+        self.lock = threading.Lock()
+        self.durations_s: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.trace_events: List[Dict[str, Any]] = []
+        self.start_s = time.perf_counter()
+        self.session_name = time.strftime("session-%Y%m%d-%H%M%S")
+        self.cprofile: Optional[cProfile.Profile] = None
+        if "cprofile" in modes:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def record(self, name: str, start_s: float, duration_s: float, **args: Any) -> None:
+        """records a phase which started at start_s (a perf_counter value)"""
+        with self.lock:
+            self.durations_s.setdefault(name, []).append(duration_s)
+            if "trace" in self.modes:
+                self.trace_events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": (start_s - self.start_s) * 1e6,
+                        "dur": duration_s * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": args,
+                    }
+                )
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "session_s": time.perf_counter() - self.start_s,
+                "timers": {name: summarize(durations_s) for name, durations_s in sorted(self.durations_s.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def save(self) -> None:
+        """writes the session's files, and prints its summary"""
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        os.makedirs(self.dir, exist_ok=True)
+        summary = self.summary()
+        path = os.path.join(self.dir, self.session_name)
+        with open(path + ".json", "w") as outfile:
+            json.dump(summary, outfile, indent=4)
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(path + ".prof")
+        if "trace" in self.modes:
+            with self.lock:
+                trace_events = list(self.trace_events)
+            with open(path + ".trace.json", "w") as outfile:
+                json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, outfile)
+
+        print(f"Profile of this session ({summary['session_s']:.1f}s), saved to {path}.*")
+        for name, timer in summary["timers"].items():
+            print(
+                f"\t{name}: {timer['count']}x, total {timer['total_s'] * 1000:.1f}ms,"
+                f" p50 {timer['p50_s'] * 1000:.1f}ms, p95 {timer['p95_s'] * 1000:.1f}ms"
+            )
+        for name, value in summary["counters"].items():
+            print(f"\t{name}: {value}")
+
+
+_profiler: Optional[Profiler] = None
+
+
+def get_profiler() -> Optional[Profiler]:
+    """the session's Profiler, None if not profiling"""
+    return _profiler
+
+
+def start_session(modes: Optional[Set[str]] = None, dir: Optional[str] = None) -> Optional[Profiler]:
+    """starts profiling, with the given modes or those of IGDB_INDEXER_PROFILE. Returns None if off"""
+    global _profiler
+    if modes is None:
+        modes = parse_modes(os.environ.get(PROFILE_ENV_VAR, ""))
+    if len(modes) == 0:
+        return None
+    if dir is None:
+        dir = os.environ.get(PROFILE_DIR_ENV_VAR, DEFAULT_PROFILE_DIR)
+    _profiler = Profiler(modes, dir)
+    return _profiler
+
+
+def end_session() -> None:
+    """stops profiling, saving the session's files"""
+    global _profiler
+    if _profiler is not None:
+        profiler, _profiler = _profiler, None
+        profiler.save()
+
+
+@contextlib.contextmanager
+def timer(name: str, **args: Any) -> Iterator[Dict[str, Any]]:
+    """times the block as phase name. Yields its trace args, so the block can add some (e.g., sizes).
+    Costs next to nothing when not profiling"""
+    profiler = _profiler
+    if profiler is None:
+        yield args
+        return
+    start_s = time.perf_counter()
+    try:
+        yield args
+    finally:
+        profiler.record(name, start_s, time.perf_counter() - start_s, **args)
+
+
+def record(name: str, start_s: float, **args: Any) -> None:
+    """records a phase from start_s (a perf_counter value) to now, if profiling. For phases that end in callbacks"""
+    profiler = _profiler
+    if profiler is not None:
+        profiler.record(name, start_s, time.perf_counter() - start_s, **args)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """adds amount to a counter, if profiling"""
+    if _profiler is not None:
+        _profiler.count(name, amount)
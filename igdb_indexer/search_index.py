@@ -0,0 +1,71 @@
+"""Indexed search over games' names"""
+
+import unicodedata
+from typing import Dict, Iterable, Optional, Set
+
+from igdb_indexer.game_details import GameDetails
+
+NGRAM_SIZE = 3
+
+
+def normalize(text: str) -> str:
+    """lowercase, without accents, so searches are case- and accent-insensitive"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def get_ngrams(text: str) -> Set[str]:
+    return {text[start:end] for start, end in zip(range(len(text) - NGRAM_SIZE + 1), range(NGRAM_SIZE, len(text) + 1))}
+
+
+class SearchIndex:
+    """Substring search over the name and order_name of games, backed by an index of their trigrams.
+    A query that contains the previous one only re-checks the previous matches"""
+
+    def __init__(self, games: Iterable[GameDetails] = ()):
+        self.texts: Dict[str, str] = {}  # game_id -> normalized name and order_name
+        self.postings: Dict[str, Set[str]] = {}  # trigram -> IDs of games with it
+        self.last_query: Optional[str] = None
+        self.last_matches: Set[str] = set()
+        for game in games:
+            self.add(game)
+
+    def add(self, game: GameDetails) -> None:
+        if game.game_id in self.texts:
+            self.remove(game.game_id)
+        # a line break between both, which no query has, so no match spans the two
+        text = normalize(game.name) + "\n" + normalize(game.order_name)
+        self.texts[game.game_id] = text
+        for ngram in get_ngrams(text):
+            self.postings.setdefault(ngram, set()).add(game.game_id)
+        self.last_query = None
+
+    def remove(self, game_id: str) -> None:
+        text = self.texts.pop(game_id, None)
+        if text is None:
+            return
+        for ngram in get_ngrams(text):
+            self.postings[ngram].discard(game_id)
+            if len(self.postings[ngram]) == 0:
+                del self.postings[ngram]
+        self.last_query = None
+
+    def search(self, query: str) -> Set[str]:
+        """IDs of the games whose name or order_name contain the query"""
+        query = normalize(query)
+        if query == "":
+            matches = set(self.texts)
+        else:
+            if self.last_query is not None and self.last_query in query:
+                # narrowing down the previous query, only its matches can still match
+                candidates: Iterable[str] = self.last_matches
+            elif len(query) >= NGRAM_SIZE:
+                # only games with all of the query's trigrams can match, starting from the rarest trigram
+                postings = sorted((self.postings.get(ngram, set()) for ngram in get_ngrams(query)), key=len)
+                candidates = set.intersection(*postings)
+            else:
+                candidates = self.texts
+            matches = {game_id for game_id in candidates if query in self.texts[game_id]}
+        self.last_query = query
+        self.last_matches = matches
+        return matches
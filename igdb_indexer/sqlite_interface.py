@@ -0,0 +1,192 @@
+"""Interface with a SQLite database, an alternative to JSON files with the same API.
+Lists are still named after their JSON files, and games are kept once, no matter how many lists have them"""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from igdb_indexer import json_interface, profiling
+from igdb_indexer.game_details import GameDetails
+
+DATABASE_FILE = ".games.db"  # not a .json, so it's not mistaken for a list
+SCHEMA_VERSION = 1
+SCHEMA = [
+    # the game's JSON, as IGDB fields may be added later, with order_name for sorting
+    "CREATE TABLE games (game_id TEXT PRIMARY KEY, order_name TEXT NOT NULL, data TEXT NOT NULL)",
+    "CREATE INDEX games_order_name ON games (order_name)",
+    "CREATE TABLE lists (name TEXT PRIMARY KEY)",
+    # which games each list has, in the order they were added
+    "CREATE TABLE memberships ("
+    " list TEXT NOT NULL REFERENCES lists (name) ON DELETE CASCADE,"
+    " game_id TEXT NOT NULL REFERENCES games (game_id),"
+    " PRIMARY KEY (list, game_id))",
+    "CREATE INDEX memberships_game_id ON memberships (game_id)",
+]
+
+
+@contextmanager
+def connect(data_dir: str = "user_data") -> Iterator[sqlite3.Connection]:
+    """opens the database, creating it (and importing all JSON files) the first time.
+    Everything done within is a single transaction"""
+    connection = sqlite3.connect(os.path.join(data_dir, DATABASE_FILE), timeout=30)
+    try:
+        connection.execute("PRAGMA foreign_keys = ON")
+        if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            _create_database(connection, data_dir)
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def _create_database(connection: sqlite3.Connection, data_dir: str) -> None:
+    connection.execute("BEGIN IMMEDIATE")  # others wait until it's created
+    try:
+        if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            for statement in SCHEMA:
+                connection.execute(statement)
+            for json_file_name in json_interface.get_all_json(data_dir=data_dir):
+                _save_list(connection, json_file_name, json_interface.load_json(json_file_name, data_dir=data_dir))
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            print(f"Created {os.path.join(data_dir, DATABASE_FILE)}")
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+
+
+def _upsert_game(connection: sqlite3.Connection, game_json: Dict[str, Any]) -> None:
+    connection.execute(
+        "INSERT INTO games (game_id, order_name, data) VALUES (?, ?, ?)"
+        " ON CONFLICT (game_id) DO UPDATE SET order_name = excluded.order_name, data = excluded.data",
+        (game_json["game_id"], game_json["order_name"], json.dumps(game_json)),
+    )
+
+
+def _remove_unreferenced_games(connection: sqlite3.Connection, game_ids: List[str]) -> List[str]:
+    """removes games no list has anymore, returns their IDs"""
+    unreferenced_game_ids = [
+        game_id
+        for game_id in game_ids
+        if connection.execute("SELECT 1 FROM memberships WHERE game_id = ? LIMIT 1", (game_id,)).fetchone() is None
+    ]
+    connection.executemany("DELETE FROM games WHERE game_id = ?", [(game_id,) for game_id in unreferenced_game_ids])
+    return unreferenced_game_ids
+
+
+def _get_list_game_ids(connection: sqlite3.Connection, json_file_name: str) -> List[str]:
+    rows = connection.execute("SELECT game_id FROM memberships WHERE list = ?", (json_file_name,))
+    return [game_id for (game_id,) in rows]
+
+
+def _save_list(connection: sqlite3.Connection, json_file_name: str, games_json: Dict[str, Any]) -> None:
+    previous_game_ids = _get_list_game_ids(connection, json_file_name)
+    connection.execute("DELETE FROM lists WHERE name = ?", (json_file_name,))
+    connection.execute("INSERT INTO lists (name) VALUES (?)", (json_file_name,))
+    for game_json in games_json["games"]:
+        _upsert_game(connection, game_json)
+    connection.executemany(
+        "INSERT OR IGNORE INTO memberships (list, game_id) VALUES (?, ?)",
+        [(json_file_name, game_json["game_id"]) for game_json in games_json["games"]],
+    )
+    _remove_unreferenced_games(connection, previous_game_ids)
+
+
+def load_json(json_file_name: str, data_dir: str = "user_data") -> Dict[str, Any]:
+    """load list as a dict {games: [Dict[str, str]]}, like json_interface.load_json"""
+    with profiling.timer("load_json", list=json_file_name) as trace_args, connect(data_dir) as connection:
+        rows = connection.execute(
+            "SELECT games.data FROM memberships JOIN games USING (game_id)"
+            " WHERE memberships.list = ? ORDER BY memberships.rowid",
+            (json_file_name,),
+        )
+        games_json = {"games": [json.loads(data) for (data,) in rows]}
+        trace_args["games"] = len(games_json["games"])
+        return games_json
+
+
+def count_games(json_file_name: str, data_dir: str = "user_data") -> int:
+    with connect(data_dir) as connection:
+        return connection.execute("SELECT COUNT(*) FROM memberships WHERE list = ?", (json_file_name,)).fetchone()[0]
+
+
+def save_json(json_file_name: str, games_json: Dict[str, Any], data_dir: str = "user_data") -> None:
+    """replaces all games of a list"""
+    with connect(data_dir) as connection:
+        _save_list(connection, json_file_name, games_json)
+    print(f"Saved {json_file_name}")
+
+
+def add_game(json_file_name: str, game_json: Dict[str, Any], data_dir: str = "user_data") -> None:
+    """adds (or updates) a single game of a list"""
+    with connect(data_dir) as connection:
+        connection.execute("INSERT OR IGNORE INTO lists (name) VALUES (?)", (json_file_name,))
+        _upsert_game(connection, game_json)
+        connection.execute(
+            "INSERT OR IGNORE INTO memberships (list, game_id) VALUES (?, ?)", (json_file_name, game_json["game_id"])
+        )
+
+
+def remove_game(json_file_name: str, game_id: str, data_dir: str = "user_data") -> bool:
+    """removes a single game of a list, returns whether the list had it"""
+    with connect(data_dir) as connection:
+        cursor = connection.execute("DELETE FROM memberships WHERE list = ? AND game_id = ?", (json_file_name, game_id))
+        _remove_unreferenced_games(connection, [game_id])
+        return cursor.rowcount > 0
+
+
+def remove_json(json_file_name: str, data_dir: str = "user_data") -> None:
+    """remove list and all game covers it uniquely references"""
+    with connect(data_dir) as connection:
+        game_ids = _get_list_game_ids(connection, json_file_name)
+        connection.execute("DELETE FROM lists WHERE name = ?", (json_file_name,))
+        removed_games = set(_remove_unreferenced_games(connection, game_ids))
+    json_interface.remove_covers(removed_games, data_dir=data_dir)
+    print(f"Removed {json_file_name}")
+
+
+def collect_garbage(data_dir: str = "user_data") -> Set[str]:
+    """removes covers of games no list has, returns their IDs"""
+    unreferenced_game_ids = json_interface.get_cover_game_ids(data_dir=data_dir) - set(get_all_game_ids(data_dir))
+    json_interface.remove_covers(unreferenced_game_ids, data_dir=data_dir)
+    return unreferenced_game_ids
+
+
+def get_all_json(data_dir: str = "user_data") -> List[str]:
+    """names of all lists"""
+    with connect(data_dir) as connection:
+        return [name for (name,) in connection.execute("SELECT name FROM lists ORDER BY name")]
+
+
+def get_all_game_ids(data_dir: str = "user_data") -> List[str]:
+    """IDs of all games in all lists"""
+    with connect(data_dir) as connection:
+        return [game_id for (game_id,) in connection.execute("SELECT game_id FROM games")]
+
+
+def load_json_as_games_list(json_file_name: str, data_dir: str = "user_data") -> List[GameDetails]:
+    """loads list, returns sorted List of GameDetails"""
+    with connect(data_dir) as connection:
+        rows = connection.execute(
+            "SELECT games.data FROM memberships JOIN games USING (game_id)"
+            " WHERE memberships.list = ? ORDER BY games.order_name",
+            (json_file_name,),
+        )
+        return [GameDetails.from_json(json.loads(data)) for (data,) in rows]
+
+
+def import_json(data_dir: str = "user_data") -> None:
+    """(re)imports all JSON files of data_dir, replacing the lists with the same names"""
+    with connect(data_dir) as connection:
+        for json_file_name in json_interface.get_all_json(data_dir=data_dir):
+            _save_list(connection, json_file_name, json_interface.load_json(json_file_name, data_dir=data_dir))
+
+
+def export_json(data_dir: str = "user_data", export_dir: Optional[str] = None) -> None:
+    """writes every list back to a JSON file, in export_dir (data_dir, by default)"""
+    for json_file_name in get_all_json(data_dir=data_dir):
+        json_interface.save_json(
+            json_file_name, load_json(json_file_name, data_dir=data_dir), data_dir=export_dir or data_dir
+        )
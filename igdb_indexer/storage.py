@@ -0,0 +1,17 @@
+"""Picks where game lists are stored"""
+
+import os
+import threading
+from types import ModuleType
+
+from igdb_indexer import json_interface, sqlite_interface
+
+STORAGE_ENV_VAR = "IGDB_INDEXER_STORAGE"
+lists_lock = threading.RLock()  # held while a list is read, changed and saved, so changes made meanwhile aren't lost
+
+
+def get_storage() -> ModuleType:
+    """json_interface, or sqlite_interface if IGDB_INDEXER_STORAGE=sqlite, both have the same functions"""
+    if os.environ.get(STORAGE_ENV_VAR, "json") == "sqlite":
+        return sqlite_interface
+    return json_interface
@@ -0,0 +1,139 @@
+"""On-disk cache of resized game covers"""
+
+import math
+import os
+from typing import Callable, List, Optional, Set, Tuple
+
+from PIL import Image, ImageEnhance, PngImagePlugin
+
+from igdb_indexer import profiling
+from igdb_indexer.files import make_temp_file
+
+THUMBNAILS_DIR = ".thumbs"
+DEFAULT_COVER = os.path.join("igdb_indexer", "default.jpg")
+THUMBNAIL_WIDTH_PX = 360  # the width of games in the GUI
+HIDDEN_BRIGHTNESS = 0.1  # brightness of covers of games filtered out by the search bar
+
+
+def get_cover_path(game_id: str, dir: str = "user_data") -> str:
+    """the game's cover, or the default one if it has none"""
+    img_name: str = os.path.join(dir, game_id + ".jpg")
+    if os.path.exists(img_name):
+        return img_name
+    return DEFAULT_COVER
+
+
+def get_thumbnail_path(game_id: str, width: int, dir: str = "user_data") -> str:
+    return os.path.join(dir, THUMBNAILS_DIR, f"{game_id}_{width}.png")
+
+
+def get_source_key(cover_path: str) -> str:
+    """identifies a cover's version, thumbnails made from another version are stale"""
+    cover_stat = os.stat(cover_path)
+    return f"{os.path.basename(cover_path)}:{cover_stat.st_mtime_ns}:{cover_stat.st_size}"
+
+
+def resize_cover(img: Image.Image, width: int) -> Image.Image:
+    ratio: float = width / img.width
+    return img.resize(
+        (math.floor(img.width * ratio), math.floor(img.height * ratio)),
+        Image.Resampling.LANCZOS,
+    )
+
+
+def darken_cover(img: Image.Image) -> Image.Image:
+    return ImageEnhance.Brightness(img).enhance(HIDDEN_BRIGHTNESS)
+
+
+def _read_thumbnail(thumbnail_path: str, source_key: str) -> Optional[Image.Image]:
+    """reads a cached thumbnail, if it exists and was made from the same cover version"""
+    try:
+        thumbnail = Image.open(thumbnail_path)
+    except (OSError, ValueError):
+        return None
+    if thumbnail.info.get("source") != source_key:
+        thumbnail.close()
+        return None
+    try:
+        thumbnail.load()
+    except OSError:
+        return None
+    return thumbnail
+
+
+def _write_thumbnail(thumbnail: Image.Image, thumbnail_path: str, source_key: str) -> None:
+    """writes a thumbnail, atomically so concurrent readers never see half of it"""
+    thumbnails_dir = os.path.dirname(thumbnail_path)
+    os.makedirs(thumbnails_dir, exist_ok=True)
+    png_info = PngImagePlugin.PngInfo()
+    png_info.add_text("source", source_key)
+    temp_fd, temp_path = make_temp_file(thumbnail_path)
+    try:
+        with os.fdopen(temp_fd, "wb") as thumbnail_file:
+            thumbnail.save(thumbnail_file, format="PNG", pnginfo=png_info, compress_level=1)
+        os.replace(temp_path, thumbnail_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def load_thumbnail(game_id: str, width: int, dark: bool = False, dir: str = "user_data") -> Image.Image:
+    """returns the game's cover resized to width (and darkened, if dark).
+    Thumbnails are cached in dir/.thumbs, and re-made when the cover changes.
+    Dark ones are only needed for the few games a filter hides, so they're made from the cached one on demand"""
+    if dark:
+        with load_thumbnail(game_id, width, dir=dir) as thumbnail:
+            return darken_cover(thumbnail)
+
+    cover_path = get_cover_path(game_id, dir)
+    source_key = get_source_key(cover_path)
+    thumbnail_path = get_thumbnail_path(game_id, width, dir)
+    with profiling.timer("read_thumbnail", game_id=game_id):
+        cached_thumbnail = _read_thumbnail(thumbnail_path, source_key)
+    if cached_thumbnail is not None:
+        profiling.count("thumbnail_cache_hits")
+        return cached_thumbnail
+
+    profiling.count("thumbnail_cache_misses")
+    with profiling.timer("generate_thumbnail", game_id=game_id):
+        with Image.open(cover_path) as img:
+            # JPEGs can be decoded straight to a smaller scale, still no smaller than the thumbnail
+            img.draft("RGB", (width, math.ceil(width * img.height / img.width)))
+            thumbnail = resize_cover(img.convert("RGB"), width)
+        try:
+            _write_thumbnail(thumbnail, thumbnail_path, source_key)
+        except OSError as exception:
+            print(f"Failed to cache thumbnail {thumbnail_path}: {exception}")
+    return thumbnail
+
+
+def render_thumbnail(
+    game_id: str, width: int, dark: bool = False, dir: str = "user_data"
+) -> Tuple[Tuple[int, int], bytes]:
+    """load_thumbnail, as a raw RGB buffer, so it can be made in a worker process and handed back to the Tk thread"""
+    with load_thumbnail(game_id, width, dark, dir) as thumbnail:
+        rgb_thumbnail = thumbnail.convert("RGB")
+    return rgb_thumbnail.size, rgb_thumbnail.tobytes()
+
+
+def remove_thumbnails(game_ids: Set[str], dir: str = "user_data") -> None:
+    """removes all cached thumbnails of some games"""
+    thumbnails_dir = os.path.join(dir, THUMBNAILS_DIR)
+    if not os.path.isdir(thumbnails_dir):
+        return
+    for file in os.listdir(thumbnails_dir):
+        if file.split("_")[0] in game_ids:
+            os.remove(os.path.join(thumbnails_dir, file))
+
+
+def warm_thumbnails(
+    game_ids: List[str],
+    width: int,
+    dir: str = "user_data",
+    progress_cb: Optional[Callable[[int], None]] = None,
+) -> None:
+    """pre-generates the thumbnails of games (e.g., of all games in all lists, see get_all_game_ids)"""
+    for index, game_id in enumerate(game_ids):
+        load_thumbnail(game_id, width, dir=dir).close()
+        if progress_cb is not None:
+            progress_cb(index + 1)
@@ -0,0 +1,157 @@
+"""Fetching games of lists from IGDB and saving them, without any GUI, shared by the GUI and the CLI"""
+
+import csv
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from igdb_indexer.igdb_interface import (
+    get_stale_game_ids,
+    get_token_manager,
+    parse_game_reference,
+    query_igdb_batch,
+    query_igdb_slugs,
+    query_igdb_versions,
+)
+from igdb_indexer.journal import RefreshJournal
+from igdb_indexer.storage import get_storage, lists_lock
+
+
+def refresh_list(
+    json_name: str,
+    games_json: Optional[List[Dict[str, Any]]] = None,
+    only_changed: bool = False,
+    progress_cb: Optional[Callable[[int], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    data_dir: str = "user_data",
+) -> Tuple[Dict[str, Any], List[str]]:
+    """re-fetches the games of a list (games_json, or those saved) from IGDB, and saves the list, unless it was
+    removed meanwhile.
+    If only_changed, first asks IGDB which games changed since fetched, and only re-fetches those.
+    Games are journaled as they arrive, so an interrupted (or cancelled) refresh resumes where it stopped.
+    progress_cb is called with the amount of games done. Returns the saved list, which keeps the games added to (or
+    removed from) it meanwhile, and the IDs of the games no longer found in IGDB (kept as they were)"""
+    if games_json is None:
+        games_json = get_storage().load_json(json_name, data_dir=data_dir)["games"]
+
+    # games fetched before an interrupted (or cancelled) update aren't fetched again
+    journal = RefreshJournal(json_name, data_dir=data_dir)
+    fetched_games = journal.load()
+    if len(fetched_games) > 0:
+        print(f"Resuming update of {json_name}, {len(fetched_games)} games were already fetched")
+
+    # fetch all other games of the list, in batches, journaling each as it finishes
+    game_ids = [game_json["game_id"] for game_json in games_json if game_json["game_id"] not in fetched_games]
+    if only_changed:
+        versions = get_token_manager(data_dir).call(lambda access_token: query_igdb_versions(game_ids, access_token))
+        pending_game_ids = set(game_ids)
+        game_ids = get_stale_game_ids(
+            [game_json for game_json in games_json if game_json["game_id"] in pending_game_ids], versions
+        )
+        print(f"{len(game_ids)} games of {json_name} changed in IGDB")
+    fetched_game_ids = set(game_ids)
+    with journal:
+        fetched_games.update(
+            get_token_manager(data_dir).call(
+                lambda access_token: query_igdb_batch(
+                    game_ids,
+                    access_token,
+                    dir=data_dir,
+                    progress_cb=(
+                        None
+                        if progress_cb is None
+                        else lambda progress: progress_cb(len(games_json) - len(game_ids) + progress)
+                    ),
+                    cancel_event=cancel_event,
+                    game_cb=journal.append,
+                )
+            )
+        )
+    missing_game_ids = [
+        game_json["game_id"]
+        for game_json in games_json
+        if game_json["game_id"] in fetched_game_ids and game_json["game_id"] not in fetched_games
+    ]
+    for game_id in missing_game_ids:
+        print(f"Game {game_id} no longer found")
+
+    # update list, as saved now, so games added or removed while fetching (e.g., in the GUI) stay so.
+    # Only then is the journal no longer needed
+    with lists_lock:
+        if json_name not in get_storage().get_all_json(data_dir=data_dir):
+            print(f"{json_name} was removed while updating it, not saving it")
+            refreshed_games_json: Dict[str, Any] = {"games": []}
+        else:
+            saved_games_json = get_storage().load_json(json_name, data_dir=data_dir)
+            refreshed_games_json = {
+                **saved_games_json,
+                "games": [
+                    fetched_games.get(game_json["game_id"], game_json) for game_json in saved_games_json["games"]
+                ],
+            }
+            get_storage().save_json(json_name, refreshed_games_json, data_dir=data_dir)
+    journal.remove()
+    return refreshed_games_json, missing_game_ids
+
+
+def split_game_references(text: str) -> List[str]:
+    """IGDB IDs or igdb.com URLs, as pasted, separated by whitespace, commas or semicolons"""
+    return [reference for reference in re.split(r"[\s,;]+", text) if reference != ""]
+
+
+def read_game_references(path: str) -> List[str]:
+    """IGDB IDs or igdb.com URLs of a file: the first column of a CSV file (header optional), or of a text file
+    as split_game_references splits them"""
+    with open(path, newline="") as references_file:
+        if not path.lower().endswith(".csv"):
+            return split_game_references(references_file.read())
+        references = [row[0].strip() for row in csv.reader(references_file) if len(row) > 0 and row[0].strip() != ""]
+    if len(references) > 0 and parse_game_reference(references[0]) == (None, None):
+        references = references[1:]  # a header
+    return references
+
+
+def add_games(
+    json_name: str,
+    references: List[str],
+    progress_cb: Optional[Callable[[int], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    data_dir: str = "user_data",
+) -> Tuple[Dict[str, Any], List[str]]:
+    """fetches many games (IGDB IDs or igdb.com URLs) from IGDB at once, in batches, and adds them to a list
+    (replacing those it already had), saving it once. progress_cb is called with the amount of games fetched.
+    Returns the list as saved, and the references that failed (neither IDs nor URLs, or not found in IGDB)"""
+    game_ids: Dict[str, str] = {}  # {game_id: reference}, without duplicates
+    slugs: Dict[str, str] = {}  # {slug: reference}
+    failed_references: Set[str] = set()
+    for reference in references:
+        game_id, slug = parse_game_reference(reference)
+        if game_id is not None:
+            game_ids.setdefault(game_id, reference)
+        elif slug is not None:
+            slugs.setdefault(slug, reference)
+        else:
+            failed_references.add(reference)
+
+    token_manager = get_token_manager(data_dir)
+    if len(slugs) > 0:
+        slug_game_ids = token_manager.call(lambda access_token: query_igdb_slugs(list(slugs), access_token))
+        for slug, reference in slugs.items():
+            if slug in slug_game_ids:
+                game_ids.setdefault(slug_game_ids[slug], reference)
+            else:
+                failed_references.add(reference)
+    fetched_games = token_manager.call(
+        lambda access_token: query_igdb_batch(
+            list(game_ids), access_token, dir=data_dir, progress_cb=progress_cb, cancel_event=cancel_event
+        )
+    )
+    failed_references.update(reference for game_id, reference in game_ids.items() if game_id not in fetched_games)
+
+    with lists_lock:
+        games_json = get_storage().load_json(json_name, data_dir=data_dir)
+        if len(fetched_games) > 0:
+            games_json["games"] = [game for game in games_json["games"] if game["game_id"] not in fetched_games]
+            games_json["games"].extend(fetched_games.values())
+            get_storage().save_json(json_name, games_json, data_dir=data_dir)
+    return games_json, list(dict.fromkeys(reference for reference in references if reference in failed_references))
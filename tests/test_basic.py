@@ -1,17 +1,61 @@
+import json
+import multiprocessing
 import os
 import shutil
+import stat
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import pytest
 import requests
-
-from igdb_indexer.game_details import GameDetails
-from igdb_indexer.igdb_interface import get_auth_token, query_igdb
+from PIL import Image
+
+from igdb_indexer import json_interface, profiling, sqlite_interface
+from igdb_indexer.catalog import GameCatalog
+from igdb_indexer.game_details import STRICT_ENV_VAR, GameDetails
+from igdb_indexer.igdb_interface import (
+    DEFAULT_GAME_FIELDS,
+    GAME_FIELDS_ENV_VAR,
+    IGDB_PAGE_LIMIT,
+    CoverStore,
+    IgdbClient,
+    IgdbScheduler,
+    TokenBucket,
+    TokenManager,
+    UnauthorizedError,
+    get_auth_token,
+    get_client,
+    get_cover_store,
+    get_stale_game_ids,
+    paginate,
+    parse_game_json,
+    parse_game_reference,
+    post_igdb,
+    query_igdb,
+    query_igdb_batch,
+    query_igdb_slugs,
+    query_igdb_versions,
+)
+from igdb_indexer.journal import JOURNAL_MAX_AGE_S, RefreshJournal, get_journal_path
 from igdb_indexer.json_interface import (
+    count_games,
+    get_all_game_ids,
     get_all_json,
+    load_json,
     load_json_as_games_list,
     remove_json,
     save_json,
 )
+from igdb_indexer.search_index import SearchIndex, normalize
+from igdb_indexer.storage import STORAGE_ENV_VAR, get_storage
+from igdb_indexer.thumbnails import (
+    get_thumbnail_path,
+    load_thumbnail,
+    render_thumbnail,
+    warm_thumbnails,
+)
+from igdb_indexer.updates import read_game_references, split_game_references
 
 
 @pytest.fixture
@@ -51,7 +95,7 @@ def sample_dir(sample_games):
     yield None
 
 
-def test_json_interface(sample_dir):
+def test_json_interface(sample_dir, monkeypatch):
     data_dir: str = "test_data"
 
     # finds JSON files
@@ -70,6 +114,19 @@ def test_json_interface(sample_dir):
     assert len(games1) == 55
     assert len(games_empty) == 0  # doesn't exist, doesn't crash
 
+    # can count games without loading them
+    assert count_games(list_of_json[0], data_dir=data_dir) == 60
+    assert count_games("random_file.json", data_dir=data_dir) == 0
+
+    # counted when saved, unless the file changed since
+    with monkeypatch.context() as patch:
+        patch.setattr(json_interface, "load_json", None)
+        assert count_games(list_of_json[1], data_dir=data_dir) == 55
+    with open(os.path.join(data_dir, list_of_json[1]), "w") as json_file:
+        json.dump({"games": [game.to_json() for game in games1[:10]]}, json_file)
+    assert count_games(list_of_json[1], data_dir=data_dir) == 10
+    save_json(list_of_json[1], {"games": [game.to_json() for game in games1]}, data_dir=data_dir)
+
     # loaded games are valid
     for index, game in enumerate(games0):
         assert game.game_id == f"{index:04d}"
@@ -98,7 +155,7 @@ def test_json_interface(sample_dir):
 
 
 def test_igdb_access_token(monkeypatch):
-    # mock the requests.post response
+    # mock the client.post response
     post_url: str = None
 
     class MockPostResponse:
@@ -111,7 +168,7 @@ def test_igdb_access_token(monkeypatch):
         post_url = url
         return MockPostResponse()
 
-    monkeypatch.setattr(requests, "post", mock_post)
+    monkeypatch.setattr(get_client(), "post", mock_post)
 
     # make the token fetch
     monkeypatch.setenv("CLIENT_ID", "aaa")
@@ -124,11 +181,13 @@ def test_igdb_access_token(monkeypatch):
 
 
 def test_igdb_query(monkeypatch, empty_dir):
-    # mock the requests.post response for the game data
+    # mock the client.post response for the game data
     post_url: str = None
     post_kwargs = None
 
     class MockPostResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return [
@@ -145,20 +204,29 @@ def test_igdb_query(monkeypatch, empty_dir):
         post_kwargs = kwargs
         return MockPostResponse()
 
-    monkeypatch.setattr(requests, "post", mock_post)
+    monkeypatch.setattr(get_client(), "post", mock_post)
 
-    # mock the requests.get response for the cover image
+    # mock the client.get response for the cover image
     get_url: str = None
 
     class MockGetResponse:
-        content = b"\xff\xff\xff\xff"  # random bytes
+        status_code = 200
+        headers = {"ETag": '"abc"'}
+
+        @staticmethod
+        def iter_content(_chunk_size):
+            return [b"\xff\xff", b"\xff\xff"]  # random bytes
+
+        @staticmethod
+        def close():
+            pass
 
-    def mock_get(url: str):
+    def mock_get(url: str, **kwargs):
         nonlocal get_url
         get_url = url
         return MockGetResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(get_client(), "get", mock_get)
 
     # make the query
     monkeypatch.setenv("CLIENT_ID", "aaa")
@@ -166,7 +234,7 @@ def test_igdb_query(monkeypatch, empty_dir):
 
     # check game data correct and cover image created
     assert post_url == "https://api.igdb.com/v4/games"
-    assert post_kwargs["data"] == "fields *,release_dates.*,cover.*; where id = 123;"
+    assert post_kwargs["data"] == "fields name,release_dates.y,cover.url,updated_at,checksum; where id = 123;"
     assert post_kwargs["headers"] == {
         "Client-ID": "aaa",
         "Authorization": "Bearer some_access_token",
@@ -179,3 +247,728 @@ def test_igdb_query(monkeypatch, empty_dir):
         "year": 2025,
     }
     assert os.path.isfile("test_data/123.jpg")
+    with open("test_data/123.jpg", "rb") as cover_file:
+        assert cover_file.read() == b"\xff\xff\xff\xff"
+
+    # queried fields can be configured
+    monkeypatch.setenv(GAME_FIELDS_ENV_VAR, "*,release_dates.*,cover.*")
+    query_igdb("123", "some_access_token", "test_data")
+    assert post_kwargs["data"] == "fields *,release_dates.*,cover.*; where id = 123;"
+    query_igdb("123", "some_access_token", "test_data", fields="name")
+    assert post_kwargs["data"] == "fields name; where id = 123;"
+
+
+def test_igdb_query_batch(monkeypatch, empty_dir):
+    # mock the client.post response, IGDB knows all games except those with IDs multiple of 7
+    post_data = []
+
+    class MockPostResponse:
+        status_code = 200
+
+        def __init__(self, game_ids):
+            self.game_ids = game_ids
+
+        def json(self):
+            return [
+                {"id": int(game_id), "name": "game " + game_id, "release_dates": [{"y": 2000}]}
+                for game_id in self.game_ids
+                if int(game_id) % 7 != 0
+            ]
+
+    def mock_post(url: str, **kwargs):
+        post_data.append(kwargs["data"])
+        game_ids = kwargs["data"].split("(")[1].split(")")[0].split(",")
+        return MockPostResponse(game_ids)
+
+    monkeypatch.setattr(get_client(), "post", mock_post)
+
+    # make the query
+    monkeypatch.setenv("CLIENT_ID", "aaa")
+    game_ids = [str(index) for index in range(1, IGDB_PAGE_LIMIT + 101)]
+    progress = []
+    finished_games = []
+    response = query_igdb_batch(
+        game_ids, "some_access_token", "test_data", progress_cb=progress.append, game_cb=finished_games.append
+    )
+
+    # two requests were made, one per page of games, possibly out of order
+    assert len(post_data) == 2
+    post_data.sort(key=len, reverse=True)
+    assert post_data[0].startswith(f"fields {DEFAULT_GAME_FIELDS}; where id = (1,2,3,")
+    assert post_data[0].endswith(f",{IGDB_PAGE_LIMIT}); limit {IGDB_PAGE_LIMIT};")
+    assert progress in ([IGDB_PAGE_LIMIT, IGDB_PAGE_LIMIT + 100], [100, IGDB_PAGE_LIMIT + 100])
+
+    # all games were parsed, except the missing ones
+    assert len(response) == len([game_id for game_id in game_ids if int(game_id) % 7 != 0])
+    assert "7" not in response
+    assert response["12"] == {"game_id": "12", "name": "game 12", "order_name": "game 2000", "year": 2000}
+    assert sorted(finished_games, key=lambda game: int(game["game_id"])) == sorted(
+        response.values(), key=lambda game: int(game["game_id"])
+    )
+
+
+def test_igdb_token_manager(monkeypatch, empty_dir):
+    # mock the client.post response, every token is different
+    tokens_issued = 0
+
+    class MockPostResponse:
+        @staticmethod
+        def json():
+            return {"access_token": f"token{tokens_issued}", "expires_in": 5000000, "token_type": "bearer"}
+
+    def mock_post(url: str):
+        nonlocal tokens_issued
+        tokens_issued += 1
+        return MockPostResponse()
+
+    monkeypatch.setattr(get_client(), "post", mock_post)
+    monkeypatch.setenv("CLIENT_ID", "aaa")
+    monkeypatch.setenv("CLIENT_SECRET", "bbb")
+
+    # token is fetched once, then cached
+    token_file = os.path.join("test_data", ".auth_token")
+    token_manager = TokenManager(token_file)
+    assert token_manager.get_token() == "token1"
+    assert token_manager.get_token() == "token1"
+    assert tokens_issued == 1
+
+    # cached token is reused across instances
+    assert TokenManager(token_file).get_token() == "token1"
+    assert tokens_issued == 1
+
+    # rejected token is refreshed and the call retried
+    used_tokens = []
+
+    def mock_query(access_token: str) -> str:
+        used_tokens.append(access_token)
+        if access_token == "token1":
+            raise UnauthorizedError()
+        return "result"
+
+    assert token_manager.call(mock_query) == "result"
+    assert used_tokens == ["token1", "token2"]
+    assert tokens_issued == 2
+
+    # tokens close to expiry are refreshed
+    token_manager.expires_at = 0
+    assert token_manager.get_token() == "token3"
+
+    # tokens from another client aren't reused
+    monkeypatch.setenv("CLIENT_ID", "ccc")
+    assert TokenManager(token_file).get_token() == "token4"
+
+
+def test_igdb_client(monkeypatch):
+    client = IgdbClient(timeout=(1, 2), retries=5)
+
+    # requests reuse the same session, with a default timeout
+    session_kwargs = None
+
+    def mock_session_post(url: str, **kwargs):
+        nonlocal session_kwargs
+        session_kwargs = kwargs
+        return None
+
+    monkeypatch.setattr(client.session, "post", mock_session_post)
+    client.post("https://api.igdb.com/v4/games", data="abc")
+    assert session_kwargs == {"data": "abc", "timeout": (1, 2)}
+    client.post("https://api.igdb.com/v4/games", data="abc", timeout=10)
+    assert session_kwargs == {"data": "abc", "timeout": 10}
+
+    # rate limits and server errors are retried
+    retry = client.session.get_adapter("https://api.igdb.com").max_retries
+    assert retry.total == 5
+    assert 429 in retry.status_forcelist
+    assert 503 in retry.status_forcelist
+    assert retry.is_retry("POST", 429)
+
+    # errors IGDB still answers with once retries run out (or bad queries) are raised, not parsed as games
+    class MockErrorResponse:
+        status_code = 400
+        text = "Syntax Error"
+
+        def json(self):
+            return {"title": "Syntax Error", "status": 400}
+
+    monkeypatch.setattr(get_client(), "post", lambda url, **kwargs: MockErrorResponse())
+    monkeypatch.setenv("CLIENT_ID", "aaa")
+    with pytest.raises(requests.HTTPError, match="HTTP 400: Syntax Error"):
+        post_igdb("https://api.igdb.com/v4/games", "fields nope;", "some_access_token")
+    with pytest.raises(requests.HTTPError):
+        query_igdb_versions(["1", "2"], "some_access_token")
+
+
+def test_igdb_scheduler():
+    # token bucket spaces out acquisitions
+    token_bucket = TokenBucket(rate=50)
+    start = time.monotonic()
+    for _ in range(6):
+        token_bucket.acquire()
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+    # scheduler never runs more than max_workers tasks at once, returns results in order
+    scheduler = IgdbScheduler(max_workers=3)
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def task(item: int) -> int:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return item * 2
+
+    progress = []
+    assert scheduler.map(task, range(20), progress_cb=progress.append) == [item * 2 for item in range(20)]
+    assert max_running == 3
+    assert progress == list(range(1, 21))
+    scheduler.shutdown()
+
+
+def test_cover_store(monkeypatch, empty_dir):
+    # mock the client.get response, the server honours If-None-Match
+    get_requests = []
+
+    class MockGetResponse:
+        def __init__(self, status_code: int, body: bytes):
+            self.status_code = status_code
+            self.body = body
+            self.headers = {"ETag": '"' + body.decode() + '"'}
+
+        def iter_content(self, _chunk_size):
+            return [self.body]
+
+        def close(self):
+            pass
+
+    def mock_get(url: str, **kwargs):
+        get_requests.append((url, kwargs["headers"]))
+        body = url.split("/")[-1].encode()
+        if kwargs["headers"].get("If-None-Match") == '"' + body.decode() + '"':
+            return MockGetResponse(304, b"")
+        return MockGetResponse(200, body)
+
+    monkeypatch.setattr(get_client(), "get", mock_get)
+
+    # first download writes the cover
+    cover_store = CoverStore("test_data")
+    assert cover_store.fetch("1", "https://images/v1")
+    with open("test_data/1.jpg", "rb") as cover_file:
+        assert cover_file.read() == b"v1"
+    assert len(get_requests) == 1
+    cover_store.save()
+
+    # same URL costs nothing, even from a fresh store
+    cover_store = CoverStore("test_data")
+    assert not cover_store.fetch("1", "https://images/v1")
+    assert len(get_requests) == 1
+
+    # revalidating makes a conditional GET, which doesn't rewrite the cover
+    assert not cover_store.fetch("1", "https://images/v1", revalidate=True)
+    assert get_requests[-1][1] == {"If-None-Match": '"v1"'}
+
+    # a new URL downloads the new cover
+    assert cover_store.fetch("1", "https://images/v2")
+    assert get_requests[-1][1] == {}
+    with open("test_data/1.jpg", "rb") as cover_file:
+        assert cover_file.read() == b"v2"
+
+    # stores of the same dir don't overwrite each other's entries
+    other_cover_store = CoverStore("test_data")
+    assert other_cover_store.fetch("2", "https://images/v1")
+    cover_store.save()
+    other_cover_store.save()
+    assert sorted(CoverStore("test_data").entries) == ["1", "2"]
+    assert CoverStore("test_data").entries["1"]["url"] == "https://images/v2"
+    assert get_cover_store("test_data") is get_cover_store("test_data")
+
+    # no temp files are left behind
+    assert sorted(os.listdir("test_data")) == [".covers", "1.jpg", "2.jpg"]
+
+
+def test_thumbnails(sample_dir):
+    data_dir: str = "test_data"
+
+    # thumbnails are resized covers, cached on disk
+    thumbnail = load_thumbnail("0000", 100, dir=data_dir)
+    assert thumbnail.width == 100
+    thumbnail_path = get_thumbnail_path("0000", 100, dir=data_dir)
+    assert os.path.isfile(thumbnail_path)
+    cached_mtime = os.stat(thumbnail_path).st_mtime_ns
+
+    # cached thumbnails are reused
+    assert load_thumbnail("0000", 100, dir=data_dir).size == thumbnail.size
+    assert os.stat(thumbnail_path).st_mtime_ns == cached_mtime
+
+    # dark thumbnails are darker, and made on demand
+    dark_thumbnail = load_thumbnail("0000", 100, dark=True, dir=data_dir)
+    assert dark_thumbnail.size == thumbnail.size
+    assert sum(dark_thumbnail.convert("L").getdata()) < sum(thumbnail.convert("L").getdata()) / 5
+    assert os.listdir(os.path.dirname(thumbnail_path)) == [os.path.basename(thumbnail_path)]
+
+    # thumbnails are re-made when the cover changes
+    Image.new("RGB", (50, 100), "red").save(os.path.join(data_dir, "0000.jpg"))
+    assert load_thumbnail("0000", 100, dir=data_dir).size == (100, 200)
+    assert load_thumbnail("0000", 100, dark=True, dir=data_dir).size == (100, 200)
+
+    # thumbnails can be rendered in other processes, as raw RGB
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as executor:
+        size, rgb_data = executor.submit(render_thumbnail, "0001", 100, True, data_dir).result()
+    assert Image.frombytes("RGB", size, rgb_data).size == load_thumbnail("0001", 100, dir=data_dir).size
+    assert os.path.isfile(get_thumbnail_path("0001", 100, dir=data_dir))
+
+    # games without cover get the default one
+    assert load_thumbnail("0095", 100, dir=data_dir).width == 100
+
+    # thumbnails can be pre-generated for all lists
+    game_ids = get_all_game_ids(data_dir=data_dir)
+    assert len(game_ids) == 100
+    progress = []
+    warm_thumbnails(game_ids, 50, dir=data_dir, progress_cb=progress.append)
+    assert progress[-1] == 100
+    for game_id in game_ids:
+        assert os.path.isfile(get_thumbnail_path(game_id, 50, dir=data_dir))
+
+    # thumbnails are removed along with the covers
+    remove_json("file0.json", data_dir=data_dir)
+    assert not os.path.isfile(get_thumbnail_path("0000", 50, dir=data_dir))
+    assert os.path.isfile(get_thumbnail_path("0050", 50, dir=data_dir))
+
+
+def test_search_index():
+    games = [
+        GameDetails(game_id="1", name="Pokémon Red", order_name="Pokemon 1 Red", year=1996),
+        GameDetails(game_id="2", name="Pokémon Blue", order_name="Pokemon 1 Blue", year=1996),
+        GameDetails(game_id="3", name="Zelda", order_name="The Legend of Zelda", year=1986),
+        GameDetails(game_id="4", name="Ōkami", order_name="Okami", year=2006),
+    ]
+    search_index = SearchIndex(games)
+    assert normalize("PoKéMoN") == "pokemon"
+
+    # case- and accent-insensitive, on names and order names
+    assert search_index.search("") == {"1", "2", "3", "4"}
+    assert search_index.search("POKEMON") == {"1", "2"}
+    assert search_index.search("pokémon b") == {"2"}
+    assert search_index.search("legend") == {"3"}
+    assert search_index.search("oka") == {"4"}
+    assert search_index.search("e") == {"1", "2", "3"}
+    assert search_index.search("xyz") == set()
+
+    # narrowing down and widening queries, matches never span name and order name
+    assert search_index.search("l") == {"2", "3"}
+    assert search_index.search("le") == {"3"}
+    assert search_index.search("leg") == {"3"}
+    assert search_index.search("l") == {"2", "3"}
+    assert search_index.search("redpokemon") == set()
+
+    # games can be added, replaced and removed
+    search_index.add(GameDetails(game_id="5", name="Pokémon Gold", order_name="Pokemon 2 Gold", year=1999))
+    assert search_index.search("pokemon") == {"1", "2", "5"}
+    search_index.add(GameDetails(game_id="5", name="Pokémon Silver", order_name="Pokemon 2 Silver", year=1999))
+    assert search_index.search("gold") == set()
+    search_index.remove("1")
+    search_index.remove("1")
+    assert search_index.search("pokemon") == {"2", "5"}
+    assert all("1" not in game_ids for game_ids in search_index.postings.values())
+
+
+def test_catalog(sample_dir):
+    data_dir: str = "test_data"
+    catalog = GameCatalog()
+
+    # games shared by both lists are kept once, and lists are sorted by order_name
+    file0_ids = catalog.load_list("file0.json", data_dir=data_dir)
+    assert file0_ids == [game.game_id for game in load_json_as_games_list("file0.json", data_dir=data_dir)]
+    shared_game = catalog.games["0050"]
+    file1_ids = catalog.load_list("file1.json", data_dir=data_dir)
+    assert len(file1_ids) == 55
+    assert len(catalog.games) == 100
+    assert catalog.games["0050"] is shared_game
+    assert catalog.get_games("file1.json") == load_json_as_games_list("file1.json", data_dir=data_dir)
+
+    # search tells which lists have matching games
+    results = catalog.search("NAME5")
+    assert list(results) == ["file0.json", "file1.json"]
+    assert [game.game_id for game in results["file0.json"]] == ["0005"] + [f"{index:04d}" for index in range(50, 60)]
+    assert [game.game_id for game in results["file1.json"]][:2] == ["0050", "0051"]
+    assert len(results["file1.json"]) == 10
+    assert list(catalog.search("name99")) == ["file1.json"]
+    assert catalog.search("name100") == {}
+
+    # reloading a changed list only replaces what changed
+    games_json = load_json("file1.json", data_dir=data_dir)
+    games_json["games"] = [game for game in games_json["games"] if game["game_id"] != "0099"]
+    games_json["games"][-1]["name"] = "renamed"
+    catalog.add_list("file1.json", games_json)
+    assert "0099" not in catalog.games
+    assert catalog.games["0050"] is shared_game
+    assert list(catalog.search("renamed")) == ["file1.json"]
+
+    # single games are inserted at their sorted position, and moved if their order_name changes
+    new_game = {"game_id": "0200", "name": "new", "order_name": "order_name50_", "year": 2200}
+    assert catalog.add_game("file1.json", new_game) == 6
+    assert catalog.lists["file1.json"][5:8] == ["0050", "0200", "0051"]
+    assert catalog.add_game("file1.json", dict(new_game, order_name="order_name46_")) == 2
+    assert catalog.lists["file1.json"].count("0200") == 1
+    assert catalog.games["0200"].order_name == "order_name46_"
+    assert catalog.remove_game("file1.json", "0200") == 2
+    assert catalog.remove_game("file1.json", "0200") == -1
+    assert "0200" not in catalog.games
+
+    # games only in a removed list are dropped
+    catalog.remove_list("file1.json")
+    assert len(catalog.games) == 60
+    assert catalog.games["0050"] is shared_game
+    assert list(catalog.search("name5")) == ["file0.json"]
+    catalog.remove_list("file0.json")
+    assert catalog.games == {} and catalog.game_lists == {} and catalog.search_index.postings == {}
+
+
+def test_sqlite_interface(sample_dir, monkeypatch):
+    data_dir: str = "test_data"
+
+    # JSON files are imported the first time
+    assert sqlite_interface.get_all_json(data_dir=data_dir) == ["file0.json", "file1.json"]
+    assert os.path.exists(os.path.join(data_dir, sqlite_interface.DATABASE_FILE))
+    for json_file_name in ["file0.json", "file1.json"]:
+        assert sqlite_interface.load_json(json_file_name, data_dir=data_dir) == load_json(
+            json_file_name, data_dir=data_dir
+        )
+        assert sqlite_interface.load_json_as_games_list(json_file_name, data_dir=data_dir) == load_json_as_games_list(
+            json_file_name, data_dir=data_dir
+        )
+    assert sqlite_interface.count_games("file0.json", data_dir=data_dir) == 60
+    assert sqlite_interface.count_games("random_file.json", data_dir=data_dir) == 0
+    assert sqlite_interface.load_json("random_file.json", data_dir=data_dir) == {"games": []}
+    assert sorted(sqlite_interface.get_all_game_ids(data_dir=data_dir)) == [f"{index:04d}" for index in range(100)]
+
+    # single games are added and removed, games are shared by lists
+    new_game = {"game_id": "0100", "name": "new", "order_name": "new", "year": 2100}
+    sqlite_interface.add_game("file2.json", new_game, data_dir=data_dir)
+    sqlite_interface.add_game("file2.json", load_json("file0.json", data_dir=data_dir)["games"][0], data_dir=data_dir)
+    assert sqlite_interface.get_all_json(data_dir=data_dir) == ["file0.json", "file1.json", "file2.json"]
+    assert [game.game_id for game in sqlite_interface.load_json_as_games_list("file2.json", data_dir=data_dir)] == [
+        "0100",
+        "0000",
+    ]
+    assert sqlite_interface.remove_game("file2.json", "0100", data_dir=data_dir)
+    assert not sqlite_interface.remove_game("file2.json", "0100", data_dir=data_dir)
+    assert "0100" not in sqlite_interface.get_all_game_ids(data_dir=data_dir)
+    renamed_game = dict(new_game, game_id="0000", name="renamed")
+    sqlite_interface.add_game("file2.json", renamed_game, data_dir=data_dir)
+    assert sqlite_interface.load_json("file0.json", data_dir=data_dir)["games"][0] == renamed_game
+
+    # lists are saved and exported as JSON files
+    sqlite_interface.save_json("file2.json", {"games": [new_game]}, data_dir=data_dir)
+    assert sqlite_interface.load_json("file2.json", data_dir=data_dir) == {"games": [new_game]}
+    sqlite_interface.export_json(data_dir=data_dir)
+    assert load_json("file2.json", data_dir=data_dir) == {"games": [new_game]}
+    assert load_json("file0.json", data_dir=data_dir)["games"][0] == renamed_game
+    os.remove(os.path.join(data_dir, "file2.json"))
+
+    # removing lists removes the covers only they have
+    sqlite_interface.remove_json("file2.json", data_dir=data_dir)
+    sqlite_interface.remove_json("file0.json", data_dir=data_dir)
+    assert sorted(file for file in os.listdir(data_dir) if file.endswith(".jpg")) == [
+        f"{index:04d}.jpg" for index in range(45, 90)
+    ]
+    assert sqlite_interface.get_all_json(data_dir=data_dir) == ["file1.json"]
+    assert len(sqlite_interface.get_all_game_ids(data_dir=data_dir)) == 55
+
+    # the storage backend is picked by an environment variable
+    assert get_storage() is json_interface
+    monkeypatch.setenv(STORAGE_ENV_VAR, "sqlite")
+    assert get_storage() is sqlite_interface
+
+
+def test_json_references(sample_dir, monkeypatch):
+    data_dir: str = "test_data"
+
+    # saving lists keeps track of which lists have each game
+    references = json_interface.load_references(data_dir=data_dir)
+    assert references == json_interface.rebuild_references(data_dir=data_dir)
+    assert references["0000"] == {"file0.json"}
+    assert references["0050"] == {"file0.json", "file1.json"}
+    assert references["0099"] == {"file1.json"}
+    references_path = os.path.join(data_dir, json_interface.REFERENCES_FILE)
+    with open(references_path) as references_file:
+        saved_references = references_file.read()
+    json_interface.add_game(
+        "file2.json", {"game_id": "0100", "name": "new", "order_name": "new", "year": 2100}, data_dir
+    )
+    json_interface.add_game("file2.json", load_json("file0.json", data_dir=data_dir)["games"][0], data_dir=data_dir)
+    json_interface.remove_game("file2.json", "0100", data_dir=data_dir)
+    assert json_interface.load_references(data_dir=data_dir)["0000"] == {"file0.json", "file2.json"}
+    assert "0100" not in json_interface.load_references(data_dir=data_dir)
+    assert json_interface.verify_references(data_dir=data_dir)
+
+    # saving a list only logs the games it gained and lost, the references aren't rewritten
+    with open(references_path) as references_file:
+        assert references_file.read() == saved_references
+    with open(os.path.join(data_dir, json_interface.REFERENCES_LOG_FILE)) as references_log_file:
+        assert [json.loads(line) for line in references_log_file][-1] == {
+            "list": "file2.json",
+            "added": [],
+            "removed": ["0100"],
+        }
+
+    # removing a list only reads that list, even if it has games no other list has, whose covers are removed
+    json_interface.add_game(
+        "file3.json", {"game_id": "0200", "name": "own", "order_name": "own", "year": 2100}, data_dir
+    )
+    shutil.copyfile(os.path.join("igdb_indexer", "default.jpg"), os.path.join(data_dir, "0200.jpg"))
+    loaded_jsons = []
+    original_load_json = json_interface.load_json
+
+    def mock_load_json(json_file_name, data_dir):
+        loaded_jsons.append(json_file_name)
+        return original_load_json(json_file_name, data_dir=data_dir)
+
+    monkeypatch.setattr(json_interface, "load_json", mock_load_json)
+    remove_json("file2.json", data_dir=data_dir)
+    remove_json("file3.json", data_dir=data_dir)
+    assert loaded_jsons == ["file2.json", "file3.json"]
+    assert os.path.exists(os.path.join(data_dir, "0000.jpg"))
+    assert not os.path.exists(os.path.join(data_dir, "0200.jpg"))
+    monkeypatch.undo()
+
+    # references that drifted from the lists are rebuilt, and covers no list has are removed
+    with open(os.path.join(data_dir, json_interface.REFERENCES_FILE), "w") as references_file:
+        json.dump({"0000": ["file0.json"]}, references_file)
+    shutil.copyfile(os.path.join("igdb_indexer", "default.jpg"), os.path.join(data_dir, "0500.jpg"))
+    assert not json_interface.verify_references(data_dir=data_dir)
+    assert json_interface.collect_garbage(data_dir=data_dir) == {"0500"}
+    assert json_interface.verify_references(data_dir=data_dir)
+    assert not os.path.exists(os.path.join(data_dir, "0500.jpg"))
+    assert os.path.exists(os.path.join(data_dir, "0089.jpg"))
+
+
+def test_refresh_journal(empty_dir, monkeypatch):
+    data_dir: str = "test_data"
+    games = [{"game_id": str(index), "name": f"game {index}", "order_name": "game", "year": 2000} for index in range(3)]
+
+    # games are journaled as they arrive, and read back by the next update
+    with RefreshJournal("file0.json", data_dir=data_dir) as journal:
+        assert journal.load() == {}
+        journal.append(games[0])
+        journal.append(games[1])
+    with open(get_journal_path("file0.json", data_dir), "a") as journal_file:
+        journal_file.write('{"game_id": "2", "na')  # the app died while writing
+    journal = RefreshJournal("file0.json", data_dir=data_dir)
+    assert journal.load() == {"0": games[0], "1": games[1]}
+    journal.append(games[2])
+    assert journal.load() == {"0": games[0], "1": games[1], "2": games[2]}
+    assert get_all_json(data_dir) == []
+
+    # the journal is removed once the update is saved
+    journal.remove()
+    assert os.listdir(data_dir) == []
+
+    # journals of updates started too long ago (or before they had a start time) are discarded
+    journal.append(games[0])
+    journal.close()
+    original_time = time.time
+    monkeypatch.setattr(time, "time", lambda: original_time() + JOURNAL_MAX_AGE_S + 1)
+    assert journal.load() == {}
+    assert os.listdir(data_dir) == []
+    monkeypatch.undo()
+    with open(get_journal_path("file0.json", data_dir), "w") as journal_file:
+        journal_file.write(json.dumps(games[0]) + "\n")
+    assert journal.load() == {}
+    assert os.listdir(data_dir) == []
+
+
+def test_save_json_atomic(empty_dir, monkeypatch):
+    data_dir: str = "test_data"
+    games_json = {"games": [{"game_id": "0", "name": "game", "order_name": "game", "year": 2000}]}
+    save_json("file0.json", games_json, data_dir=data_dir)
+
+    # a failed save leaves the previous file untouched, and no temporary files behind
+    def failing_dump(*_args, **_kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(json, "dump", failing_dump)
+    with pytest.raises(OSError):
+        save_json("file0.json", {"games": []}, data_dir=data_dir)
+    monkeypatch.undo()
+    assert load_json("file0.json", data_dir=data_dir) == games_json
+    assert sorted(os.listdir(data_dir)) == [json_interface.COUNTS_FILE, json_interface.REFERENCES_FILE, "file0.json"]
+
+    # new files get the usual mode, not the temporary files' owner-only one, and saving keeps a file's mode
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(os.path.join(data_dir, "file0.json")).st_mode) == 0o666 & ~umask
+    os.chmod(os.path.join(data_dir, "file0.json"), 0o640)
+    save_json("file0.json", games_json, data_dir=data_dir)
+    assert stat.S_IMODE(os.stat(os.path.join(data_dir, "file0.json")).st_mode) == 0o640
+
+
+def test_igdb_query_versions(monkeypatch):
+    # mock the client.post response, every game has a version, except those with IDs multiple of 7 aren't in IGDB
+    post_data = []
+
+    class MockPostResponse:
+        status_code = 200
+
+        def __init__(self, game_ids):
+            self.game_ids = game_ids
+
+        def json(self):
+            return [
+                {"id": int(game_id), "updated_at": 1000 + int(game_id), "checksum": "c" + game_id}
+                for game_id in self.game_ids
+                if int(game_id) % 7 != 0
+            ]
+
+    def mock_post(url: str, **kwargs):
+        post_data.append(kwargs["data"])
+        return MockPostResponse(kwargs["data"].split("(")[1].split(")")[0].split(","))
+
+    monkeypatch.setattr(get_client(), "post", mock_post)
+    monkeypatch.setenv("CLIENT_ID", "aaa")
+
+    # only versions are asked for, in pages
+    game_ids = [str(index) for index in range(1, IGDB_PAGE_LIMIT + 11)]
+    versions = query_igdb_versions(game_ids, "some_access_token")
+    assert len(post_data) == 2
+    assert all(data.startswith("fields updated_at,checksum; where id = (") for data in post_data)
+    assert versions["12"] == {"updated_at": 1012, "checksum": "c12"}
+    assert "7" not in versions
+
+    # games are stale if their checksum (or, without one, updated_at) changed, or was never stored
+    games_json = [
+        {"game_id": "1", "checksum": "c1", "updated_at": 0},  # same checksum
+        {"game_id": "2", "checksum": "old"},  # different checksum
+        {"game_id": "3", "updated_at": 1003},  # same updated_at
+        {"game_id": "4", "updated_at": 4},  # different updated_at
+        {"game_id": "5"},  # no version stored
+        {"game_id": "7"},  # not in IGDB
+    ]
+    assert get_stale_game_ids(games_json, versions) == ["2", "4", "5"]
+
+    # versions are parsed and kept with games
+    game_json, _cover_url = parse_game_json("1", {"id": 1, "name": "game", "updated_at": 1001, "checksum": "c1"})
+    assert game_json["updated_at"] == 1001 and game_json["checksum"] == "c1"
+    assert GameDetails(**game_json).to_json() == game_json
+
+
+def test_profiling(sample_dir):
+    data_dir: str = "test_data"
+    profile_dir = os.path.join(data_dir, "profiles")
+    assert profiling.parse_modes("") == set()
+    assert profiling.parse_modes("off") == set()
+    assert profiling.parse_modes("1") == {"summary"}
+    assert profiling.parse_modes("trace, cprofile") == {"trace", "cprofile"}
+
+    # off by default, timers and counters do nothing
+    assert profiling.start_session(set(), dir=profile_dir) is None
+    with profiling.timer("load_json") as trace_args:
+        trace_args["games"] = 1
+    profiling.count("games")
+    assert profiling.get_profiler() is None
+
+    profiler = profiling.start_session({"summary", "trace"}, dir=profile_dir)
+    try:
+        load_json("file0.json", data_dir=data_dir)
+        load_json("file1.json", data_dir=data_dir)
+        load_thumbnail("0000", 100, dir=data_dir).close()
+        load_thumbnail("0000", 100, dir=data_dir).close()
+        summary = profiler.summary()
+        assert summary["timers"]["load_json"]["count"] == 2
+        assert 0 < summary["timers"]["load_json"]["p50_s"] <= summary["timers"]["load_json"]["p95_s"]
+        assert summary["counters"] == {"thumbnail_cache_hits": 1, "thumbnail_cache_misses": 1}
+    finally:
+        profiling.end_session()
+    assert profiling.get_profiler() is None
+
+    # the session's summary and Chrome trace are saved
+    files = sorted(os.listdir(profile_dir))
+    assert files == [profiler.session_name + ".json", profiler.session_name + ".trace.json"]
+    with open(os.path.join(profile_dir, files[1])) as trace_file:
+        trace_events = json.load(trace_file)["traceEvents"]
+    assert [event["args"] for event in trace_events if event["name"] == "load_json"] == [
+        {"list": "file0.json", "games": 60},
+        {"list": "file1.json", "games": 55},
+    ]
+
+    assert profiling.summarize([]) == {"count": 0, "total_s": 0, "mean_s": 0, "p50_s": 0, "p95_s": 0, "max_s": 0}
+    assert profiling.summarize([float(value) for value in range(1, 101)])["p95_s"] == 96
+
+
+def test_game_references(empty_dir):
+    data_dir: str = "test_data"
+    assert parse_game_reference(" 123\r") == ("123", None)
+    assert parse_game_reference("https://www.igdb.com/games/World-of-Warcraft") == (None, "world-of-warcraft")
+    assert parse_game_reference("igdb.com/games/zelda/") == (None, "zelda")
+    assert parse_game_reference("zelda") == (None, None)
+
+    references = ["123", "https://www.igdb.com/games/zelda", "456"]
+    assert split_game_references("123\nhttps://www.igdb.com/games/zelda, 456;;") == references
+
+    # CSV files have games in their first column, after an optional header
+    csv_path = os.path.join(data_dir, "games.csv")
+    with open(csv_path, "w") as csv_file:
+        csv_file.write('id,name\n123,"a, game"\nhttps://www.igdb.com/games/zelda,zelda\n\n456,x\n')
+    assert read_game_references(csv_path) == references
+    txt_path = os.path.join(data_dir, "games.txt")
+    with open(txt_path, "w") as txt_file:
+        txt_file.write("123 https://www.igdb.com/games/zelda\n456\n")
+    assert read_game_references(txt_path) == references
+
+
+def test_igdb_query_slugs(monkeypatch):
+    # mock the client.post response, IGDB only knows slugs game-<id>
+    post_data = []
+
+    class MockPostResponse:
+        status_code = 200
+
+        def __init__(self, slugs):
+            self.slugs = slugs
+
+        def json(self):
+            return [{"id": int(slug[len("game-") :]), "slug": slug} for slug in self.slugs if slug.startswith("game-")]
+
+    def mock_post(url: str, **kwargs):
+        post_data.append(kwargs["data"])
+        return MockPostResponse([slug.strip('"') for slug in kwargs["data"].split("(")[1].split(")")[0].split(",")])
+
+    monkeypatch.setattr(get_client(), "post", mock_post)
+    monkeypatch.setenv("CLIENT_ID", "aaa")
+    assert query_igdb_slugs(["game-1", "zelda", "game-22"], "some_access_token") == {"game-1": "1", "game-22": "22"}
+    assert post_data == ['fields slug; where slug = ("game-1","zelda","game-22"); limit 500;']
+
+    # slugs (as IDs) are queried IGDB_PAGE_LIMIT per request
+    assert paginate(["1", "2", "3", "4", "5"], 2) == [["1", "2"], ["3", "4"], ["5"]]
+    assert paginate([], 2) == []
+
+
+def test_game_details(monkeypatch):
+    game_json = {"game_id": "1", "name": "Zelda", "order_name": "The Legend of Zelda", "year": 1986, "checksum": "a"}
+    game = GameDetails.from_json(game_json)
+    assert game == GameDetails(game_id="1", name="Zelda", order_name="The Legend of Zelda", year=1986, checksum="a")
+    assert game.to_json() == game_json
+    assert not hasattr(game, "__dict__")  # slots only
+
+    # games are validated when read, numeric years converted, unknown fields ignored
+    assert GameDetails.from_json({**game_json, "year": "1986", "extra": 1}) == game
+    for invalid_game_json in [
+        {key: value for key, value in game_json.items() if key != "name"},
+        {**game_json, "year": "soon"},
+        {**game_json, "year": True},
+        {**game_json, "game_id": 1},
+        {**game_json, "updated_at": "yesterday"},
+        ["1", "Zelda"],
+    ]:
+        with pytest.raises(ValueError):
+            GameDetails.from_json(invalid_game_json)
+
+    # in strict mode, pydantic validates them, without converting anything
+    monkeypatch.setenv(STRICT_ENV_VAR, "1")
+    assert GameDetails.from_json(game_json) == game
+    with pytest.raises(ValueError):
+        GameDetails.from_json({**game_json, "year": "1986"})
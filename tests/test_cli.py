@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from igdb_indexer.cli import main
+from igdb_indexer.igdb_interface import get_client
+from igdb_indexer.json_interface import get_all_json, load_json
+
+
+@pytest.fixture
+def mock_igdb(monkeypatch):
+    # mock the client.post responses, IGDB knows all games except those with IDs multiple of 7, none has a cover
+    data_dir: str = "test_data"
+    if os.path.exists(data_dir):
+        shutil.rmtree(data_dir)
+    post_data = []
+
+    class MockPostResponse:
+        status_code = 200
+
+        def __init__(self, game_ids):
+            self.game_ids = game_ids
+
+        def json(self):
+            if self.game_ids is None:
+                return {"access_token": "token", "expires_in": 5000000, "token_type": "bearer"}
+            if self.game_ids[0].startswith('"'):  # slugs, game-<id>
+                slugs = [slug.strip('"') for slug in self.game_ids]
+                return [{"id": int(slug[len("game-") :]), "slug": slug} for slug in slugs if slug.startswith("game-")]
+            return [
+                {"id": int(game_id), "name": "game " + game_id, "release_dates": [{"y": 2000}], "checksum": "v1"}
+                for game_id in self.game_ids
+                if int(game_id) % 7 != 0
+            ]
+
+    def mock_post(url: str, **kwargs):
+        if "data" not in kwargs:
+            return MockPostResponse(None)
+        post_data.append(kwargs["data"])
+        return MockPostResponse(kwargs["data"].split("(")[1].split(")")[0].split(","))
+
+    monkeypatch.setattr(get_client(), "post", mock_post)
+    monkeypatch.setenv("CLIENT_ID", "aaa")
+    monkeypatch.setenv("CLIENT_SECRET", "bbb")
+    yield post_data
+    shutil.rmtree(data_dir)
+
+
+def test_cli(mock_igdb, capsys):
+    data_dir: str = "test_data"
+
+    # games are fetched in one request, and the list saved once
+    assert main(["--data-dir", data_dir, "add", "rpg", "1", "2", "3"]) == 0
+    assert len(mock_igdb) == 1
+    assert [game["game_id"] for game in load_json("rpg.json", data_dir)["games"]] == ["1", "2", "3"]
+    assert "Adding to rpg.json: 3/3" in capsys.readouterr().out
+
+    # games not in IGDB fail the command, the others are still added
+    assert main(["--data-dir", data_dir, "add", "rpg.json", "7", "8"]) == 1
+    assert [game["game_id"] for game in load_json("rpg.json", data_dir)["games"]] == ["1", "2", "3", "8"]
+
+    # many games at once, by ID or URL, and from files, with the ones which failed reported
+    mock_igdb.clear()
+    with open("test_games.csv", "w") as games_file:
+        games_file.write("id,name\n9,game 9\nhttps://www.igdb.com/games/game-10,game 10\nnope,?\n")
+    try:
+        arguments = ["--data-dir", data_dir, "add", "rpg", "https://www.igdb.com/games/unknown", "14", "--file"]
+        assert main(arguments + ["test_games.csv"]) == 1
+    finally:
+        os.remove("test_games.csv")
+    assert len(mock_igdb) == 2
+    assert [game["game_id"] for game in load_json("rpg.json", data_dir)["games"]] == ["1", "2", "3", "8", "9", "10"]
+    assert "Failed to add: https://www.igdb.com/games/unknown, 14, nope" in capsys.readouterr().out
+
+    # lists are refreshed, all of them by default, and only the changed games if asked to
+    mock_igdb.clear()
+    assert main(["--data-dir", data_dir, "refresh", "--changed"]) == 0
+    assert len(mock_igdb) == 1 and mock_igdb[0].startswith("fields updated_at,checksum;")
+    assert main(["--data-dir", data_dir, "refresh", "rpg"]) == 0
+    assert len(mock_igdb) == 2
+
+    # lists are imported from files, and removed
+    with open("test_import.json", "w") as import_file:
+        json.dump(load_json("rpg.json", data_dir), import_file)
+    try:
+        assert main(["--data-dir", data_dir, "import", "--list", "other", "--no-covers", "test_import.json"]) == 0
+    finally:
+        os.remove("test_import.json")
+    assert load_json("other.json", data_dir) == load_json("rpg.json", data_dir)
+
+    # games no longer in IGDB fail imports and refreshes, and are kept as they were
+    with open("test_import.json", "w") as import_file:
+        json.dump({"games": [{"game_id": "21", "name": "game 21", "order_name": "game", "year": 2000}]}, import_file)
+    try:
+        assert main(["--data-dir", data_dir, "import", "--list", "gone", "test_import.json"]) == 1
+    finally:
+        os.remove("test_import.json")
+    assert "Failed to fetch: 21" in capsys.readouterr().out
+    assert main(["--data-dir", data_dir, "refresh", "gone"]) == 1
+    assert "No longer found in IGDB, kept as they were: 21" in capsys.readouterr().out
+    assert [game["game_id"] for game in load_json("gone.json", data_dir)["games"]] == ["21"]
+
+    assert main(["--data-dir", data_dir, "remove-list", "rpg", "gone", "missing"]) == 1
+    assert get_all_json(data_dir) == ["other.json"]
+
+    # covers of games no list has are removed
+    shutil.copyfile(os.path.join("igdb_indexer", "default.jpg"), os.path.join(data_dir, "100.jpg"))
+    shutil.copyfile(os.path.join("igdb_indexer", "default.jpg"), os.path.join(data_dir, "1.jpg"))
+    assert main(["--data-dir", data_dir, "prune-covers"]) == 0
+    assert not os.path.exists(os.path.join(data_dir, "100.jpg"))
+    assert os.path.exists(os.path.join(data_dir, "1.jpg"))
+
+    # thumbnails of all games are made in worker processes
+    assert main(["--data-dir", data_dir, "warm-thumbnails", "--width", "100", "--workers", "2"]) == 0
+    assert len(os.listdir(os.path.join(data_dir, ".thumbs"))) == 6
+
+
+def test_cli_without_tk():
+    # the CLI never imports the GUI, so it runs where there's no Tk
+    code = "import sys, igdb_indexer.cli; assert 'tkinter' not in sys.modules and 'PIL.ImageTk' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
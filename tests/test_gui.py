@@ -0,0 +1,520 @@
+import os
+import threading
+import time
+from concurrent.futures import CancelledError
+
+from igdb_indexer import gui, updates
+from igdb_indexer.catalog import GameCatalog
+from igdb_indexer.gui import BackgroundTask, BackgroundWorker, GamesListPage, ImageCache
+from igdb_indexer.journal import get_journal_path
+from igdb_indexer.json_interface import get_all_json, load_json, remove_json, save_json
+
+
+class FakeRoot:
+    """stands in for the Tk root, runs after() callbacks when asked to"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, _delay_ms: int, callback) -> None:
+        self.callbacks.append(callback)
+
+    def run_until_idle(self, timeout_s: float = 5) -> None:
+        deadline = time.monotonic() + timeout_s
+        while self.callbacks and time.monotonic() < deadline:
+            time.sleep(0.01)
+            self.callbacks.pop(0)()
+
+
+def test_background_worker():
+    root = FakeRoot()
+    worker = BackgroundWorker(root)
+    main_thread = threading.current_thread()
+
+    # progress and results are delivered in the main thread
+    progress = []
+    results = []
+    worker_threads = []
+
+    def work(task: BackgroundTask) -> str:
+        worker_threads.append(threading.current_thread())
+        for index in range(1, 4):
+            task.report_progress(index)
+        return "done"
+
+    def on_progress(value: int) -> None:
+        assert threading.current_thread() is main_thread
+        progress.append(value)
+
+    def on_done(result: str) -> None:
+        assert threading.current_thread() is main_thread
+        results.append(result)
+
+    worker.submit(work, on_done, on_progress)
+    root.run_until_idle()
+    assert worker_threads[0] is not main_thread
+    assert progress == [1, 2, 3]
+    assert results == ["done"]
+    assert worker.pending_tasks == 0
+
+    # cancelled and failed work is reported as an error
+    errors = []
+    started = threading.Event()
+
+    def cancellable_work(task: BackgroundTask) -> None:
+        started.set()
+        task.cancel_event.wait(5)
+        raise CancelledError()
+
+    task = worker.submit(cancellable_work, results.append, on_error=errors.append)
+    started.wait(5)
+    task.cancel()
+    root.run_until_idle()
+    assert len(errors) == 1
+    assert isinstance(errors[0], CancelledError)
+    assert results == ["done"]
+
+
+class FakeImage:
+    """stands in for a PhotoImage of 10x10 pixels, 400 bytes"""
+
+    def width(self) -> int:
+        return 10
+
+    def height(self) -> int:
+        return 10
+
+
+class FakeCoverLoader:
+    """stands in for the CoverLoader, loads covers when asked to"""
+
+    def __init__(self):
+        self.pending = []
+
+    def load(self, game_id: str, width: int, dark: bool, callback) -> None:
+        self.pending.append((game_id, width, dark, callback))
+
+    def placeholder(self, _width: int, _height=None, dark: bool = False) -> str:
+        return "placeholder"
+
+    def finish_all(self) -> None:
+        pending, self.pending = self.pending, []
+        for _game_id, _width, _dark, callback in pending:
+            callback(FakeImage())
+
+
+def test_image_cache():
+    cover_loader = FakeCoverLoader()
+    image_cache = ImageCache(cover_loader, max_bytes=1000)  # room for 2 images
+
+    # missing images are loaded in the background, then cached
+    loaded = []
+    assert image_cache.get(("1", 10, "normal"), loaded.append) is None
+    assert cover_loader.pending[0][:3] == ("1", 10, False)
+    cover_loader.finish_all()
+    assert len(loaded) == 1
+    assert image_cache.get(("1", 10, "normal"), loaded.append) is loaded[0]
+    assert image_cache.bytes_used == 400
+
+    # pinned images are never evicted, least recently used unpinned ones are
+    image_cache.pin(("1", 10, "normal"))
+    for game_id in ("2", "3", "4"):
+        image_cache.get((game_id, 10, "dark"), loaded.append)
+        cover_loader.finish_all()
+    assert list(image_cache.images) == [("1", 10, "normal"), ("4", 10, "dark")]
+    assert image_cache.bytes_used == 800
+
+    # unpinned images can be evicted once more images come in
+    image_cache.unpin(("1", 10, "normal"))
+    image_cache.get(("5", 10, "normal"), loaded.append)
+    cover_loader.finish_all()
+    assert list(image_cache.images) == [("4", 10, "dark"), ("5", 10, "normal")]
+
+
+class FakeGameFrame:
+    """stands in for a GameFrame, keeps the game it's bound to and where it's gridded"""
+
+    def __init__(self, _tab, _master):
+        self.game_info = None
+        self.hidden = False
+        self.grid_position = None
+        self.grid_calls = 0
+        self.destroyed = False
+
+    def bind_game(self, game_info, hidden: bool = False) -> None:
+        self.game_info = game_info
+        self.hidden = hidden
+
+    def set_img_hidden(self, hidden: bool) -> None:
+        self.hidden = hidden
+
+    def grid(self, row: int, column: int, **_kwargs) -> None:
+        self.grid_position = (row, column)
+        self.grid_calls += 1
+
+    def destroy(self) -> None:
+        self.destroyed = True
+
+
+class FakeLabel:
+    def __init__(self):
+        self.image = None
+
+    def configure(self, image=None, **_kwargs) -> None:
+        self.image = image
+
+
+class CoverGameFrame(FakeGameFrame, gui.GameFrame):
+    """a GameFrame with fake widgets, which shows (and pins) covers like the real one"""
+
+    def __init__(self, tab, master):
+        FakeGameFrame.__init__(self, tab, master)
+        self.tab = tab
+        self.cover_key = None
+        self.label_title = self.label_year = FakeLabel()
+        self.label_img = FakeLabel()
+
+    bind_game = gui.GameFrame.bind_game
+    set_img_hidden = gui.GameFrame.set_img_hidden
+
+    def destroy(self) -> None:
+        self.release_cover()
+        self.destroyed = True
+
+
+class FakeCanvas:
+    """stands in for the Canvas of a GamesListPage, of some size, scrolled down y_px"""
+
+    def __init__(self, width_px: int, height_px: int):
+        self.width_px = width_px
+        self.height_px = height_px
+        self.y_px = 0
+        self.scrollregion = None
+        self.windows = {}  # id -> {window, coords, state}
+        self.last_window_id = 0
+
+    def update(self) -> None:
+        pass
+
+    def winfo_width(self) -> int:
+        return self.width_px
+
+    def winfo_height(self) -> int:
+        return self.height_px
+
+    def configure(self, scrollregion=None, **_kwargs) -> None:
+        self.scrollregion = scrollregion
+
+    def yview_moveto(self, fraction: float) -> None:
+        self.y_px = 0 if self.scrollregion is None else round(fraction * self.scrollregion[3])
+
+    def canvasy(self, y_px: int) -> int:
+        return self.y_px + y_px
+
+    def create_window(self, x: int, y: int, window, anchor: str, state: str) -> int:
+        self.last_window_id += 1
+        window_id = self.last_window_id
+        self.windows[window_id] = {"window": window, "coords": (x, y), "state": state}
+        return window_id
+
+    def delete(self, window_id: int) -> None:
+        del self.windows[window_id]
+
+    def coords(self, window_id: int, x: float, y: float) -> None:
+        self.windows[window_id]["coords"] = (x, y)
+
+    def itemconfigure(self, window_id: int, state: str) -> None:
+        self.windows[window_id]["state"] = state
+
+
+class FakeScrollbar:
+    def update(self) -> None:
+        pass
+
+    def winfo_width(self) -> int:
+        return 10
+
+    def set(self, _first: float, _last: float) -> None:
+        pass
+
+
+class FakeTab:
+    def __init__(self):
+        self.games_count_updates = 0
+
+    def update_games_count(self) -> None:
+        self.games_count_updates += 1
+
+
+def make_games(game_ids):
+    return [
+        {"game_id": game_id, "name": f"game {game_id}", "order_name": game_id, "year": 2000} for game_id in game_ids
+    ]
+
+
+def make_games_list_page(
+    monkeypatch, game_ids, cols: int = 4, rows_in_view: int = 2, worker=None, image_cache=None
+) -> GamesListPage:
+    """a GamesListPage of list.json with game_ids (sorted), on fake widgets, sized to cols columns and rows_in_view
+    rows, without Tk. Its frames only load covers if given an image_cache"""
+    monkeypatch.setattr(gui, "GameFrame", FakeGameFrame if image_cache is None else CoverGameFrame)
+    catalog = GameCatalog()
+    catalog.add_list("list.json", {"games": make_games(game_ids)})
+    page = GamesListPage.__new__(GamesListPage)
+    page.root = FakeTab()
+    page.cols = page.width_px = page.pad_x = 0
+    page.search_text = ""
+    page.json_name = "list.json"
+    page.worker = worker
+    page.image_cache = image_cache
+    page.catalog = catalog
+    page.busy = False
+    page.shown = False
+    page.canvas = FakeCanvas(cols * gui.GAME_WIDTH_PX + 20, rows_in_view * gui.GAME_HEIGHT_PX)
+    page.vsb = FakeScrollbar()
+    page.frame = None
+    page.make_game_frames(catalog.lists["list.json"])
+    page._on_canvas_configure(None)
+    return page
+
+
+class FakeProcessingWindow:
+    def __init__(self, _max_progress: int, on_cancel=None):
+        self.on_cancel = on_cancel
+
+    def update_progress(self, _progress: int) -> None:
+        pass
+
+    def destroy(self) -> None:
+        pass
+
+
+def test_update_keeps_games_changed_meanwhile(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)  # the GUI saves to user_data
+    os.makedirs("user_data")
+    save_json("list.json", {"games": make_games(["1", "2", "3"])})
+    monkeypatch.setattr(gui, "ProcessingWindow", FakeProcessingWindow)
+    root = FakeRoot()
+    page = make_games_list_page(monkeypatch, ["1", "2", "3"], worker=BackgroundWorker(root))
+
+    # mock IGDB, the update's fetch waits until the tab's games changed
+    class FakeTokenManager:
+        def call(self, func):
+            return func("token")
+
+    fetching = threading.Event()
+    games_changed = threading.Event()
+
+    def mock_query_igdb_batch(game_ids, _access_token, game_cb=None, **_kwargs):
+        fetching.set()
+        games_changed.wait(5)
+        return {game_id: {**make_games([game_id])[0], "name": f"new game {game_id}"} for game_id in game_ids}
+
+    monkeypatch.setattr(updates, "get_token_manager", lambda _dir: FakeTokenManager())
+    monkeypatch.setattr(updates, "query_igdb_batch", mock_query_igdb_batch)
+    monkeypatch.setattr(gui, "get_token_manager", FakeTokenManager)
+    monkeypatch.setattr(gui, "query_igdb", lambda game_id, _access_token: make_games([game_id])[0])
+
+    # games removed and added while the tab is being updated are neither brought back nor lost
+    page.update_all_games()
+    assert fetching.wait(5)
+    page.remove_game("2")
+    page.add_new_game(4)
+    deadline = time.monotonic() + 5
+    while "4" not in [game["game_id"] for game in load_json("list.json")["games"]] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    games_changed.set()
+    root.run_until_idle()
+    saved_games = load_json("list.json")["games"]
+    assert [(game["game_id"], game["name"]) for game in saved_games] == [
+        ("1", "new game 1"),
+        ("3", "new game 3"),
+        ("4", "game 4"),
+    ]
+    assert page.game_ids == ["1", "3", "4"]
+    assert not page.busy
+
+    # the tab can't be removed while being updated, and a list removed meanwhile (e.g., by the CLI) isn't brought back
+    window = gui.MainWindow.__new__(gui.MainWindow)
+    tab = FakeBuiltTab(page)
+    tab.json_name = "list.json"
+    window.tabs = [tab]
+    window.get_current_tab = lambda: tab
+    fetching.clear()
+    games_changed.clear()
+    page.update_all_games()
+    assert fetching.wait(5)
+    window.remove_tab()
+    assert window.tabs == [tab]
+    remove_json("list.json")
+    games_changed.set()
+    root.run_until_idle()
+    assert get_all_json("user_data") == []
+    assert not os.path.exists(get_journal_path("list.json"))
+
+
+def get_bound_game_ids(page: GamesListPage):
+    """IDs of the games the frames in view are bound to, in order"""
+    return [
+        page.canvas.windows[frame_window]["window"].game_info.game_id
+        for frame_window in page.frame_windows
+        if page.canvas.windows[frame_window]["state"] == "normal"
+    ]
+
+
+def test_virtual_grid(monkeypatch):
+    game_ids = [f"{index:04d}" for index in range(1000)]
+    page = make_games_list_page(monkeypatch, game_ids, cols=4, rows_in_view=2)
+    assert page.virtual and page.cols == 4
+
+    # the scroll region has all rows, but only the frames in view (plus a row) are made
+    assert page.canvas.scrollregion == (0, 0, page.width_px, 250 * gui.GAME_HEIGHT_PX)
+    assert len(page.game_widgets) == len(page.canvas.windows) == 12
+    assert get_bound_game_ids(page) == game_ids[:12]
+
+    # scrolling re-binds the frames to the games in view, in their grid positions
+    page.canvas.y_px = 10 * gui.GAME_HEIGHT_PX + 5
+    page._on_yscroll(0.04, 0.05)
+    assert get_bound_game_ids(page) == game_ids[40:52]
+    x, y = page.canvas.windows[page.frame_windows[5]]["coords"]
+    assert y == 12 * gui.GAME_HEIGHT_PX  # the 6th frame is in the 2nd column of row 11
+    assert x == page.pad_x * 3 + gui.GAME_WIDTH_PX * 1.5
+
+    # frames past the last game are hidden
+    page.canvas.y_px = 249 * gui.GAME_HEIGHT_PX
+    page._on_yscroll(0.99, 1)
+    assert get_bound_game_ids(page) == game_ids[996:]
+
+    # the pool doesn't grow with the list, the scroll region does
+    for index in range(1000, 1400):
+        game_id = f"{index:04d}"
+        page.insert_game(game_id, page.catalog.add_game("list.json", make_games([game_id])[0]))
+    assert len(page.game_widgets) == len(page.canvas.windows) == 12
+    assert page.canvas.scrollregion == (0, 0, page.width_px, 350 * gui.GAME_HEIGHT_PX)
+
+
+def check_grid(page: GamesListPage) -> None:
+    """the frames are in the order of the games, each in its own cell"""
+    assert [game_frame.game_info.game_id for game_frame in page.game_widgets] == page.game_ids
+    assert [game_frame.grid_position for game_frame in page.game_widgets] == [
+        divmod(index, page.cols) for index in range(len(page.game_ids))
+    ]
+    assert not any(game_frame.destroyed for game_frame in page.game_widgets)
+
+
+def test_insert_and_delete_games(monkeypatch):
+    page = make_games_list_page(monkeypatch, [f"{index:04d}" for index in range(10)], cols=4)
+    assert not page.virtual
+    check_grid(page)
+    page.canvas.y_px = 100
+
+    # inserting a game only re-grids the frames from its index on, and keeps the view
+    frames = list(page.game_widgets)
+    index = page.catalog.add_game("list.json", make_games(["0004a"])[0])
+    page.insert_game("0004a", index)
+    assert index == 5
+    check_grid(page)
+    assert page.game_widgets[:5] == frames[:5] and page.game_widgets[6:] == frames[5:]
+    assert [game_frame.grid_calls for game_frame in page.game_widgets] == [1] * 5 + [1] + [2] * 5
+    assert page.canvas.y_px == 100
+
+    # so does deleting one
+    page.catalog.remove_game("list.json", "0002")
+    page.delete_game("0002")
+    check_grid(page)
+    assert frames[2].destroyed
+    assert [game_frame.grid_calls for game_frame in page.game_widgets] == [1, 1, 2, 2, 2] + [3] * 5
+    assert page.canvas.y_px == 100
+    page.delete_game("0002")  # already gone
+    check_grid(page)
+
+    # a full re-grid, e.g., when the columns changed
+    page.cols = 3
+    page._regrid_games(0)
+    check_grid(page)
+
+
+def test_insert_and_delete_games_virtual_grid(monkeypatch):
+    page = make_games_list_page(monkeypatch, [f"{index:04d}" for index in range(300)], cols=4)
+    assert page.virtual
+    page.canvas.y_px = 10 * gui.GAME_HEIGHT_PX
+    page._on_yscroll(0.1, 0.12)
+    assert get_bound_game_ids(page) == page.game_ids[40:52]
+
+    # games inserted or deleted in view (or before it) shift the games in view, the view stays
+    for game_id in ("0041a", "0005a"):
+        page.insert_game(game_id, page.catalog.add_game("list.json", make_games([game_id])[0]))
+    assert get_bound_game_ids(page) == page.game_ids[40:52]
+    assert get_bound_game_ids(page)[:3] == ["0039", "0040", "0041"]
+    for game_id in ("0005a", "0010", "0044"):
+        page.catalog.remove_game("list.json", game_id)
+        page.delete_game(game_id)
+    assert get_bound_game_ids(page) == page.game_ids[40:52]
+    assert get_bound_game_ids(page)[:4] == ["0041", "0041a", "0042", "0043"]
+    assert page.canvas.y_px == 10 * gui.GAME_HEIGHT_PX
+    assert page.canvas.scrollregion == (0, 0, page.width_px, 75 * gui.GAME_HEIGHT_PX)
+
+    # frames stay in their cells
+    for slot, frame_window in enumerate(page.frame_windows):
+        row, col = divmod(40 + slot, 4)
+        x = page.pad_x + col * (gui.GAME_WIDTH_PX + 2 * page.pad_x) + gui.GAME_WIDTH_PX / 2
+        assert page.canvas.windows[frame_window]["coords"] == (x, (row + 1) * gui.GAME_HEIGHT_PX)
+
+
+class FakeGamesTab:
+    def __init__(self, games_count: int):
+        self.games_count = games_count
+        self.built = False
+
+    def is_built(self) -> bool:
+        return self.built
+
+    def build(self) -> None:
+        self.built = True
+
+
+def test_preload_tabs():
+    window = gui.MainWindow.__new__(gui.MainWindow)
+    root = FakeRoot()
+    window.after = root.after
+    window.after_idle = lambda callback: root.after(0, callback)
+    window.tabs = [FakeGamesTab(10), FakeGamesTab(gui.VIRTUAL_GRID_MIN_GAMES), FakeGamesTab(0)]
+
+    # short tabs are built in the background, long ones only once selected
+    window._preload_next_tab()
+    root.run_until_idle()
+    assert [tab.built for tab in window.tabs] == [True, False, True]
+
+
+class FakeBuiltTab:
+    def __init__(self, games_list_page: GamesListPage):
+        self.games_list_page = games_list_page
+
+    def build(self) -> GamesListPage:
+        return self.games_list_page
+
+
+def test_covers_of_unselected_tabs(monkeypatch):
+    cover_loader = FakeCoverLoader()
+    image_cache = ImageCache(cover_loader, max_bytes=400 * 12)  # room for the covers of a tab and a half
+    tabs = [
+        FakeBuiltTab(
+            make_games_list_page(monkeypatch, [f"{tab}{index:03d}" for index in range(8)], image_cache=image_cache)
+        )
+        for tab in range(3)
+    ]
+    window = gui.MainWindow.__new__(gui.MainWindow)
+    window.tabs = tabs
+
+    # tabs built in the background load no covers, only the selected tab has its covers loaded and pinned
+    assert cover_loader.pending == [] and image_cache.bytes_used == 0
+    for selected_tab in tabs + tabs[:1]:
+        window.get_current_tab = lambda: selected_tab
+        window._on_tab_changed(None)
+        cover_loader.finish_all()
+        assert len(image_cache.pins) == 8
+        assert image_cache.bytes_used <= image_cache.max_bytes
+        for tab in tabs:
+            shown = tab is selected_tab
+            assert all((frame.cover_key is not None) == shown for frame in tab.games_list_page.game_widgets)
+            assert all(bool(frame.label_img.image) == shown for frame in tab.games_list_page.game_widgets)